@@ -0,0 +1,320 @@
+"""Focus analytics over a range of days, computed with pandas.
+
+The store is read into one columnar frame (day, timestamp, classification)
+and every metric is a vectorized group-by over it. Each month is cached as a
+Feather file under ``<save_dir>/.analytics`` together with the store's day
+versions it was built from, so a report over a year only queries the months
+that changed since the last one.
+
+    python Analytics.py [--save-dir DIR] [--days 30 | --start DAY --end DAY] [--export FILE]
+
+pandas (and pyarrow, for the cache and Parquet/Feather export) are only
+imported when analytics are used; the GUI and the daemon start without them.
+"""
+import argparse
+import datetime
+import json
+import logging
+import pathlib
+
+log = logging.getLogger(__name__)
+
+
+CLASSES = ["on-task", "off-task", "none"]
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+COLUMNS = ["day", "timestamp", "classification"]
+STREAK_GAP = datetime.timedelta(minutes=30)  # longer without a capture ends a streak
+
+
+def _month_range(month):
+    # "YYYY-mm" -> (first day, last day)
+    first = datetime.date.fromisoformat(month + "-01")
+    following = (first.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return first.isoformat(), (following - datetime.timedelta(days=1)).isoformat()
+
+
+def _months(start_day, end_day):
+    month = datetime.date.fromisoformat(str(start_day)).replace(day=1)
+    last = datetime.date.fromisoformat(str(end_day))
+    while month <= last:
+        yield month.strftime("%Y-%m")
+        month = (month.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def _to_frame(rows):
+    import pandas as pd
+    frame = pd.DataFrame.from_records(rows, columns=COLUMNS)
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"], format="%Y-%m-%d %H:%M:%S")
+    frame["classification"] = pd.Categorical(frame["classification"], categories=CLASSES)
+    return frame
+
+
+class FrameCache:
+    """Per-month Feather files keyed by the store's day versions."""
+
+    DIR_NAME = ".analytics"
+
+    def __init__(self, save_dir):
+        self.path = pathlib.Path(save_dir) / self.DIR_NAME
+        self._index_path = self.path / "index.json"
+        try:
+            import pyarrow  # noqa: F401
+            self.enabled = True
+        except ImportError:
+            log.info("pyarrow is not installed, analytics will not be cached")
+            self.enabled = False
+
+    def _index(self):
+        try:
+            return json.loads(self._index_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def get(self, month, versions):
+        import pandas as pd
+        if not self.enabled or self._index().get(month) != versions:
+            return None
+        try:
+            return pd.read_feather(self.path / f"{month}.feather")
+        except (OSError, ValueError) as e:
+            log.warning(f"Could not read analytics cache for {month}: {e}")
+            return None
+
+    def put(self, month, versions, frame):
+        if not self.enabled:
+            return
+        try:
+            self.path.mkdir(exist_ok=True)
+            frame.reset_index(drop=True).to_feather(self.path / f"{month}.feather")
+            index = self._index()
+            index[month] = versions
+            temp_path = self._index_path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(index))
+            temp_path.replace(self._index_path)
+        except (OSError, ValueError) as e:
+            log.warning(f"Could not write analytics cache for {month}: {e}")
+
+
+def load_frame(store, start_day, end_day, cache=True):
+    """Every screenshot from start_day to end_day (inclusive) as a DataFrame.
+
+    Columns: day (str), timestamp (datetime64), classification (categorical).
+    """
+    import pandas as pd
+    start_day, end_day = str(start_day), str(end_day)
+    months = list(_months(start_day, end_day))
+    if not months:
+        return _to_frame([])
+    frame_cache = FrameCache(store.save_dir) if cache else None
+    versions = store.day_versions(_month_range(months[0])[0], _month_range(months[-1])[1])
+
+    frames = []
+    for month in months:
+        first, last = _month_range(month)
+        month_versions = {day: v for day, v in versions.items() if first <= day <= last}
+        frame = frame_cache.get(month, month_versions) if frame_cache else None
+        if frame is None:
+            frame = _to_frame(store.day_range_rows(first, last))
+            if frame_cache:
+                frame_cache.put(month, month_versions, frame)
+        frames.append(frame)
+
+    frame = pd.concat(frames, ignore_index=True)
+    frame = frame[(frame["day"] >= start_day) & (frame["day"] <= end_day)].reset_index(drop=True)
+    frame["classification"] = frame["classification"].astype(pd.CategoricalDtype(CLASSES))
+    return frame
+
+
+# --- metrics -----------------------------------------------------------------
+
+def _with_ratio(counts):
+    # on-task share of the classified captures; NaN where nothing was classified
+    counts = counts.reindex(columns=CLASSES, fill_value=0)
+    counts.columns = list(CLASSES)  # plain labels, so more columns can be added
+    classified = counts["on-task"] + counts["off-task"]
+    counts["on_task_ratio"] = (counts["on-task"] / classified.where(classified > 0)).round(3)
+    return counts
+
+
+def focus_by_hour(frame):
+    import pandas as pd
+    counts = pd.crosstab(frame["timestamp"].dt.hour, frame["classification"], dropna=False)
+    counts = counts.reindex(range(24), fill_value=0)
+    counts.index.name = "hour"
+    return _with_ratio(counts)
+
+
+def focus_by_weekday(frame):
+    import pandas as pd
+    counts = pd.crosstab(frame["timestamp"].dt.dayofweek, frame["classification"], dropna=False)
+    counts = counts.reindex(range(7), fill_value=0)
+    counts.index = pd.Index(WEEKDAYS, name="weekday")
+    return _with_ratio(counts)
+
+
+def daily_focus(frame, start_day, end_day, window=7):
+    """Counts and on-task ratio per day, with a ``window``-day rolling ratio.
+
+    Days without captures are included with zero counts; the rolling ratio
+    is on-task over classified captures summed across the window, so quiet
+    days weigh less than busy ones.
+    """
+    import pandas as pd
+    counts = pd.crosstab(frame["day"], frame["classification"], dropna=False)
+    days = pd.date_range(start_day, end_day, freq="D").strftime("%Y-%m-%d")
+    counts = _with_ratio(counts.reindex(days, fill_value=0))
+    counts.index.name = "day"
+    on_task = counts["on-task"].rolling(window, min_periods=1).sum()
+    classified = (counts["on-task"] + counts["off-task"]).rolling(window, min_periods=1).sum()
+    counts[f"rolling_{window}d"] = (on_task / classified.where(classified > 0)).round(3)
+    return counts
+
+
+def streaks(frame, classification="on-task", max_gap=STREAK_GAP):
+    """Runs of consecutive captures with the same classification.
+
+    A run ends when the classification changes, the day changes, or no
+    capture was taken for ``max_gap``. Returns one row per run of
+    ``classification``: start, end, captures and duration, longest first.
+    """
+    import pandas as pd
+    if frame.empty:
+        return pd.DataFrame(columns=["start", "end", "captures", "duration"])
+    ordered = frame.sort_values("timestamp", kind="stable")
+    classes = ordered["classification"]
+    new_run = ((classes != classes.shift())
+               | (ordered["day"] != ordered["day"].shift())
+               | (ordered["timestamp"].diff() > max_gap))
+    runs = ordered.assign(run=new_run.cumsum())
+    runs = runs[runs["classification"] == classification]
+    result = runs.groupby("run")["timestamp"].agg(start="min", end="max", captures="size")
+    result["duration"] = result["end"] - result["start"]
+    return result.sort_values(["duration", "captures"], ascending=False).reset_index(drop=True)
+
+
+def summary(frame, streak_table):
+    counts = frame["classification"].value_counts().reindex(CLASSES, fill_value=0)
+    classified = counts["on-task"] + counts["off-task"]
+    return {
+        "captures": int(len(frame)),
+        "on-task": int(counts["on-task"]),
+        "off-task": int(counts["off-task"]),
+        "unclassified": int(counts["none"]),
+        "on_task_ratio": round(counts["on-task"] / classified, 3) if classified else None,
+        "streaks": int(len(streak_table)),
+        "longest_streak": streak_table["duration"].max() if len(streak_table) else None,
+        "median_streak": streak_table["duration"].median() if len(streak_table) else None,
+    }
+
+
+def report(store, start_day, end_day, window=7, cache=True):
+    # Everything the CLI and the GUI panel show, as DataFrames plus a summary dict
+    frame = load_frame(store, start_day, end_day, cache=cache)
+    streak_table = streaks(frame)
+    return {
+        "frame": frame,
+        "summary": summary(frame, streak_table),
+        "by_hour": focus_by_hour(frame),
+        "by_weekday": focus_by_weekday(frame),
+        "daily": daily_focus(frame, start_day, end_day, window),
+        "streaks": streak_table,
+    }
+
+
+def _duration(value):
+    # Timedelta -> "1h 20m"; "-" when there is none
+    if value is None:
+        return "-"
+    minutes = int(value.total_seconds() // 60)
+    return f"{minutes // 60}h {minutes % 60:02d}m" if minutes >= 60 else f"{minutes}m"
+
+
+def format_report(result, start_day, end_day, top_streaks=5, last_days=31):
+    # Plain-text report, shared by the CLI and the GUI panel
+    totals = result["summary"]
+    ratio = totals["on_task_ratio"]
+    by_hour = result["by_hour"]
+    lines = [
+        f"Focus from {start_day} to {end_day}",
+        "",
+        f"Captures:      {totals['captures']}  "
+        f"(on-task {totals['on-task']}, off-task {totals['off-task']}, unclassified {totals['unclassified']})",
+        f"On-task ratio: {'-' if ratio is None else f'{ratio:.0%}'}",
+        f"Streaks:       {totals['streaks']}  "
+        f"(longest {_duration(totals['longest_streak'])}, median {_duration(totals['median_streak'])})",
+    ]
+    if totals["captures"]:
+        lines += [
+            "",
+            "By hour of day",
+            by_hour[by_hour[CLASSES].sum(axis=1) > 0].to_string(),
+            "",
+            "By weekday",
+            result["by_weekday"].to_string(),
+            "",
+            f"Daily (last {min(last_days, len(result['daily']))} days)",
+            result["daily"].tail(last_days).to_string(),
+        ]
+    if len(result["streaks"]):
+        longest = result["streaks"].head(top_streaks)
+        lines += ["", "Longest on-task streaks"]
+        lines += [f"  {row.start:%Y-%m-%d %H:%M} to {row.end:%H:%M}  {_duration(row.duration):>7}  "
+                  f"{row.captures} captures" for row in longest.itertuples()]
+    return "\n".join(lines)
+
+
+def export(frame, path):
+    # Columnar export; the format follows the extension
+    path = pathlib.Path(path)
+    if path.suffix == ".parquet":
+        frame.to_parquet(path, index=False)
+    elif path.suffix == ".feather":
+        frame.reset_index(drop=True).to_feather(path)
+    elif path.suffix == ".csv":
+        frame.to_csv(path, index=False)
+    else:
+        raise ValueError(f"Unknown export format: {path.suffix} (use .parquet, .feather or .csv)")
+
+
+def date_range(days=None, start=None, end=None):
+    # (start_day, end_day) from --days or explicit dates; defaults to the last 30 days
+    end_day = datetime.date.fromisoformat(end) if end else datetime.date.today()
+    if start:
+        start_day = datetime.date.fromisoformat(start)
+    else:
+        start_day = end_day - datetime.timedelta(days=(days or 30) - 1)
+    return start_day.isoformat(), end_day.isoformat()
+
+
+def main():
+    from Config import load_config
+    from Metrics import configure_logging
+    from ScreenshotStore import close_stores, open_store
+
+    config = load_config()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save-dir", default=config["save_dir"])
+    parser.add_argument("--days", type=int, help="the last N days, ending today (default 30)")
+    parser.add_argument("--start", help="first day, YYYY-mm-dd")
+    parser.add_argument("--end", help="last day, YYYY-mm-dd (default today)")
+    parser.add_argument("--window", type=int, default=7, help="days in the rolling average")
+    parser.add_argument("--export", metavar="FILE", help="write the screenshots frame to .parquet, .feather or .csv")
+    parser.add_argument("--no-cache", action="store_true", help="read everything from the store")
+    parser.add_argument("--log-level", default=config["log_level"])
+    args = parser.parse_args()
+    configure_logging(args.log_level)
+
+    start_day, end_day = date_range(args.days, args.start, args.end)
+    store = open_store(args.save_dir)
+    try:
+        result = report(store, start_day, end_day, window=args.window, cache=not args.no_cache)
+    finally:
+        close_stores()
+    print(format_report(result, start_day, end_day))
+    if args.export:
+        export(result["frame"], args.export)
+        print(f"\nExported {len(result['frame'])} screenshots to {args.export}")
+
+
+if __name__ == "__main__":
+    main()
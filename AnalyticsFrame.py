@@ -0,0 +1,78 @@
+import datetime
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import customtkinter as ctk
+
+log = logging.getLogger(__name__)
+
+
+RANGES = {"Last 7 Days": 7, "Last 30 Days": 30, "Last 90 Days": 90, "Last 365 Days": 365}
+
+
+class AnalyticsFrame(ctk.CTkFrame):
+    """Focus report (see Analytics.py) for a range of days ending today.
+
+    The report is built on a background thread; pandas is imported there the
+    first time the panel is shown, and cached months make later reports quick.
+    """
+
+    def __init__(self, parent, store, font_scale=1, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.store = store
+        self.font_scale = font_scale
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analytics")
+        self._pending = None  # future of the report being built
+
+        font = ("", int(14 * font_scale))
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.pack(fill="x", padx=12, pady=(12, 0))
+        self._range = ctk.CTkOptionMenu(header, values=list(RANGES), font=font, command=lambda _: self.refresh())
+        self._range.set("Last 30 Days")
+        self._range.pack(side="left")
+        ctk.CTkButton(header, text="Refresh", font=font, width=90, command=self.refresh).pack(side="right")
+
+        self._text = ctk.CTkTextbox(self, font=("Courier", int(12 * font_scale)), wrap="none")
+        self._text.pack(fill="both", expand=True, padx=12, pady=12)
+        self._show("")
+
+    def set_store(self, store):
+        self.store = store
+        self.refresh()
+
+    def destroy(self):
+        self._worker.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
+
+    def refresh(self):
+        end = datetime.date.today()
+        start = end - datetime.timedelta(days=RANGES[self._range.get()] - 1)
+        self._show("Building report...")
+        self._pending = self._worker.submit(self._build, self.store, start.isoformat(), end.isoformat())
+        self._when_done(self._pending)
+
+    @staticmethod
+    def _build(store, start_day, end_day):
+        import Analytics
+        return Analytics.format_report(Analytics.report(store, start_day, end_day), start_day, end_day)
+
+    def _when_done(self, future):
+        # Tk is not thread-safe, so poll instead of calling back from the worker
+        if not future.done():
+            self.after(50, self._when_done, future)
+            return
+        if future is not self._pending or not self.winfo_exists():
+            return  # superseded by a newer refresh
+        try:
+            self._show(future.result())
+        except ImportError as e:
+            self._show(f"Analytics need pandas: {e}")
+        except Exception as e:
+            log.error(f"Error building analytics report: {e}")
+            self._show(f"Could not build the report: {e}")
+
+    def _show(self, text):
+        self._text.configure(state="normal")
+        self._text.delete("1.0", "end")
+        self._text.insert("1.0", text)
+        self._text.configure(state="disabled")
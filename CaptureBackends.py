@@ -0,0 +1,236 @@
+import logging
+import os
+import random
+import re
+import subprocess
+import threading
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+
+# One monitor, in screen coordinates
+Output = namedtuple("Output", ["name", "x", "y", "width", "height"])
+
+# " 1: +HDMI-1 1920/530x1080/300+3840+0  HDMI-1"
+_LISTMONITORS_LINE = re.compile(r"^\s*\d+:\s+\S+\s+(\d+)/\d+x(\d+)/\d+\+(-?\d+)\+(-?\d+)\s+(\S+)\s*$")
+
+
+def xrandr_outputs():
+    # Active monitors as XRandR reports them; empty when xrandr is unavailable
+    try:
+        result = subprocess.run(["xrandr", "--listmonitors"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return []
+    outputs = []
+    for line in result.stdout.splitlines():
+        match = _LISTMONITORS_LINE.match(line)
+        if match:
+            width, height, x, y, name = match.groups()
+            outputs.append(Output(name, int(x), int(y), int(width), int(height)))
+    return outputs
+
+
+class CaptureBackend:
+    """Grabs the whole screen, or one output of it, as an RGB PIL image."""
+
+    name = None
+
+    def is_available(self) -> bool:
+        return True
+
+    def grab(self) -> "Image.Image":
+        raise NotImplementedError
+
+    def outputs(self) -> list:
+        # The monitors making up the screen; empty if they cannot be told apart
+        return xrandr_outputs()
+
+    def grab_output(self, output) -> "Image.Image":
+        return self.grab().crop((output.x, output.y, output.x + output.width, output.y + output.height))
+
+    def close(self):
+        pass
+
+
+class MssBackend(CaptureBackend):
+    """In-process capture through mss (XShm on X11): no subprocess, no PNG round-trip."""
+
+    name = "mss"
+
+    def __init__(self):
+        # mss handles are not thread-safe, keep one per capturing thread
+        self._local = threading.local()
+        self._handles = []
+        self._handles_lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        try:
+            import mss  # noqa: F401
+        except ImportError:
+            return False
+        return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+    def _sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            import mss
+            sct = self._local.sct = mss.mss()
+            with self._handles_lock:
+                self._handles.append(sct)
+        return sct
+
+    def grab(self) -> "Image.Image":
+        from PIL import Image
+        sct = self._sct()
+        shot = sct.grab(sct.monitors[0])  # monitors[0] spans all outputs
+        return Image.frombuffer("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+    def outputs(self):
+        outputs = xrandr_outputs()
+        if not outputs:
+            monitors = self._sct().monitors[1:]
+            outputs = [Output(f"monitor-{i}", m["left"], m["top"], m["width"], m["height"])
+                       for i, m in enumerate(monitors, 1)]
+        return outputs
+
+    def grab_output(self, output):
+        from PIL import Image
+        shot = self._sct().grab({"left": output.x, "top": output.y, "width": output.width, "height": output.height})
+        return Image.frombuffer("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+    def close(self):
+        # Every thread's handle, including those of per-output grab threads
+        with self._handles_lock:
+            handles, self._handles = self._handles, []
+        for sct in handles:
+            sct.close()
+        self._local = threading.local()
+
+
+class GnomeScreenshotBackend(CaptureBackend):
+    """The original capture path: pyscreenshot driving gnome-screenshot."""
+
+    name = "gnome-screenshot"
+
+    def is_available(self) -> bool:
+        try:
+            import pyscreenshot  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def grab(self) -> "Image.Image":
+        import pyscreenshot
+        return pyscreenshot.grab(backend='gnome-screenshot')
+
+    def grab_output(self, output):
+        import pyscreenshot
+        bbox = (output.x, output.y, output.x + output.width, output.y + output.height)
+        return pyscreenshot.grab(bbox=bbox, backend='gnome-screenshot')
+
+
+class SyntheticBackend(CaptureBackend):
+    """Generates fake desktops (flat background plus a few windows) for tests and benchmarks."""
+
+    name = "synthetic"
+
+    def __init__(self, size=(1920, 1080), seed=0, outputs=None):
+        self.size = size
+        self._random = random.Random(seed)
+        self._outputs = list(outputs or [])  # Output tuples to report; none by default
+
+    def outputs(self):
+        return list(self._outputs)
+
+    def grab(self) -> "Image.Image":
+        return self._desktop(self.size)
+
+    def grab_output(self, output):
+        return self._desktop((output.width, output.height))
+
+    def _desktop(self, size):
+        from PIL import Image, ImageDraw
+        rnd = self._random
+        w, h = size
+        image = Image.new("RGB", size, (30, 30, 46))
+        draw = ImageDraw.Draw(image)
+        for _ in range(rnd.randint(2, 6)):
+            x0, y0 = rnd.randrange(w - w // 8), rnd.randrange(h - h // 8)
+            x1 = min(w, x0 + rnd.randint(w // 8, w // 2))
+            y1 = min(h, y0 + rnd.randint(h // 8, h // 2))
+            draw.rectangle((x0, y0, x1, y1), fill=tuple(rnd.randrange(256) for _ in range(3)))
+            # title bar and a few lines of "text"
+            draw.rectangle((x0, y0, x1, y0 + 24), fill=(60, 60, 60))
+            for ty in range(y0 + 36, y1 - 12, 18):
+                draw.line((x0 + 10, ty, x0 + 10 + rnd.randint(0, x1 - x0 - 20), ty), fill=(220, 220, 220), width=2)
+        return image
+
+
+BACKENDS = {
+    MssBackend.name: MssBackend,
+    GnomeScreenshotBackend.name: GnomeScreenshotBackend,
+    SyntheticBackend.name: SyntheticBackend,
+}
+
+# Preference order for "auto"; synthetic is never picked automatically
+AUTO_ORDER = [MssBackend.name, GnomeScreenshotBackend.name]
+
+
+class FallbackCapture(CaptureBackend):
+    """Tries backends in order, dropping any that is unavailable or fails to grab."""
+
+    def __init__(self, names):
+        self._backends = []
+        self._lock = threading.Lock()  # per-output grabs share this object
+        for name in names:
+            backend = BACKENDS[name]()
+            if backend.is_available():
+                self._backends.append(backend)
+            else:
+                log.info(f"Capture backend {name} is not available")
+        if not self._backends:
+            raise RuntimeError(f"No capture backend available (tried {', '.join(names)})")
+
+    @property
+    def name(self):
+        return self._backends[0].name
+
+    def grab(self) -> "Image.Image":
+        return self._call("grab")
+
+    def outputs(self):
+        return self._backends[0].outputs()
+
+    def grab_output(self, output):
+        return self._call("grab_output", output)
+
+    def _call(self, method, *args):
+        while True:
+            backend = self._backends[0]
+            try:
+                return getattr(backend, method)(*args)
+            except Exception as e:
+                with self._lock:
+                    if self._backends[0] is not backend:
+                        continue  # another thread already fell back; retry with its choice
+                    if len(self._backends) == 1:
+                        raise
+                    log.warning(f"Capture backend {backend.name} failed ({e}), falling back")
+                    self._backends.pop(0)
+                backend.close()
+
+    def close(self):
+        for backend in self._backends:
+            backend.close()
+
+
+def create_backend(name="auto") -> CaptureBackend:
+    # "auto" walks AUTO_ORDER; a named backend still falls back to the others
+    if name == "auto":
+        names = AUTO_ORDER
+    elif name in BACKENDS:
+        names = [name] + [n for n in AUTO_ORDER if n != name]
+    else:
+        raise ValueError(f"Unknown capture backend: {name}")
+    return FallbackCapture(names)
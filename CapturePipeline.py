@@ -0,0 +1,69 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from Metrics import CAPTURES, QUEUE_DEPTH
+
+log = logging.getLogger(__name__)
+
+
+class CapturePipeline:
+    """Capture → process → persist, with each stage off the capture thread.
+
+    ``submit`` hands a captured frame to a thread pool running ``process``
+    (pixelate, hash, encode; nothing is written yet) and returns immediately.
+    A single writer thread takes the results in submission order and passes
+    them to ``commit`` (write the image unless it repeats the last one, index
+    update, classification prompt), so the disk and the index have exactly one
+    writer and captures are committed in the order they were taken.
+
+    At most ``max_in_flight`` frames are queued or being processed. When the
+    pipeline is full, ``submit`` drops the frame instead of blocking, so a slow
+    disk never pushes the capture schedule back.
+    """
+
+    _STOP = object()
+
+    def __init__(self, process, commit, workers=2, max_in_flight=4):
+        self._process = process
+        self._commit = commit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="capture-process")
+        self._pending = queue.Queue(maxsize=max_in_flight)
+        self._writer = threading.Thread(target=self._write_loop, name="capture-writer", daemon=True)
+        self._writer.start()
+        self.submitted = 0
+        self.dropped = 0
+
+    def submit(self, frame) -> bool:
+        if self._pending.full():
+            self.dropped += 1
+            CAPTURES.inc(1, "dropped")
+            log.warning(f"Capture pipeline full, dropping frame ({self.dropped} dropped so far)")
+            return False
+        # Only the capture thread submits, so the slot checked above is still free
+        self._pending.put_nowait(self._executor.submit(self._process, frame))
+        self.submitted += 1
+        QUEUE_DEPTH.set(self._pending.qsize(), "pipeline")
+        return True
+
+    def _write_loop(self):
+        while True:
+            future = self._pending.get()
+            if future is self._STOP:
+                return
+            try:
+                self._commit(future.result())
+            except Exception as e:
+                CAPTURES.inc(1, "failed")
+                log.error(f"Error processing capture: {e}")
+            QUEUE_DEPTH.set(self._pending.qsize(), "pipeline")
+
+    def depth(self):
+        return self._pending.qsize()
+
+    def stop(self):
+        # Let every accepted frame finish processing and get committed
+        self._pending.put(self._STOP)
+        self._writer.join()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,91 @@
+import logging
+from collections import OrderedDict, namedtuple
+
+from Metrics import QUEUE_DEPTH
+
+log = logging.getLogger(__name__)
+
+
+# One screenshot waiting for an answer; only paths and the entry are kept,
+# the preview is decoded (through the bounded thumbnail cache) when shown
+Request = namedtuple("Request", ["image_path", "index", "entry", "time_label", "new"])
+
+
+class ClassificationQueue:
+    """Screenshots waiting to be classified, shown one at a time.
+
+    ``show(request, done)`` is called on the Tk thread for the request at the
+    head of the queue and must call ``done()`` once it has been answered;
+    the next request is shown when Tk is next idle, so no dialog ever waits
+    inside another one. Requests are keyed by (day, filename): asking again
+    for a queued screenshot keeps one request. At most ``max_size`` requests
+    are held; the oldest are dropped past that and stay pending in the store
+    for the next review. ``on_change(count, paused)`` follows the queue
+    length, for the pending badge.
+    """
+
+    def __init__(self, widget, show, max_size=200, on_change=None):
+        self.widget = widget
+        self.show = show
+        self.max_size = max_size
+        self.on_change = on_change
+        self.paused = False
+        self._queue = OrderedDict()  # (day, filename) -> Request
+        self._active = None          # key of the request being shown
+        self._job = None
+
+    def __len__(self):
+        return len(self._queue) + (self._active is not None)
+
+    def __contains__(self, key):
+        return key in self._queue or key == self._active
+
+    def put(self, request, first=False):
+        key = (request.index.day, request.entry["filename"])
+        if key == self._active:
+            return
+        while key not in self._queue and len(self._queue) >= self.max_size:
+            dropped, _ = self._queue.popitem(last=False)
+            log.warning(f"Classification queue full, leaving {dropped[1]} for later review")
+        self._queue[key] = request
+        if first:
+            self._queue.move_to_end(key, last=False)
+        self._changed()
+
+    def discard(self, day, filename):
+        if self._queue.pop((day, filename), None) is not None:
+            self._changed()
+
+    def pause(self):
+        # Stop showing requests (e.g. after a dialog was closed) until resumed
+        self.paused = True
+        self._changed()
+
+    def resume(self):
+        self.paused = False
+        self._changed()
+
+    def _changed(self):
+        QUEUE_DEPTH.set(len(self), "classification")
+        if self.on_change:
+            self.on_change(len(self), self.paused)
+        if self._active is None and self._queue and not self.paused and self._job is None:
+            self._job = self.widget.after_idle(self._show_next)
+
+    def _show_next(self):
+        self._job = None
+        if self._active is not None or not self._queue or self.paused:
+            return
+        key, request = self._queue.popitem(last=False)
+        self._active = key
+        try:
+            self.show(request, self._done)
+        except Exception as e:
+            # e.g. the image was removed; it stays pending in the store
+            log.error(f"Could not show {key[1]} for classification: {e}")
+            if self._active == key:
+                self._done()
+
+    def _done(self):
+        self._active = None
+        self._changed()
@@ -0,0 +1,48 @@
+import json
+import os
+
+
+CONFIG_FILE = os.path.expanduser("~/.config/panopticon/settings.json")
+
+DEFAULT_CONFIG = {
+    "save_dir": os.path.join(os.path.dirname(os.path.abspath(__file__)), "screenshots"),
+    "interval_min": 30,
+    "interval_max": 600,
+    "pixel_size": 7,
+    "capture_backend": "auto",
+    "image_codec": "png",
+    "dedupe_threshold": 4,  # hash bits that may differ for a capture to reuse the previous file; -1 disables
+    "dedupe_inherit_classification": True,
+    "suggestion_auto_apply": 0,  # confidence (0-1) at which a suggestion is applied without asking; 0 disables
+    "store_flush_interval": 0.5,  # seconds the store writer gathers changes before committing
+    "store_sync": "normal",  # fsync policy: off, normal (at checkpoints), full (every commit), extra
+    "pack_days": False,  # roll finished days' screenshots into one frames.pack per day
+    "log_level": "INFO",
+    "metrics_port": 0,  # serve Prometheus metrics on 127.0.0.1:<port>; 0 disables
+    "metrics_log": "",  # append a metrics snapshot to this rotating log; empty disables
+    "metrics_interval": 60,  # seconds between metrics log snapshots
+    "schedule": "uniform",  # uniform (gaps between min and max), or poisson / jittered (gaps average their midpoint)
+    "idle_after": 300,  # seconds without input before captures are suspended; 0 disables
+    "pause_when_locked": True,
+    "activity_provider": "auto",  # idle/lock detection: auto, x11 or none
+    "per_output_capture": True,  # grab each monitor separately and store one frame per monitor
+    "excluded_outputs": [],  # XRandR output names never captured, e.g. ["HDMI-1"]
+}
+
+
+def load_config(config_file=CONFIG_FILE):
+    # Shared by the GUI and the headless daemon; neither imports the other
+    try:
+        os.makedirs(os.path.dirname(config_file), exist_ok=True)
+        with open(config_file, 'r') as f:
+            # Settings added in newer versions fall back to their defaults
+            return {**DEFAULT_CONFIG, **json.load(f)}
+    except FileNotFoundError:
+        config = dict(DEFAULT_CONFIG)
+        save_config(config, config_file)
+        return config
+
+
+def save_config(config, config_file=CONFIG_FILE):
+    with open(config_file, 'w') as f:
+        json.dump(config, f)
@@ -0,0 +1,80 @@
+from collections import Counter
+
+
+def _classification(entry):
+    # Rows may come back without the column; those count as unclassified
+    return entry.get("classification", "none")
+
+
+class DayModel:
+    """One day's screenshots, indexed by filename, with running totals.
+
+    Views subscribe with ``subscribe(callback)`` and are called as
+    ``callback(event, entry)`` where event is "reset", "add", "update" or
+    "remove" (entry is None for "reset"). Lookups, classification changes and
+    totals are O(1); entries keep capture order.
+    """
+
+    def __init__(self, day=None, entries=()):
+        self.day = day
+        self._entries = {}  # filename -> entry, in capture order
+        self._counts = Counter()
+        self._observers = []
+        self.load(entries, day)
+
+    def subscribe(self, callback):
+        self._observers.append(callback)
+
+    def unsubscribe(self, callback):
+        self._observers.remove(callback)
+
+    def _notify(self, event, entry=None):
+        for callback in list(self._observers):
+            callback(event, entry)
+
+    def load(self, entries, day=None):
+        if day is not None:
+            self.day = day
+        self._entries = {}
+        self._counts = Counter()
+        for entry in entries:
+            self._entries[entry["filename"]] = entry
+            self._counts[_classification(entry)] += 1
+        self._notify("reset")
+
+    def add(self, entry):
+        old = self._entries.get(entry["filename"])
+        if old is not None:
+            self._counts[_classification(old)] -= 1
+        self._entries[entry["filename"]] = entry
+        self._counts[_classification(entry)] += 1
+        self._notify("update" if old is not None else "add", entry)
+
+    def classify(self, filename, classification):
+        entry = self._entries[filename]
+        self._counts[_classification(entry)] -= 1
+        entry["classification"] = classification
+        self._counts[classification] += 1
+        self._notify("update", entry)
+
+    def remove(self, filename):
+        entry = self._entries.pop(filename)
+        self._counts[_classification(entry)] -= 1
+        self._notify("remove", entry)
+
+    def get(self, filename):
+        return self._entries.get(filename)
+
+    def entries(self):
+        return self._entries.values()
+
+    def totals(self):
+        # (on-task, off-task, none); anything unrecognised counts as none
+        on_task, off_task = self._counts["on-task"], self._counts["off-task"]
+        return on_task, off_task, len(self._entries) - on_task - off_task
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, filename):
+        return filename in self._entries
@@ -0,0 +1,282 @@
+import datetime
+import json
+import logging
+import mmap
+import os
+import pathlib
+import re
+import struct
+import threading
+
+from ImageCodec import open_image
+from Metrics import BYTES_WRITTEN
+
+log = logging.getLogger(__name__)
+
+
+PACK_NAME = "frames.pack"
+MAGIC = b"PANPACK1"
+FOOTER = struct.Struct("<QQ8s")  # index offset, index length, magic
+FRAME_PREFIX = "screenshot_"
+
+# A capture taken per output is stored as one frame per output plus a small
+# manifest with their layout, in place of a single screenshot file:
+#   screenshot_<ts>.m0.png, screenshot_<ts>.m1.png, screenshot_<ts>.png.outputs.json
+MANIFEST_SUFFIX = ".outputs.json"
+_OUTPUT_FRAME = re.compile(r"\.m\d+(?=\.[^.]+$)")
+
+
+def output_frame_name(name, number):
+    stem, extension = name.rsplit(".", 1)
+    return f"{stem}.m{number}.{extension}"
+
+
+def manifest_name(name):
+    return name + MANIFEST_SUFFIX
+
+
+def capture_name(file_name):
+    # The screenshot name an output frame or manifest belongs to (itself otherwise)
+    if file_name.endswith(MANIFEST_SUFFIX):
+        return file_name[:-len(MANIFEST_SUFFIX)]
+    return _OUTPUT_FRAME.sub("", file_name)
+
+
+class DayPack:
+    """One day's encoded frames stored back to back in a single file.
+
+    Layout: ``MAGIC``, the frames, a JSON index of ``name -> [offset,
+    length]`` and a fixed footer pointing at the index. The file is mapped
+    read-only and ``frame(name)`` returns a memoryview slice of the mapping,
+    so reading a frame copies nothing until it is decoded. Packs are never
+    modified in place; ``write_pack`` builds a new one and renames it over
+    the old.
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._view = memoryview(self._map)
+        if len(self._view) < len(MAGIC) + FOOTER.size or self._view[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a frame pack")
+        index_offset, index_length, magic = FOOTER.unpack_from(self._view, len(self._view) - FOOTER.size)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is truncated")
+        self.index = json.loads(bytes(self._view[index_offset:index_offset + index_length]))
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def names(self):
+        return list(self.index)
+
+    def frame(self, name):
+        offset, length = self.index[name]
+        return self._view[offset:offset + length]
+
+
+def write_pack(path, frames):
+    # frames: iterable of (name, bytes-like); written to a temp file, synced
+    # and renamed, so readers see either the old pack or the complete new one
+    path = pathlib.Path(path)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    index = {}
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(MAGIC)
+            for name, data in frames:
+                index[name] = [f.tell(), len(data)]
+                f.write(data)
+            index_offset = f.tell()
+            encoded = json.dumps(index).encode()
+            f.write(encoded)
+            f.write(FOOTER.pack(index_offset, len(encoded), MAGIC))
+            f.flush()
+            os.fsync(f.fileno())
+            BYTES_WRITTEN.inc(f.tell(), "pack")
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    os.replace(temp_path, path)
+    return len(index)
+
+
+class _FrameFile:
+    # Minimal read-only file over a memoryview, enough for Image.open
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        data = self._view[self._pos:end].tobytes()
+        self._pos = end
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._pos, os.SEEK_END: len(self._view)}[whence]
+        self._pos = max(base + offset, 0)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+
+_packs = {}
+_packs_lock = threading.Lock()
+
+
+def get_pack(day_path):
+    # The day's pack, reopened when a roll-up has replaced it; None if unpacked
+    path = pathlib.Path(day_path) / PACK_NAME
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    with _packs_lock:
+        pack = _packs.get(path)
+        if pack is None or pack.identity != (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+            pack = _packs[path] = DayPack(path)
+        return pack
+
+
+def _packed_file(path):
+    # A file over the packed copy of ``path``
+    pack = get_pack(path.parent)
+    if pack is None or path.name not in pack:
+        raise FileNotFoundError(path)
+    return _FrameFile(pack.frame(path.name))
+
+
+def _decode(path):
+    try:
+        return open_image(path)
+    except FileNotFoundError:
+        return open_image(_packed_file(path))
+
+
+def read_manifest(image_path):
+    # Layout of a capture stored per output, or None for a single-file screenshot
+    image_path = pathlib.Path(image_path)
+    path = image_path.with_name(manifest_name(image_path.name))
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        try:
+            data = _packed_file(path).read()
+        except FileNotFoundError:
+            return None
+    return json.loads(data)
+
+
+def open_frame(image_path):
+    """Decode a screenshot, whether it is a loose file or inside its day's pack.
+
+    Captures stored per output are put back together as one block grid.
+    """
+    image_path = pathlib.Path(image_path)
+    try:
+        return _decode(image_path)
+    except FileNotFoundError:
+        manifest = read_manifest(image_path)
+        if manifest is None:
+            raise
+    from CaptureBackends import Output
+    from Pixelation import compose_outputs
+    frames = [(Output(o["name"], o["x"], o["y"], o["width"], o["height"]), _decode(image_path.with_name(o["frame"])))
+              for o in manifest["outputs"]]
+    return compose_outputs(frames, manifest["pixel_size"])
+
+
+def remove_frame(image_path):
+    # Loose files are deleted; a packed frame stays in the pack, unreferenced,
+    # until the next roll-up leaves it out
+    image_path = pathlib.Path(image_path)
+    manifest = read_manifest(image_path)
+    names = [o["frame"] for o in manifest["outputs"]] + [manifest_name(image_path.name)] if manifest else []
+    for name in [image_path.name] + names:
+        try:
+            os.unlink(image_path.with_name(name))
+        except FileNotFoundError:
+            pass
+
+
+class _Stopped(Exception):
+    pass
+
+
+def roll_up_day(day_path, referenced=None, stop_event=None):
+    """Move a day's loose frames into its pack.
+
+    Frames already packed are carried over, except those missing from
+    ``referenced`` (a set of screenshot names the index still uses; output
+    frames and manifests go with their screenshot), when given.
+    Loose files are always kept: one may belong to an entry not committed
+    yet. Returns the number of frames in the new pack, or None when nothing
+    changed or ``stop_event`` was set before the pack was complete.
+    """
+    day_path = pathlib.Path(day_path)
+    pack = get_pack(day_path)
+    packed = pack.names() if pack else []
+    if referenced is not None:
+        packed_kept = [name for name in packed if capture_name(name) in referenced]
+    else:
+        packed_kept = packed
+    loose = sorted(p.name for p in day_path.iterdir() if p.name.startswith(FRAME_PREFIX) and p.is_file())
+    if not loose and len(packed_kept) == len(packed):
+        return None
+    names = sorted(set(packed_kept) | set(loose))
+
+    loose_set = set(loose)
+
+    def frames():
+        for name in names:
+            if stop_event is not None and stop_event.is_set():
+                raise _Stopped()
+            if name in loose_set:
+                with open(day_path / name, "rb") as f:
+                    yield name, f.read()
+            else:
+                yield name, pack.frame(name)
+
+    try:
+        count = write_pack(day_path / PACK_NAME, frames())
+    except _Stopped:
+        return None  # the old pack and the loose files are left as they were
+    for name in loose:
+        os.unlink(day_path / name)
+    return count
+
+
+def roll_up_days(store, before=None, stop_event=None):
+    # Pack every indexed day earlier than ``before`` (default: today), giving
+    # up between frames once ``stop_event`` is set
+    from ScreenshotStore import image_name
+
+    before = before or datetime.date.today().isoformat()
+    rolled = 0
+    for day in store.days():
+        if stop_event is not None and stop_event.is_set():
+            break
+        day_path = store.save_dir / day
+        if day >= before or not day_path.is_dir():
+            continue
+        referenced = {image_name(entry) for entry in store.day_entries(day)}
+        try:
+            count = roll_up_day(day_path, referenced, stop_event)
+        except (OSError, ValueError) as e:
+            log.error(f"Could not pack {day_path}: {e}")
+            continue
+        if count is not None:
+            log.info(f"Packed {count} screenshots in {day_path / PACK_NAME}")
+            rolled += 1
+    return rolled
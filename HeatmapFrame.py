@@ -0,0 +1,204 @@
+import datetime
+import tkinter as tk
+
+import customtkinter as ctk
+
+
+ON_RGB = (0x4C, 0xAF, 0x50)
+OFF_RGB = (0xFF, 0x47, 0x47)
+NONE_RGB = (0x69, 0x69, 0x69)  # dimgray: captured but unclassified
+BG_RGB = (0x2B, 0x2B, 0x2B)
+EMPTY_COLOR = "#333333"
+
+
+def cell_color(counts, max_total):
+    # Hue from the on-task ratio, brightness from how many captures there were
+    on_task, off_task, none = counts
+    total = on_task + off_task + none
+    if total == 0:
+        return EMPTY_COLOR
+    if on_task + off_task == 0:
+        rgb = NONE_RGB
+    else:
+        ratio = on_task / (on_task + off_task)
+        rgb = tuple(off + (on - off) * ratio for on, off in zip(ON_RGB, OFF_RGB))
+    strength = 0.35 + 0.65 * min(total / max(max_total, 1), 1)
+    rgb = tuple(int(bg + (c - bg) * strength) for c, bg in zip(rgb, BG_RGB))
+    return "#%02x%02x%02x" % rgb
+
+
+def describe(label, counts):
+    on_task, off_task, none = counts
+    classified = on_task + off_task
+    ratio = f"{100 * on_task / classified:.0f}% on-task" if classified else "no classified captures"
+    return f"{label}: {on_task} on / {off_task} off / {none} none ({ratio})"
+
+
+class HeatmapFrame(ctk.CTkFrame):
+    """Week, month and year overviews drawn from the store's hourly rollups.
+
+    Week shows days × hours; month is a calendar; year is one square per day.
+    Every view is a single rollup query, so it never reads per-day data.
+    Clicking a day calls ``on_select_day("YYYY-mm-dd")``.
+    """
+
+    PERIODS = ("week", "month", "year")
+
+    def __init__(self, parent, store, on_select_day=None, period="week", font_scale=1, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.store = store
+        self.on_select_day = on_select_day
+        self.period = period
+        self.anchor = datetime.date.today()
+        self.font_scale = font_scale
+        self._cells = {}  # canvas item -> (label, day, counts)
+        self._redraw_job = None
+
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.pack(fill="x", padx=12, pady=(12, 0))
+        font = ("", int(14 * font_scale))
+        ctk.CTkButton(header, text="<", width=40, font=font, command=lambda: self.shift(-1)).pack(side="left")
+        ctk.CTkButton(header, text=">", width=40, font=font, command=lambda: self.shift(1)).pack(side="right")
+        self._title = ctk.CTkLabel(header, text="", font=("", int(16 * font_scale), "bold"))
+        self._title.pack(side="left", expand=True)
+
+        self._canvas = tk.Canvas(self, bg="#2B2B2B", highlightthickness=0, borderwidth=0)
+        self._canvas.pack(fill="both", expand=True, padx=12, pady=12)
+        self._status = ctk.CTkLabel(self, text="", font=font)
+        self._status.pack(fill="x", padx=12, pady=(0, 12))
+
+        self._canvas.bind("<Configure>", self._on_configure)
+        self._canvas.bind("<Motion>", self._on_motion)
+        self._canvas.bind("<Button-1>", self._on_click)
+
+    # --- navigation ------------------------------------------------------
+
+    def set_period(self, period):
+        self.period = period
+        self.refresh()
+
+    def set_store(self, store):
+        self.store = store
+        self.refresh()
+
+    def shift(self, steps):
+        if self.period == "week":
+            self.anchor += datetime.timedelta(weeks=steps)
+        elif self.period == "month":
+            month = self.anchor.month - 1 + steps
+            self.anchor = datetime.date(self.anchor.year + month // 12, month % 12 + 1, 1)
+        else:
+            self.anchor = datetime.date(self.anchor.year + steps, 1, 1)
+        self.refresh()
+
+    def _on_configure(self, event):
+        if self._redraw_job is not None:
+            self.after_cancel(self._redraw_job)
+        self._redraw_job = self.after(80, self.refresh)
+
+    # --- drawing ---------------------------------------------------------
+
+    def refresh(self):
+        self._redraw_job = None
+        self._canvas.delete("all")
+        self._cells = {}
+        width, height = self._canvas.winfo_width(), self._canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return
+        getattr(self, f"_draw_{self.period}")(width, height)
+
+    def _draw_week(self, width, height):
+        start = self.anchor - datetime.timedelta(days=self.anchor.weekday())
+        days = [start + datetime.timedelta(days=i) for i in range(7)]
+        self._title.configure(text=f"Week of {start:%b %-d, %Y}")
+        rollups = self.store.hourly_rollups(days[0], days[-1])
+        max_total = max((sum(c) for c in rollups.values()), default=0)
+
+        label_w, label_h = 48, 20
+        cell = max(min((width - label_w) // 24, (height - label_h) // 7), 4)
+        font = ("", int(9 * self.font_scale))
+        for hour in range(0, 24, 3):
+            self._canvas.create_text(label_w + hour * cell, label_h // 2, text=f"{hour:02d}",
+                                     anchor="w", fill="gray", font=font)
+        for row, day in enumerate(days):
+            y = label_h + row * cell
+            self._canvas.create_text(label_w - 6, y + cell // 2, text=f"{day:%a}", anchor="e", fill="gray", font=font)
+            for hour in range(24):
+                counts = rollups.get((day.isoformat(), hour), (0, 0, 0))
+                x = label_w + hour * cell
+                self._add_cell(x, y, cell, counts, max_total, f"{day:%a %Y-%m-%d} {hour:02d}:00", day)
+
+    def _draw_month(self, width, height):
+        first = self.anchor.replace(day=1)
+        next_month = (first + datetime.timedelta(days=32)).replace(day=1)
+        self._title.configure(text=f"{first:%B %Y}")
+        rollups = self.store.daily_rollups(first, next_month - datetime.timedelta(days=1))
+        max_total = max((sum(c) for c in rollups.values()), default=0)
+
+        label_h = 20
+        weeks = (first.weekday() + (next_month - first).days + 6) // 7
+        cell = max(min(width // 7, (height - label_h) // weeks), 8)
+        font = ("", int(9 * self.font_scale))
+        for col, name in enumerate(("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")):
+            self._canvas.create_text(col * cell + cell // 2, label_h // 2, text=name, fill="gray", font=font)
+        day = first
+        while day < next_month:
+            pos = first.weekday() + (day - first).days
+            row, col = divmod(pos, 7)
+            x, y = col * cell, label_h + row * cell
+            counts = rollups.get(day.isoformat(), (0, 0, 0))
+            self._add_cell(x, y, cell, counts, max_total, f"{day:%a %Y-%m-%d}", day)
+            total = sum(counts)
+            self._canvas.create_text(x + 6, y + 4, text=str(day.day), anchor="nw", fill="white",
+                                     font=font, state="disabled")
+            if total:
+                self._canvas.create_text(x + cell // 2, y + cell // 2, text=str(total), fill="white",
+                                         font=("", int(11 * self.font_scale), "bold"), state="disabled")
+            day += datetime.timedelta(days=1)
+
+    def _draw_year(self, width, height):
+        first = datetime.date(self.anchor.year, 1, 1)
+        last = datetime.date(self.anchor.year, 12, 31)
+        self._title.configure(text=str(self.anchor.year))
+        rollups = self.store.daily_rollups(first, last)
+        max_total = max((sum(c) for c in rollups.values()), default=0)
+
+        label_w, label_h = 36, 20
+        cols = (first.weekday() + (last - first).days) // 7 + 1
+        cell = max(min((width - label_w) // cols, (height - label_h) // 7), 4)
+        font = ("", int(9 * self.font_scale))
+        for row, name in ((0, "Mon"), (2, "Wed"), (4, "Fri")):
+            self._canvas.create_text(label_w - 6, label_h + row * cell + cell // 2, text=name,
+                                     anchor="e", fill="gray", font=font)
+        day = first
+        while day <= last:
+            col, row = divmod(first.weekday() + (day - first).days, 7)
+            x, y = label_w + col * cell, label_h + row * cell
+            if day.day == 1:
+                self._canvas.create_text(x, label_h // 2, text=f"{day:%b}", anchor="w", fill="gray", font=font)
+            counts = rollups.get(day.isoformat(), (0, 0, 0))
+            self._add_cell(x, y, cell, counts, max_total, f"{day:%a %Y-%m-%d}", day)
+            day += datetime.timedelta(days=1)
+
+    def _add_cell(self, x, y, size, counts, max_total, label, day):
+        gap = 1 if size < 12 else 2
+        item = self._canvas.create_rectangle(x + gap, y + gap, x + size - gap, y + size - gap,
+                                             fill=cell_color(counts, max_total), outline="")
+        self._cells[item] = (label, day, counts)
+
+    # --- pointer ---------------------------------------------------------
+
+    def _cell_under_pointer(self):
+        for item in self._canvas.find_withtag("current"):
+            if item in self._cells:
+                return self._cells[item]
+        return None
+
+    def _on_motion(self, event):
+        cell = self._cell_under_pointer()
+        self._status.configure(text=describe(cell[0], cell[2]) if cell else "")
+
+    def _on_click(self, event):
+        cell = self._cell_under_pointer()
+        if cell and self.on_select_day:
+            self.on_select_day(cell[1].isoformat())
@@ -0,0 +1,110 @@
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class Codec:
+    """How a pixelated screenshot is written to disk.
+
+    Every format here is sniffed by Image.open, so readers never need to know
+    which codec wrote a file; the extension is only a hint for humans.
+    """
+
+    name = None
+    extension = None
+    pil_format = None
+
+    def is_available(self) -> bool:
+        from PIL import Image
+        Image.init()
+        return self.pil_format in Image.SAVE
+
+    def save(self, image, fp):
+        image.save(fp, format=self.pil_format, **self.save_options())
+
+    def save_options(self) -> dict:
+        return {}
+
+
+class PngCodec(Codec):
+    """PNG with an explicit zlib level. Block grids compress well even at low levels."""
+
+    name = "png"
+    extension = "png"
+    pil_format = "PNG"
+
+    def __init__(self, compress_level=6):
+        self.compress_level = compress_level
+
+    def save_options(self):
+        return {"compress_level": self.compress_level}
+
+
+class PalettePngCodec(PngCodec):
+    """PNG after quantizing to an adaptive palette; lossy but a fraction of the size."""
+
+    name = "png-palette"
+
+    def __init__(self, compress_level=6, colors=256):
+        super().__init__(compress_level)
+        self.colors = colors
+
+    def save(self, image, fp):
+        from PIL import Image
+        quantized = image.quantize(colors=self.colors, method=Image.Quantize.FASTOCTREE)
+        quantized.save(fp, format=self.pil_format, **self.save_options())
+
+
+class WebpCodec(Codec):
+    """Lossless WebP; method trades encode time (0) for size (6)."""
+
+    name = "webp"
+    extension = "webp"
+    pil_format = "WEBP"
+
+    def __init__(self, method=4):
+        self.method = method
+
+    def save_options(self):
+        return {"lossless": True, "method": self.method}
+
+
+class QoiCodec(Codec):
+    """QOI: lossless with no entropy coding. Pillow's QOI encoder is pure Python,
+    so on this path it is slower than PNG; run benchmarks/bench_codec.py first."""
+
+    name = "qoi"
+    extension = "qoi"
+    pil_format = "QOI"
+
+
+CODECS = {
+    PngCodec.name: PngCodec,
+    PalettePngCodec.name: PalettePngCodec,
+    WebpCodec.name: WebpCodec,
+    QoiCodec.name: QoiCodec,
+}
+
+
+def create_codec(name="png", **options) -> Codec:
+    # Unknown or unsupported codecs fall back to PNG so captures are never lost
+    codec_cls = CODECS.get(name)
+    if codec_cls is None:
+        log.warning(f"Unknown image codec {name}, using png")
+        codec_cls = PngCodec
+    codec = codec_cls(**options)
+    if not codec.is_available():
+        log.warning(f"Image codec {name} is not supported by this Pillow build, using png")
+        codec = PngCodec()
+    return codec
+
+
+def open_image(path) -> "Image.Image":
+    # Decode eagerly so the file handle is released, and hand back RGB so
+    # palette files render like the others
+    from PIL import Image
+    with Image.open(path) as image:
+        if image.mode != "RGB":
+            return image.convert("RGB")
+        image.load()
+        return image
@@ -1,12 +1,13 @@
-import math
+import logging
 import customtkinter as ctk
-import json
-from datetime import datetime
-from functools import partial
-import time
+from SquaresGrid import SquaresGrid
+from DayModel import DayModel
+from ScreenshotStore import image_name, time_label_from_filename
+
+log = logging.getLogger(__name__)
 
 class JsonVisualizerFrame(ctk.CTkFrame):
-    def __init__(self, parent, classify_screenshot, json_path, save_path, margin=10, font_scale=1, *args, **kwargs):
+    def __init__(self, parent, classify_screenshot, index, save_path, entries=None, margin=10, font_scale=1, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
         self._parent_size = (parent.winfo_width(), parent.winfo_height())
 
@@ -18,42 +19,52 @@ class JsonVisualizerFrame(ctk.CTkFrame):
         self._marg = margin
 
         self.classify_screenshot = classify_screenshot
-        self.json_path = json_path
+        self.index = index
         self.save_path = save_path
         self.font_scale = font_scale
         self.color_map = {"on-task":  ("#4CAF50", "#66BB6A"),
                           "off-task": ("#FF4747", "#FF6B6B"),
                           "none":     ("dimgray", "gray")}
-        self.rev_color_map = {"#4CAF50":"on-task", "#FF4747":"off-task", "dimgray":"none"}
 
-        self.data = self.load_json()
+        if entries is None:  # not preloaded by the caller
+            entries = self.load_json().get("screenshots", [])
+        self.model = DayModel(index.day, entries)
         self.create_widgets()
+        self.model.subscribe(self._on_model_change)
 
     def load_json(self):
         try:
-            with open(self.json_path, 'r') as file:
-                return json.load(file)
+            return self.index.snapshot()
         except Exception as e:
-            print(f"Error loading JSON file: {e}")
+            log.error(f"Error loading screenshot index: {e}")
             return {}
 
     def get_totals(self):
-        screenshots = self.data.get("screenshots", [])
-        on_task = sum(1 for s in screenshots if s["classification"] == "on-task")
-        off_task = sum(1 for s in screenshots if s["classification"] == "off-task")
-        none = len(screenshots) - on_task - off_task
-
-        return on_task, off_task, none
+        return self.model.totals()
+
+    def _on_model_change(self, event, entry):
+        # Only touch the square and labels the change affects
+        if event == "reset":
+            self.create_squares_grid()
+        elif event == "add":
+            fg, hover = self.color_map.get(entry["classification"], ("dimgray", "gray"))
+            self._grid.add_cell(entry["filename"], fg, hover)
+        elif event == "update":
+            fg, hover = self.color_map.get(entry["classification"], ("dimgray", "gray"))
+            self._grid.update_cell(entry["filename"], fg, hover)
+        elif event == "remove":
+            self._grid.remove_cell(entry["filename"])
+        self.update_totals_display(*self.model.totals())
 
     def create_widgets(self):
-        print("\nCreating widgets...")
+        log.debug("Creating widgets...")
         self.create_summary_bar()
         self.update_idletasks() # Update summary bar
         self.create_squares_grid()
 
     def create_summary_bar(self):
       # Prepare container
-      print("Creating summary bar...")
+      log.debug("Creating summary bar...")
       if hasattr(self, "_summary_frame") and self._summary_frame.winfo_exists():
           self._summary_frame.destroy()
 
@@ -81,232 +92,64 @@ class JsonVisualizerFrame(ctk.CTkFrame):
       self._off_lbl.configure(text=f"Off-task: {off_task}")
       self._none_lbl.configure(text=f"None: {none}")
 
-    def configure_grid_dim(self, total=None):
-        # Decide grid dimensions (rows × cols)
-        if total is None:
-            total = len(self._buttons) 
-        mod_total = max(16, total)
-        cols = math.ceil(math.sqrt(mod_total))
-        rows = math.ceil(mod_total / cols)
-        print(f"{total} screenshots found while configuring grid, updated to {mod_total}, creating {rows} rows by {cols} cols")
-
-        return cols, rows
-
     def create_squares_grid(self) -> None:
-        """Lay out screenshot buttons in a responsive square grid."""
-        print("Creating square grid...")
-        screenshots = self.data.get("screenshots", [])
-        if not screenshots:
-            return
+        """Draw one square per screenshot on a single canvas."""
+        log.debug("Creating square grid...")
 
         # Prepare container
-        if hasattr(self, "_grid_frame") and self._grid_frame.winfo_exists():
-            self._grid_frame.destroy()
-        self._grid_frame = ctk.CTkFrame(self)
-        self._grid_frame.pack(fill="both", expand=True, padx=self._pad, pady=self._pad)
-        self._grid_frame.pack_propagate(False)
-
-        # Set up grid
-        self._grid_dim = self.configure_grid_dim(total=len(screenshots))
-        cols, rows = self._grid_dim
-
-        for r in range(rows):
-            self._grid_frame.rowconfigure(r, weight=1, uniform="rows")
-        for c in range(cols):
-            self._grid_frame.columnconfigure(c, weight=1, uniform="cols")
-
-        # Create buttons
-        self._buttons = []
-        for idx, shot in enumerate(screenshots):
-            r, c = divmod(idx, cols)
+        if not hasattr(self, "_grid") or not self._grid.winfo_exists():
+            self._grid = SquaresGrid(self, on_click=self.update_screenshot, bg=self._fg_color)
+            self._grid.pack(fill="both", expand=True, padx=self._pad, pady=self._pad)
 
+        cells = []
+        for shot in self.model.entries():
             # pick colours based on classification
-            cls = shot["classification"]
-            color, hover = self.color_map.get(cls, ("dimgray", "gray"))
-
-            # Get filename and time label
-            fname = shot["filename"]
-            img_path = self.save_path / fname
-
-            btn = ctk.CTkButton(
-                self._grid_frame,
-                text="",
-                fg_color=color,
-                hover_color=hover,
-            )
+            color, hover = self.color_map.get(shot["classification"], ("dimgray", "gray"))
+            cells.append((shot["filename"], color, hover))
+        self._grid.set_cells(cells)
 
-            # give the callback a handle on the button itself
-            btn.configure(
-                command=partial(
-                    self.update_screenshot,
-                    btn,
-                    img_path,      
-                    shot,
-                    fname
-                )
-            )
-            btn.grid(row=r, column=c, sticky="nsew", padx=3, pady=3)
-            self._buttons.append(btn)
-        
-        self._on_frame_resize()  
-
-        print(len(self._buttons))
-        print("Finishing square grid...")
-
-
-    def _on_frame_resize(self):
-        # the largest square that fits in every cell
-        print("Resizing...")
-        old_cols, old_rows = self._grid_frame.grid_size()
-        cols, rows = self._grid_dim
-
-        for c in range(cols, old_cols):
-            self._grid_frame.columnconfigure(c, weight=0, uniform="", minsize=0)
-        for r in range(rows, old_rows):
-            self._grid_frame.rowconfigure(r, weight=0, uniform="", minsize=0)
-
-        width = self._grid_frame.winfo_width()
-        height = self._grid_frame.winfo_height()
-
-        summary_height = self._summary_frame.winfo_reqheight()
-        if width <= 1:
-            print("Defaulting via parent size")
-            parent_w, parent_h = self._parent_size
-            print(f"Parent size is {parent_w} by {parent_h}")
-            width = parent_w - (2 * self._pad + 2 * self._marg)
-            height = parent_h- (4 * self._pad + + 2 * self._marg + summary_height)
-        print(f"Summary height is {summary_height}")
-
-        print(f"Max size is {width} by {height}")
-        cell = min(width // cols, height // rows)
-        # subtract 6 for 3 x 3 padding size
-        size = max(cell - 6, 8)
-
-        print(f"Creating cells of size {size}")
-        for r in range(rows):
-            self._grid_frame.rowconfigure(r, weight=1, uniform="rows", minsize=size)
-        for c in range(cols):
-            self._grid_frame.columnconfigure(c, weight=1, uniform="cols", minsize=size)
-        radius = int(size * 0.25)
-        for idx, btn in enumerate(self._buttons):
-            r, c = divmod(idx, cols)
-            btn.configure(width=size, height=size, corner_radius=radius)
-            btn.grid_configure(row=r, column=c)
+        log.debug(f"{len(cells)} squares drawn")
 
     def add_screenshot_button(
         self,
         img_path,                
         screenshot_entry: dict 
     ):
-        new_cls     = screenshot_entry["classification"]
-        fg, hover   = self.color_map.get(new_cls, ("dimgray", "gray"))
-        fname = screenshot_entry["filename"]
-        print(f"Adding new {new_cls} screenshot")
-
-        on_task, off_task, none = self.get_totals()
+        log.debug(f"Adding new {screenshot_entry['classification']} screenshot")
+        self.model.add(screenshot_entry)
 
-        if (on_task + off_task + none) < 1:
-            self.refresh() # Reinitialize
-        else:
-            self.data["screenshots"].append(screenshot_entry)
-
-            if new_cls == "on-task":
-                on_task += 1
-            elif new_cls == "off-task":
-                off_task += 1
-            elif new_cls == "none":
-                none += 1
-
-            self.update_totals_display(on_task, off_task, none)
-
-            btn = ctk.CTkButton(
-                self._grid_frame,
-                text="",
-                fg_color=fg,
-                hover_color=hover,
-            )
-
-            btn.configure(
-                command=partial(
-                    self.update_screenshot, 
-                    btn, 
-                    img_path,
-                    screenshot_entry,
-                    fname
-                )
-            )
-
-            self._buttons.append(btn)
-            btn.grid(padx=3, pady=3, sticky="nsew")
-            
-            # Call resize to configure grid
-            self._on_frame_resize()
-
-    def update_screenshot(self, button, image_path, screenshot_entry, fname):
-        on_task, off_task, none = self.get_totals()
-        cls = self.rev_color_map.get(button.cget("fg_color"))
-
-        ts = datetime.strptime(fname.replace("screenshot_", "").replace(".png", ""),
-                              "%Y%m%d_%H%M%S")
-        time_label = ts.strftime("%-I:%M %p (%Y/%m/%d)")
-
-        if cls == "on-task":
-            on_task -= 1
-        elif cls == "off-task":
-            off_task -= 1
-        elif cls == "none":
-            none -= 1
-
-        new_cls = self.classify_screenshot(image_path, self.json_path, screenshot_entry, time_label, False)
-
-        if new_cls is not None: # No action taken
-          new_cls = new_cls.lower()
-
-          if new_cls == "on-task":
-              on_task += 1
-          elif new_cls == "off-task":
-              off_task += 1
-          elif new_cls == "none":
-              none += 1
-          
-          print(f"Changed classification from {cls} to {new_cls}")
-
-          if new_cls != "x": # Reclassify
-            fg, hover = self.color_map.get(new_cls, ("dimgray", "gray"))
-            button.configure(fg_color=fg, hover_color=hover)
-            screenshot_entry["classification"] = new_cls
+    def update_screenshot(self, fname):
+        screenshot_entry = self.model.get(fname)
+        if screenshot_entry is None:
+            return
+        image_path = self.save_path / image_name(screenshot_entry)
 
-            for entry in self.data.get("screenshots", []):
-                if entry["filename"] == screenshot_entry["filename"]:
-                    entry["classification"] = new_cls
+        time_label = time_label_from_filename(fname)
 
-          else: # Remove
-              button.destroy()
-              self._buttons.remove(button)
-              self._on_frame_resize()
+        # Asked ahead of any queued captures; the answer comes back through set_classification
+        self.classify_screenshot(image_path, self.index, dict(screenshot_entry), time_label, False, first=True)
 
-              self.data["screenshots"] = [
-                        entry for entry in self.data["screenshots"]
-                        if entry["filename"] != screenshot_entry["filename"]
-                    ]
-            
-          self.update_totals_display(on_task, off_task, none)
+    def set_classification(self, screenshot_entry, new_cls):
+        fname = screenshot_entry["filename"]
+        old = self.model.get(fname)
+        if old is not None:
+            log.debug(f"Changed classification from {old['classification']} to {new_cls}")
+
+        if new_cls == "x": # Remove
+            if old is not None:
+                self.model.remove(fname)
+        elif old is not None: # Reclassify
+            self.model.classify(fname, new_cls)
+        else:
+            self.model.add(dict(screenshot_entry, classification=new_cls))
 
-    def update_json_path(self, json_path, save_path):
+    def update_index(self, index, save_path):
         # Refresh the grid when switching days.
-        self.json_path = json_path
+        self.index = index
         self.save_path = save_path
 
         self.refresh()
 
     def refresh(self):
-        self.data = self.load_json()
-
-        for child in self._grid_frame.grid_slaves():
-            child.destroy()
-        self.update_idletasks()
-        print("About to create grid")
-        self.create_squares_grid()
-
-        on_task, off_task, none = self.get_totals()
-        self.update_totals_display(on_task, off_task, none)
\ No newline at end of file
+        # Reloading resets the model, which redraws the grid and totals
+        self.model.load(self.load_json().get("screenshots", []), self.index.day)
\ No newline at end of file
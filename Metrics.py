@@ -0,0 +1,222 @@
+"""In-process metrics: latency histograms, counters and gauges.
+
+Hot paths record into module-level metrics (``STAGE_SECONDS.time("encode")``,
+``BYTES_WRITTEN.inc(n)``); recording is a lock and a few additions, so it is
+always on. ``start_exporters`` optionally serves them in the Prometheus text
+format on a localhost port and appends a snapshot to a rotating log.
+"""
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+log = logging.getLogger(__name__)
+
+# Seconds; covers a cheap index update through a slow full-screen grab
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _labels(label, value):
+    return f'{{{label}="{value}"}}' if label else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, label=None):
+        self.name, self.help, self.label = name, help, label
+        self._lock = threading.Lock()
+        self._values = {}  # label value (or None) -> total
+
+    def inc(self, amount=1, label_value=None):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        return [f"{self.name}{_labels(self.label, key)} {value}" for key, value in self.snapshot().items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, label_value=None):
+        with self._lock:
+            self._values[label_value] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, label=None, buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.label = name, help, label
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._values = {}  # label value -> [bucket counts..., sum, count]
+
+    def observe(self, value, label_value=None):
+        with self._lock:
+            data = self._values.get(label_value)
+            if data is None:
+                data = self._values[label_value] = [0] * (len(self.buckets) + 2)
+            bucket = bisect.bisect_left(self.buckets, value)
+            if bucket < len(self.buckets):
+                data[bucket] += 1  # larger values only show up in +Inf
+            data[-2] += value
+            data[-1] += 1
+
+    @contextmanager
+    def time(self, label_value=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, label_value)
+
+    def snapshot(self):
+        # label value -> {"count", "sum", "p50", "p95"}; percentiles are bucket upper bounds
+        with self._lock:
+            values = {key: list(data) for key, data in self._values.items()}
+        summary = {}
+        for key, data in values.items():
+            count = data[-1]
+            summary[key] = {"count": count, "sum": round(data[-2], 6),
+                            "p50": self._quantile(data, count, 0.5), "p95": self._quantile(data, count, 0.95)}
+        return summary
+
+    def _quantile(self, data, count, q):
+        seen = 0
+        for bound, n in zip(self.buckets, data):
+            seen += n
+            if seen >= q * count:
+                return bound
+        return float("inf")
+
+    def render(self):
+        with self._lock:
+            values = {key: list(data) for key, data in self._values.items()}
+        lines = []
+        for key, data in values.items():
+            prefix = f'{self.label}="{key}",' if self.label else ""
+            cumulative = 0
+            for bound, n in zip(self.buckets, data):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {data[-1]}')
+            lines.append(f"{self.name}_sum{_labels(self.label, key)} {data[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.label, key)} {data[-1]}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "panopticon_stage_seconds",
+    "Time spent per stage: capture, pixelate, encode, write, index_commit, dialog_open, grid_render",
+    label="stage",
+)
+BYTES_WRITTEN = Counter("panopticon_bytes_written_total", "Bytes of screenshots and packs written", label="kind")
+CAPTURES = Counter("panopticon_captures_total", "Captures by outcome", label="outcome")
+QUEUE_DEPTH = Gauge("panopticon_queue_depth", "Items waiting in each queue", label="queue")
+DEADLINES = Counter("panopticon_schedule_deadlines_total", "Capture deadlines: taken, missed, suspended", label="outcome")
+SCHEDULE_LAG = Histogram("panopticon_schedule_lag_seconds", "How late captures start after their deadline")
+
+METRICS = [STAGE_SECONDS, BYTES_WRITTEN, CAPTURES, QUEUE_DEPTH, DEADLINES, SCHEDULE_LAG]
+
+
+def render():
+    # Prometheus text exposition format, version 0.0.4
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    return {metric.name: {str(key): value for key, value in metric.snapshot().items()} for metric in METRICS}
+
+
+def _handler_class():
+    # http.server is only imported when the endpoint is enabled
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            log.debug(f"metrics request: {format % args}")
+
+    return MetricsHandler
+
+
+class Exporters:
+    """The metrics endpoint and periodic metrics log started by ``start_exporters``."""
+
+    def __init__(self, port=0, log_path=None, interval=60, host="127.0.0.1"):
+        self.server = None
+        self.handler = None
+        self.interval = interval
+        self._stop = threading.Event()
+        self._threads = []
+        if port:
+            from http.server import ThreadingHTTPServer
+            self.server = ThreadingHTTPServer((host, port), _handler_class())
+            self._threads.append(threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True))
+            log.info(f"Serving metrics on http://{host}:{self.server.server_address[1]}/metrics")
+        if log_path:
+            import logging.handlers
+            self.logger = logging.getLogger("panopticon.metrics")
+            self.logger.propagate = False
+            self.logger.setLevel(logging.INFO)
+            self.handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=5 * 1024 * 1024, backupCount=3)
+            self.handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.logger.addHandler(self.handler)
+            self._threads.append(threading.Thread(target=self._log_loop, name="metrics-log", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _log_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        self.logger.info(json.dumps(snapshot()))
+
+    def stop(self):
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.handler is not None:
+            self.write_snapshot()  # the final state, so short runs are logged too
+            self.logger.removeHandler(self.handler)
+            self.handler.close()
+
+
+def start_exporters(port=0, log_path=None, interval=60):
+    try:
+        return Exporters(port, log_path, interval)
+    except OSError as e:
+        log.error(f"Could not start metrics exporters: {e}")
+        return None
+
+
+def configure_logging(level="INFO"):
+    # Leveled console logging for the GUI and the daemon
+    logging.basicConfig(level=getattr(logging, str(level).upper(), logging.INFO),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
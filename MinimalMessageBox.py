@@ -1,6 +1,9 @@
-from PIL import Image
-from typing import List, Optional, Dict
+import logging
+from typing import Callable, List, Optional, Dict
 import customtkinter as ctk
+from ThumbnailCache import get_thumbnail_cache
+
+log = logging.getLogger(__name__)
 
 
 class MinimalMessageBox(ctk.CTkToplevel):
@@ -11,9 +14,13 @@ class MinimalMessageBox(ctk.CTkToplevel):
         message:    str | None     = None,
         img_path:   str | None     = None,
         options:    List[Dict]     = None,
-        font_scale: float          = 1.0
+        font_scale: float          = 1.0,
+        suggested:  str | None     = None,
+        on_response: Callable[[Optional[str]], None] | None = None
     ):
         super().__init__(master)
+        # The box is non-modal: its answer (None when closed) goes to on_response
+        self.on_response = on_response
 
         if options is None:
             options = [{"label": "OK"}]
@@ -40,16 +47,13 @@ class MinimalMessageBox(ctk.CTkToplevel):
 
         if img_path:
             try:
-                pil = Image.open(img_path)
-                w, h = pil.size
-                max_w, max_h = 450, 300
-                scale = min(max_w / w, max_h / h, 1)
-                ctk_img = ctk.CTkImage(pil, size=(int(w * scale), int(h * scale)))
+                pil = get_thumbnail_cache().get(img_path)
+                ctk_img = ctk.CTkImage(pil, size=pil.size)
                 img_lbl = ctk.CTkLabel(frame, image=ctk_img, text="")
                 img_lbl.grid(row=row, column=0, pady=(8, 12), sticky="n")
                 row += 1
             except Exception as e:
-                print(f"[MinimalMessageBox] Could not load icon: {e}")
+                log.warning(f"Could not load icon: {e}")
 
         btn_frame = ctk.CTkFrame(frame, fg_color="transparent")
         btn_frame.grid(row=row, column=0, pady=(6, 10))
@@ -68,6 +72,10 @@ class MinimalMessageBox(ctk.CTkToplevel):
                 command=lambda v=opt["label"]: self._on_select(v)
             )
             b.grid(row=0, column=idx, padx=6, ipadx=8)
+            if opt["label"] == suggested:
+                # Pre-selected: outlined, and Return accepts it
+                b.configure(border_width=2, border_color="white")
+                self.bind("<Return>", lambda e, v=opt["label"]: self._on_select(v))
 
         self.update_idletasks()
         w, h = max(self.winfo_width(), 250), max(self.winfo_height(), 150)
@@ -81,17 +89,19 @@ class MinimalMessageBox(ctk.CTkToplevel):
         self.geometry(f"{w}x{h}+{x}+{y}")
 
         self.deiconify()
-        self.wait_visibility()
-        self.grab_set()
-
-    def get(self) -> Optional[str]:
-        self.wait_window(self)
-        return self._response
+        self.lift()
+        if suggested:
+            self.focus_force()
 
     def _on_select(self, value: str):
         self._response = value
-        self.destroy()
+        self._finish()
 
     def _on_close(self):
         self._response = None
-        self.destroy()
\ No newline at end of file
+        self._finish()
+
+    def _finish(self):
+        self.destroy()
+        if self.on_response:
+            self.on_response(self._response)
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""Control the running Panopticon (GUI or daemon) over its control socket.
+
+    python PanopticonCtl.py start|stop|status [--json]|set-day DAY|stats [DAY] [--json]
+
+Imports nothing beyond the standard library and SingleInstance, so it answers
+in milliseconds and suits login scripts and status bars. Exits 3 when no
+instance is running and 1 when the command fails. With both running, the
+daemon is asked unless --instance gui is given.
+"""
+import argparse
+import json
+import sys
+
+from SingleInstance import NotRunning, send_command
+
+# Socket names, tried in this order for --instance auto
+INSTANCES = {"daemon": "panopticon-daemon", "gui": "panopticon"}
+
+
+def format_status(status):
+    captures = ", ".join(f"{count} {outcome}" for outcome, count in sorted(status["captures"].items()))
+    state = "running" if status["running"] else "stopping" if status.get("stopping") else "stopped"
+    lines = [
+        f"Monitoring: {state}",
+        f"Day: {status['day']}",
+        f"Saving to: {status['save_dir']}",
+        f"Schedule: {status['schedule']}, {status['interval'][0]}-{status['interval'][1]}s",
+        f"Captures: {captures or 'none yet'}",
+        f"Missed deadlines: {status['missed_deadlines']}, idle suspensions: {status['suspended']}",
+        f"Pipeline depth: {status['pipeline_depth']}",
+    ]
+    if "pending" in status:
+        lines.append(f"Awaiting classification: {status['pending']}")
+    return "\n".join(lines)
+
+
+def format_stats(stats):
+    ratio = stats["on_task_ratio"]
+    return "\n".join([
+        f"Day: {stats['day']}",
+        f"On task: {stats['on-task']}",
+        f"Off task: {stats['off-task']}",
+        f"Unclassified: {stats['none']}",
+        f"On-task ratio: {ratio:.0%}" if ratio is not None else "On-task ratio: -",
+    ])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Control the running Panopticon")
+    parser.add_argument("--instance", choices=["auto"] + list(INSTANCES), default="auto",
+                        help="which instance to talk to; auto prefers the daemon")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("start", help="start capturing")
+    commands.add_parser("stop", help="stop capturing")
+    status = commands.add_parser("status", help="show what the instance is doing")
+    status.add_argument("--json", action="store_true")
+    set_day = commands.add_parser("set-day", help="record into another day")
+    set_day.add_argument("day", metavar="YYYY-MM-DD")
+    stats = commands.add_parser("stats", help="classification counts for a day")
+    stats.add_argument("day", nargs="?", metavar="YYYY-MM-DD", help="defaults to the recording day")
+    stats.add_argument("--json", action="store_true")
+    return parser.parse_args(argv)
+
+
+def send(command, command_args, names):
+    for name in names:
+        try:
+            return send_command(command, command_args, name=name)
+        except NotRunning:
+            continue
+    raise NotRunning()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    command_args = [args.day] if getattr(args, "day", None) else []
+    names = list(INSTANCES.values()) if args.instance == "auto" else [INSTANCES[args.instance]]
+    try:
+        result = send(args.command, command_args, names)
+    except NotRunning:
+        print("Panopticon is not running", file=sys.stderr)
+        return 3
+    except (OSError, RuntimeError) as e:
+        print(f"{args.command} failed: {e}", file=sys.stderr)
+        return 1
+
+    if getattr(args, "json", False):
+        print(json.dumps(result, indent=2))
+    elif args.command == "stats":
+        print(format_stats(result))
+    elif args.command == "set-day":
+        print(f"Recording into {result}")
+    else:
+        print(format_status(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
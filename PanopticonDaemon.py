@@ -0,0 +1,143 @@
+"""Headless capture: runs the capture pipeline only and leaves every new
+screenshot pending until the GUI is next opened.
+
+Nothing here imports customtkinter, Tk or pandas, so it can run on machines
+without a desktop session for the GUI and stays small while idle.
+
+    python PanopticonDaemon.py [--save-dir DIR] [--interval-min S] [--interval-max S]
+
+While it runs, PanopticonCtl.py controls it through the control socket. The
+GUI can be opened alongside it: it sees the daemon holding the capture lock
+and only offers the daemon's captures for review.
+"""
+import argparse
+import datetime
+import logging
+import signal
+import threading
+
+from Config import load_config
+from Metrics import configure_logging, start_exporters
+from ProductivityMonitor import ProductivityMonitor
+from Scheduler import PROVIDERS, SCHEDULES
+from ScreenshotStore import SYNC_MODES, close_stores
+from SingleInstance import SingleInstance, SingleInstanceException
+
+log = logging.getLogger(__name__)
+
+
+def positive_int(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive number of seconds, not {value}")
+    return value
+
+
+def parse_args(config):
+    parser = argparse.ArgumentParser(description="Panopticon headless capture daemon")
+    parser.add_argument("--save-dir", default=config["save_dir"])
+    parser.add_argument("--interval-min", type=positive_int, default=config["interval_min"])
+    parser.add_argument("--interval-max", type=positive_int, default=config["interval_max"])
+    parser.add_argument("--schedule", choices=list(SCHEDULES), default=config["schedule"])
+    parser.add_argument("--idle-after", type=int, default=config["idle_after"],
+                        help="seconds without input before captures are suspended; 0 disables")
+    parser.add_argument("--pause-when-locked", action=argparse.BooleanOptionalAction, default=config["pause_when_locked"])
+    parser.add_argument("--activity-provider", choices=["auto"] + list(PROVIDERS), default=config["activity_provider"])
+    parser.add_argument("--per-output-capture", action=argparse.BooleanOptionalAction, default=config["per_output_capture"])
+    parser.add_argument("--exclude-output", dest="excluded_outputs", action="append", default=list(config["excluded_outputs"]),
+                        metavar="NAME", help="XRandR output never captured; may be repeated")
+    parser.add_argument("--pixel-size", type=int, default=config["pixel_size"])
+    parser.add_argument("--capture-backend", default=config["capture_backend"])
+    parser.add_argument("--image-codec", default=config["image_codec"])
+    parser.add_argument("--dedupe-threshold", type=int, default=config["dedupe_threshold"])
+    parser.add_argument("--store-flush-interval", type=float, default=config["store_flush_interval"])
+    parser.add_argument("--store-sync", choices=SYNC_MODES, default=config["store_sync"])
+    parser.add_argument("--log-level", default=config["log_level"])
+    parser.add_argument("--metrics-port", type=int, default=config["metrics_port"])
+    parser.add_argument("--metrics-log", default=config["metrics_log"])
+    parser.add_argument("--metrics-interval", type=float, default=config["metrics_interval"])
+    parser.add_argument("--pack-days", action=argparse.BooleanOptionalAction, default=config["pack_days"])
+    parser.set_defaults(dedupe_inherit_classification=config["dedupe_inherit_classification"])
+    return parser.parse_args()
+
+
+def control(monitor, command, args):
+    # Runs on the control socket thread
+    if command == "status":
+        return monitor.status()
+    if command == "start":
+        if not monitor.is_stopped():
+            raise RuntimeError("still stopping, try again in a moment")
+        monitor.start()
+        return monitor.status()
+    if command == "stop":
+        # Draining the pipeline can outlast the client's timeout; status
+        # reports "stopping" until it is done
+        monitor.stop(wait=False)
+        return monitor.status()
+    if command == "set-day":
+        if not args:
+            raise ValueError("set-day needs a day (YYYY-MM-DD)")
+        day = datetime.date.fromisoformat(args[0]).isoformat()
+        monitor.follow_date = False  # stay on the chosen day
+        monitor.update_day(day)
+        log.info(f"Recording day set to {day}")
+        return day
+    if command == "stats":
+        return monitor.stats(args[0] if args else None)
+    raise ValueError(f"Unknown command: {command}")
+
+
+def run(args, instance):
+    monitor = ProductivityMonitor(
+        save_dir=args.save_dir,
+        bin_day=datetime.datetime.now().strftime("%Y-%m-%d"),
+        interval_min=args.interval_min,
+        interval_max=args.interval_max,
+        classify_screenshot=None,
+        parent_window=None,  # captures stay pending for the GUI
+        pixel_size=args.pixel_size,
+        capture_backend=args.capture_backend,
+        image_codec=args.image_codec,
+        follow_date=True,
+        dedupe_threshold=args.dedupe_threshold,
+        dedupe_inherit=args.dedupe_inherit_classification,
+        store_options={"flush_interval": args.store_flush_interval, "sync": args.store_sync},
+        pack_days=args.pack_days,
+        schedule=args.schedule,
+        idle_after=args.idle_after,
+        pause_when_locked=args.pause_when_locked,
+        activity_provider=args.activity_provider,
+        per_output=args.per_output_capture,
+        excluded_outputs=args.excluded_outputs,
+    )
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: stop.set())
+
+    monitor.start()  # fails if the GUI is capturing
+    metrics = start_exporters(args.metrics_port, args.metrics_log, args.metrics_interval)
+    instance.handler = lambda command, command_args: control(monitor, command, command_args)
+    log.info(f"Capturing headless into {args.save_dir}")
+    stop.wait()
+    log.info("Stopping...")
+    monitor.stop()
+    close_stores()
+    if metrics:
+        metrics.stop()
+
+
+def main():
+    args = parse_args(load_config())
+    configure_logging(args.log_level)
+    try:
+        with SingleInstance(name="panopticon-daemon") as instance:
+            run(args, instance)
+    except SingleInstanceException as e:
+        log.error(e)
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import numpy as np
+from PIL import Image, ImageFilter
+
+
+# Block rows are reduced a band at a time, so memory stays near this much
+# per band instead of a copy of the whole frame
+BAND_BYTES = 1 << 20
+
+
+def block_mean(image: Image.Image, pixel_size: int) -> Image.Image:
+    """Average each pixel_size × pixel_size block into one pixel.
+
+    Returns only the reduced (W/pixel_size × H/pixel_size) grid; the full-size
+    blocky look is produced by render_pixelated when the image is displayed.
+    Edge pixels that do not fill a whole block are dropped.
+    """
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    w, h = image.size
+    bh, bw = min(pixel_size, h), min(pixel_size, w)
+    gh, gw = h // bh, w // bw
+    grid = np.empty((gh, gw, 3), dtype=np.uint8)
+    band_rows = max(1, BAND_BYTES // (bh * gw * bw * 3))  # block rows per band
+    for top in range(0, gh, band_rows):
+        rows = min(band_rows, gh - top)
+        # Cropping to whole blocks first gives a small contiguous array
+        band = np.asarray(image.crop((0, top * bh, gw * bw, (top + rows) * bh)))
+        grid[top:top + rows] = _band_mean(band.reshape(rows, bh, gw * bw * 3), bh, bw, gw)
+    return Image.fromarray(grid, "RGB")
+
+
+def _band_mean(blocks, bh, bw, gw):
+    # Accumulate one block row / column at a time into a small buffer: summing
+    # strided views keeps every pass sequential and never widens the band
+    acc_type = np.uint16 if bh * 255 <= np.iinfo(np.uint16).max else np.uint32
+    rows = blocks[:, 0].astype(acc_type)
+    for i in range(1, bh):
+        rows += blocks[:, i]
+    rows = rows.reshape(len(blocks), gw, bw, 3)
+    sums = rows[:, :, 0].astype(np.uint32)
+    for j in range(1, bw):
+        sums += rows[:, :, j]
+
+    area = bh * bw
+    return ((sums + area // 2) // area).astype(np.uint8)
+
+
+def compose_outputs(frames, pixel_size: int) -> Image.Image:
+    """Lay per-output block grids out as one grid, as the outputs sit on the screen.
+
+    ``frames`` is a list of (output, grid) pairs, each output having x, y,
+    width and height in screen pixels. Gaps between outputs stay black.
+    """
+    left = min(output.x for output, _ in frames)
+    top = min(output.y for output, _ in frames)
+    right = max(output.x + output.width for output, _ in frames)
+    bottom = max(output.y + output.height for output, _ in frames)
+    canvas = Image.new("RGB", (max((right - left) // pixel_size, 1), max((bottom - top) // pixel_size, 1)))
+    for output, grid in frames:
+        canvas.paste(grid, ((output.x - left) // pixel_size, (output.y - top) // pixel_size))
+    return canvas
+
+
+def render_pixelated(image: Image.Image, max_size) -> Image.Image:
+    """Scale a stored screenshot to fit max_size for display.
+
+    Block grids are blown up with nearest-neighbour and softened with a small
+    blur at display resolution, which matches the old full-resolution look at a
+    fraction of the cost. Full-size images from older versions are shrunk.
+    """
+    w, h = image.size
+    max_w, max_h = max_size
+    scale = min(max_w / w, max_h / h)
+    size = (max(int(w * scale), 1), max(int(h * scale), 1))
+    if scale > 1:
+        return image.resize(size, Image.NEAREST).filter(ImageFilter.GaussianBlur(radius=1))
+    return image.resize(size, Image.BOX)
+
+
+def grid_hash(grid: Image.Image) -> int:
+    """64-bit difference hash of a block grid.
+
+    The grid is shrunk to 9×8 grey levels and each bit records whether a cell
+    is brighter than its left neighbour, so small changes (a clock ticking,
+    a cursor blink) flip few or no bits.
+    """
+    small = np.asarray(grid.convert("L").resize((9, 8), Image.BOX), dtype=np.int16)
+    bits = small[:, 1:] > small[:, :-1]
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hash_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
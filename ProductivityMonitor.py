@@ -1,16 +1,44 @@
+import io
+import json
+import logging
+import os
 import time
 from datetime import datetime
-import random
-from PIL import Image, ImageFilter
-import pyscreenshot
 import pathlib
-import json
+import queue
 import threading
-from CTkMessagebox import CTkMessagebox
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from ScreenshotStore import image_name, open_store
+from CapturePipeline import CapturePipeline
+from Metrics import BYTES_WRITTEN, CAPTURES, STAGE_SECONDS
+from Scheduler import CaptureScheduler, create_activity_provider, create_schedule
+from SingleInstance import CaptureLock
+
+log = logging.getLogger(__name__)
+
+
+# A grabbed frame plus where it belongs, fixed at the moment of capture.
+# Captures taken per output have no image but a list of (Output, block grid)
+Capture = namedtuple("Capture", ["image", "time", "save_dir", "day", "outputs"], defaults=[None])
+
+# A capture after the worker stage: block grid, its hash and suggestion
+# features, and the encoded file, or (Output, encoded file) per output
+Processed = namedtuple("Processed", ["capture", "image", "hash", "features", "data", "extension", "frames"],
+                       defaults=[None])
+
+
+def capture_size(capture):
+    # Screen size covered by a capture, before pixelation
+    if capture.outputs:
+        outputs = [output for output, _ in capture.outputs]
+        return (max(o.x + o.width for o in outputs) - min(o.x for o in outputs),
+                max(o.y + o.height for o in outputs) - min(o.y for o in outputs))
+    return capture.image.size
 
 
 class ProductivityMonitor:
-    def __init__(self, save_dir, bin_day, interval_min, interval_max, classify_screenshot, parent_window=None, pixel_size=20):
+    def __init__(self, save_dir, bin_day, interval_min, interval_max, classify_screenshot, parent_window=None, screenshot_added=None, pixel_size=20, capture_backend="auto", pipeline_workers=2, image_codec="png", follow_date=False, dedupe_threshold=4, dedupe_inherit=True, store_options=None, pack_days=False, schedule="uniform", idle_after=300, pause_when_locked=True, activity_provider="auto", per_output=True, excluded_outputs=()):
         self.save_dir = save_dir
         self.bin_day = bin_day
         self.interval_min = interval_min
@@ -22,115 +50,439 @@ class ProductivityMonitor:
         self.stop_event = threading.Event()
         self.classify_screenshot = classify_screenshot
         self.parent_window = parent_window
+        self.screenshot_added = screenshot_added
+        self.capture_backend = capture_backend
+        self.capture = None
+        self.pipeline_workers = pipeline_workers
+        self.pipeline = None
+        self.codec = None
+        self.image_codec = image_codec  # codec is created with the first capture
+        self.follow_date = follow_date  # move to a new day folder at midnight
+        self.dedupe_threshold = dedupe_threshold  # max hash distance to reuse a frame; None/-1 disables
+        self.dedupe_inherit = dedupe_inherit      # copy the reused frame's classification
+        self._last_saved = None
+        self.store_options = store_options or {}  # flush_interval / sync for the store
+        self.pack_days = pack_days  # roll finished days into pack files in the background
+        self.pack_interval = 3600
+        self.pack_thread = None
+        self.pack_stop = None  # set to end the current packer; each run gets its own
+        self.pack_stop_timeout = 5  # seconds stop() waits for a pack being written
+        self.schedule = schedule  # see Scheduler.SCHEDULES
+        self.idle_after = idle_after
+        self.pause_when_locked = pause_when_locked
+        self.activity_provider = activity_provider
+        self.scheduler = None
+        self.per_output = per_output  # grab and store each monitor separately
+        self.excluded_outputs = set(excluded_outputs)  # output names never captured
+        self.outputs_refresh = 60  # seconds between checks for added or removed monitors
+        self._outputs = None
+        self._outputs_checked = 0
+        self._output_pool = None
+        self._stopping = None  # thread finishing the last stop()
+        self.capture_lock = CaptureLock()  # held while capturing, see SingleInstance
+
+        # Pipeline threads never call Tk themselves: they queue callbacks
+        # here and the Tk thread runs them from its own event loop
+        self.ui_events = queue.Queue()
+        self.ui_poll_interval = 50  # ms
+        if self.parent_window:
+            self.parent_window.after(self.ui_poll_interval, self.run_ui_events)
+
+    def run_ui_events(self):
+        # Runs on the Tk thread
+        while True:
+            try:
+                callback, args = self.ui_events.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                log.error(f"Error in {getattr(callback, '__name__', callback)}: {e}")
+        self.parent_window.after(self.ui_poll_interval, self.run_ui_events)
+
+    def get_capture(self):
+        if self.capture is None:
+            from CaptureBackends import create_backend
+            self.capture = create_backend(self.capture_backend)
+            log.info(f"Using capture backend: {self.capture.name}")
+        return self.capture
 
-    def take_screenshot(self):
+    def take_screenshot(self, output=None):
         try:
-            screen = pyscreenshot.grab(backend='gnome-screenshot')
-            return screen
+            capture = self.get_capture()
+            with STAGE_SECONDS.time("capture"):
+                return capture.grab() if output is None else capture.grab_output(output)
         except Exception as e:
-            print(f"Screenshot error: {e}")
+            CAPTURES.inc(1, "failed")
+            log.error(f"Screenshot error: {e}")
+            raise
+
+    def get_outputs(self):
+        # Outputs to grab one at a time, without the excluded ones; None when
+        # the screen is grabbed whole (disabled, or outputs cannot be listed)
+        if not self.per_output:
+            return None
+        now = time.monotonic()
+        if self._outputs is None or now - self._outputs_checked > self.outputs_refresh:
+            try:
+                outputs = self.get_capture().outputs()
+            except Exception as e:
+                log.warning(f"Could not list outputs: {e}")
+                outputs = []
+            selected = [output for output in outputs if output.name not in self.excluded_outputs]
+            if selected != self._outputs:
+                log.info(f"Capturing outputs: {', '.join(o.name for o in selected) or 'none (all excluded)'}")
+            self._outputs = selected if outputs else None
+            self._outputs_checked = now
+        return self._outputs
+
+    def take_outputs(self, outputs):
+        # Grab and pixelate every output in parallel; each thread drops its
+        # full-size frame as soon as it is reduced, so the whole desktop never
+        # sits in memory at full resolution
+        def grab(output):
+            with STAGE_SECONDS.time("capture"):
+                image = capture.grab_output(output)
+            return output, self.pixelate_image(image)
+
+        try:
+            capture = self.get_capture()
+            if self._output_pool is None:
+                self._output_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="capture-output")
+            return list(self._output_pool.map(grab, outputs))
+        except Exception as e:
+            CAPTURES.inc(1, "failed")
+            log.error(f"Screenshot error: {e}")
             raise
 
     def pixelate_image(self, image):
-        small = image.resize(
-            (image.size[0] // self.pixel_size, image.size[1] // self.pixel_size),
-            Image.NEAREST
-        )
-        result = small.resize(image.size, Image.NEAREST)
-        return result.filter(ImageFilter.GaussianBlur(radius=1))
-
-    def save_screenshot(self, image):
-        save_path = pathlib.Path(self.save_dir) / self.bin_day
+        # Only the block grid is kept; it is scaled back up when displayed.
+        # Imported here so NumPy is not loaded until the first capture.
+        from Pixelation import block_mean
+        with STAGE_SECONDS.time("pixelate"):
+            return block_mean(image, self.pixel_size)
+
+    def encode(self, image, codec=None):
+        encoded = io.BytesIO()
+        with STAGE_SECONDS.time("encode"):
+            (codec or self.get_codec()).save(image, encoded)
+        return encoded.getvalue()
+
+    def process_capture(self, capture):
+        # Worker stage: pixelate, hash and encode; nothing touches the disk yet
+        from Pixelation import compose_outputs, grid_hash
+        from SuggestionIndex import feature_vector
+        codec = self.get_codec()  # one codec for the file and its extension
+        if capture.outputs:
+            # Already pixelated per output; hash and features cover the whole layout
+            pixelated = compose_outputs(capture.outputs, self.pixel_size)
+            frames = [(output, self.encode(grid, codec)) for output, grid in capture.outputs]
+            return Processed(capture, pixelated, grid_hash(pixelated), feature_vector(pixelated),
+                             None, codec.extension, frames)
+        pixelated = self.pixelate_image(capture.image)
+        return Processed(capture, pixelated, grid_hash(pixelated), feature_vector(pixelated),
+                         self.encode(pixelated, codec), codec.extension)
+
+    def find_duplicate(self, processed):
+        # The last frame actually written, if this one is close enough to reuse it
+        from Pixelation import hash_distance
+        last = self._last_saved
+        if self.dedupe_threshold is None or self.dedupe_threshold < 0 or last is None:
+            return None
+        if (last["save_dir"], last["day"]) != (processed.capture.save_dir, processed.capture.day):
+            return None
+        if hash_distance(last["hash"], processed.hash) > self.dedupe_threshold:
+            return None
+        return last
+
+    def save_screenshot(self, processed):
+        capture = processed.capture
+        save_path = pathlib.Path(capture.save_dir) / capture.day
         save_path.mkdir(parents=True, exist_ok=True)
 
-        time = datetime.now()
-        time_label = time.strftime('%-I:%M %p (%Y/%m/%d)')
-        timestamp = time.strftime('%Y%m%d_%H%M%S')
-        filename = f'screenshot_{timestamp}.png'
+        timestamp = capture.time.strftime('%Y%m%d_%H%M%S')
+        filename = f'screenshot_{timestamp}.{processed.extension}'
         image_path = save_path / filename
-        image.save(image_path)
-        print(f"Saved: {image_path}")
-
-        # Update JSON file
-        json_file = save_path / "screenshots.json"
-        if not json_file.exists():
-            self.initialize_json()
-            
+        with STAGE_SECONDS.time("write"):
+            if processed.frames:
+                self.write_outputs(image_path, processed)
+            else:
+                self.write_file(image_path, processed.data)
+        CAPTURES.inc(1, "saved")
+        log.debug(f"Saved: {image_path}")
+        if self.parent_window:
+            from ThumbnailCache import get_thumbnail_cache
+            get_thumbnail_cache().put(image_path, processed.image)  # dialog opens without decoding
+
         screenshot_entry = {
             "filename": filename,
             "classification": "none",
+            "width": capture_size(capture)[0],
+            "height": capture_size(capture)[1],
+            "pixel_size": self.pixel_size,
+            "pending": 1,
         }
+        self._last_saved = {"save_dir": capture.save_dir, "day": capture.day, "hash": processed.hash,
+                            "filename": filename}
+        return image_path, screenshot_entry
+
+    def write_file(self, path, data):
+        # Written under a temporary name and renamed, so a crash never leaves
+        # a truncated image behind the name the index points at
+        temp_path = path.with_name(f".{path.name}.tmp")
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            if self.store_options.get("sync") in ("full", "extra"):
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        BYTES_WRITTEN.inc(len(data), "screenshot")
+
+    def write_outputs(self, image_path, processed):
+        # One file per output, then the manifest that makes them one screenshot
+        from DayPack import manifest_name, output_frame_name
+        outputs = []
+        for number, (output, data) in enumerate(processed.frames):
+            frame = output_frame_name(image_path.name, number)
+            self.write_file(image_path.with_name(frame), data)
+            outputs.append({**output._asdict(), "frame": frame})
+        manifest = {"pixel_size": self.pixel_size, "outputs": outputs}
+        self.write_file(image_path.with_name(manifest_name(image_path.name)), json.dumps(manifest).encode())
+
+    def record_duplicate(self, processed, index, original):
+        # Entry that points at the previous frame's file instead of writing a new one
+        capture = processed.capture
+        timestamp = capture.time.strftime('%Y%m%d_%H%M%S')
+        filename = f'screenshot_{timestamp}.{processed.extension}'
+        previous = index.get(original["filename"])
+        if previous is None:
+            return None, None  # discarded meanwhile; save this frame instead
+        screenshot_entry = {
+            "filename": filename,
+            "image": image_name(previous),
+            "classification": "none",
+            "width": capture_size(capture)[0],
+            "height": capture_size(capture)[1],
+            "pixel_size": self.pixel_size,
+            "pending": 1,
+        }
+        if self.dedupe_inherit:
+            screenshot_entry["classification"] = previous["classification"]
+            if previous["classification"] != "none":
+                del screenshot_entry["pending"]
+        image_path = pathlib.Path(capture.save_dir) / capture.day / screenshot_entry["image"]
+        CAPTURES.inc(1, "duplicate")
+        log.debug(f"Unchanged screen, reusing {screenshot_entry['image']} for {filename}")
+        return image_path, screenshot_entry
+
+    def commit_screenshot(self, processed):
+        # Writer stage: write the file (unless it repeats the last one) and record it
+        capture = processed.capture
+        index = open_store(capture.save_dir, **self.store_options).day(capture.day)
+        image_path = screenshot_entry = None
+        original = self.find_duplicate(processed)
+        if original is not None:
+            image_path, screenshot_entry = self.record_duplicate(processed, index, original)
+        if screenshot_entry is None:
+            image_path, screenshot_entry = self.save_screenshot(processed)
+
+        try:
+            from SuggestionIndex import get_suggestion_index
+            suggestions = get_suggestion_index(capture.save_dir)
+            screenshot_entry["feature_row"] = suggestions.add(processed.features, screenshot_entry["classification"])
+        except Exception as e:
+            log.error(f"Error updating suggestion index: {e}")
+
         try:
-            with open(json_file, 'r+') as f:
-                data = json.load(f)
-                data["screenshots"].append(screenshot_entry)
-                f.seek(0)
-                json.dump(data, f, indent=4)
+            index.add(screenshot_entry)
         except Exception as e:
-            print(f"Error updating JSON file: {e}")
+            log.error(f"Error updating screenshot index: {e}")
+
+        if "pending" not in screenshot_entry:
+            # Classification carried over from the identical previous frame
+            if self.parent_window and self.screenshot_added:
+                self.ui_events.put((self.screenshot_added, (image_path, screenshot_entry)))
+            return
         
         # Display GUI for classification
+        time_label = capture.time.strftime('%-I:%M %p (%Y/%m/%d)')
         if self.parent_window:
-            self.parent_window.after(0, lambda: self.classify_screenshot(image_path, json_file, screenshot_entry, time_label, True))
+            self.ui_events.put((self.classify_screenshot, (image_path, index, screenshot_entry, time_label, True)))
         else:
-            print("Error: No parent window provided for classification.")
+            log.info(f"Queued for review: {image_path}")
 
     def run_loop(self):
         screenshots_taken = 0
-        start_time = time.time()
+        start_time = time.monotonic()
 
         while self.running:
-            image = self.take_screenshot()
-            pixelated = self.pixelate_image(image)
-            self.save_screenshot(pixelated)
-            screenshots_taken += 1
+            if not self.scheduler.wait(self.stop_event):
+                break
+            image = frames = None
+            try:
+                outputs = self.get_outputs()
+                if outputs is None:
+                    image = self.take_screenshot()
+                elif len(outputs) == 1:
+                    image = self.take_screenshot(outputs[0])  # the one output left after exclusions
+                elif outputs:
+                    frames = self.take_outputs(outputs)
+            except Exception:
+                pass
+            if image is not None or frames:
+                if self.follow_date:
+                    self.bin_day = datetime.now().strftime("%Y-%m-%d")
+                # Day and folder are fixed at capture time, not when the frame is saved
+                capture = Capture(image, datetime.now(), self.save_dir, self.bin_day, frames)
+                if self.pipeline.submit(capture):
+                    screenshots_taken += 1
 
-            elapsed_time = time.time() - start_time
-            rate = screenshots_taken / (elapsed_time / 3600)
-            print(f"Screenshots taken: {screenshots_taken} (Rate: {rate:.1f}/hour)")
+            elapsed_time = time.monotonic() - start_time
+            rate = screenshots_taken / (max(elapsed_time, 1) / 3600)
+            log.debug(f"Screenshots taken: {screenshots_taken} (Rate: {rate:.1f}/hour, "
+                      f"missed deadlines: {self.scheduler.missed})")
 
-            wait_time = random.randint(self.interval_min, self.interval_max)
-            if self.stop_event.wait(timeout=wait_time):
+    def pack_loop(self, stop_event, previous=None):
+        # Finished days only; today's folder keeps receiving loose files
+        from DayPack import roll_up_days
+        if previous is not None:
+            previous.join()  # a packer stop() gave up waiting for
+        while not stop_event.is_set():
+            try:
+                roll_up_days(self.get_store(), stop_event=stop_event)
+            except Exception as e:
+                log.error(f"Error packing days: {e}")
+            if stop_event.wait(timeout=self.pack_interval):
                 break
 
     def get_save_path(self):
         return pathlib.Path(self.save_dir) / self.bin_day
 
-    def get_json_path(self):
-        save_path = self.get_save_path()
-        json_file = save_path / "screenshots.json"
-        if not json_file.exists():
-            self.initialize_json()
-        return json_file
+    def get_store(self):
+        return open_store(self.save_dir, **self.store_options)
 
-    def initialize_json(self):
-        save_path = self.get_save_path()
-        save_path.mkdir(parents=True, exist_ok=True)
-        json_file = save_path / "screenshots.json"
+    def get_index(self):
+        return self.get_store().day(self.bin_day)
 
-        if not json_file.exists():
-            initial_data = {
-                "day": self.bin_day,
-                "screenshots": []
-            }
-            with open(json_file, 'w') as f:
-                json.dump(initial_data, f)
+    def status(self):
+        # What the control socket reports for `status`
+        scheduler = self.scheduler
+        return {
+            "running": self.running,
+            "stopping": not self.running and not self.is_stopped(),
+            "day": self.bin_day,
+            "save_dir": str(self.save_dir),
+            "schedule": self.schedule,
+            "interval": [self.interval_min, self.interval_max],
+            "captures": {str(outcome): count for outcome, count in CAPTURES.snapshot().items()},
+            "missed_deadlines": scheduler.missed if scheduler else 0,
+            "suspended": scheduler.suspended if scheduler else 0,
+            "pipeline_depth": self.pipeline.depth() if self.pipeline else 0,
+        }
+
+    def stats(self, day=None):
+        # Classification counts for one day, from the store's rollups
+        day = day or self.bin_day
+        on_task, off_task, none = self.get_store().daily_rollups(day, day).get(day, (0, 0, 0))
+        classified = on_task + off_task
+        return {"day": day, "on-task": on_task, "off-task": off_task, "none": none,
+                "on_task_ratio": round(on_task / classified, 3) if classified else None}
 
     def update_day(self, new_day: str):
         # Switch folders if user updates day
         self.bin_day = new_day
-        self.initialize_json() 
+
+    def set_schedule(self, name, interval_min, interval_max, idle_after=None):
+        self.schedule, self.interval_min, self.interval_max = name, interval_min, interval_max
+        if idle_after is not None:
+            self.idle_after = idle_after
+        if self.scheduler is not None:
+            self.scheduler.idle_after = self.idle_after
+            self.scheduler.set_schedule(create_schedule(name, interval_min, interval_max))
+
+    def get_codec(self):
+        if self.codec is None:
+            from ImageCodec import create_codec
+            self.codec = create_codec(self.image_codec)
+        return self.codec
+
+    def set_image_codec(self, name):
+        self.image_codec = name
+        self.codec = None
+
+    def set_capture_backend(self, name):
+        self.capture_backend = name
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
+        self._outputs = None
+
+    def set_outputs(self, per_output, excluded_outputs):
+        self.per_output = per_output
+        self.excluded_outputs = set(excluded_outputs)
+        self._outputs = None  # listed again before the next capture
 
     def start(self):
         if not self.running:
+            if not self.is_stopped():
+                self._stopping.join()  # the previous run is still draining
+            self.capture_lock.acquire()  # raises if another instance is capturing
             self.running = True
             self.stop_event.clear()
-            self.initialize_json() 
+            self.get_store()
+            self.pipeline = CapturePipeline(self.process_capture, self.commit_screenshot,
+                                            workers=self.pipeline_workers)
+            self.scheduler = CaptureScheduler(
+                create_schedule(self.schedule, self.interval_min, self.interval_max),
+                create_activity_provider(self.activity_provider),
+                idle_after=self.idle_after, pause_when_locked=self.pause_when_locked)
             self.thread = threading.Thread(target=self.run_loop)
             self.thread.start()
+            if self.pack_days:
+                previous = self.pack_thread
+                self.pack_stop = threading.Event()
+                self.pack_thread = threading.Thread(target=self.pack_loop, args=(self.pack_stop, previous),
+                                                    name="day-packer", daemon=True)
+                self.pack_thread.start()
 
-    def stop(self):
+    def stop(self, wait=True):
+        # Ends the loop at once; joining it and draining the pipeline can take
+        # a while, so the GUI passes wait=False and polls is_stopped()
         self.running = False
         self.stop_event.set()
+        if self.pack_stop is not None:
+            self.pack_stop.set()
+        if self.is_stopped():
+            self._stopping = threading.Thread(target=self._finish_stop, name="monitor-stop")
+            self._stopping.start()
+        if wait:
+            self._stopping.join()
+
+    def is_stopped(self):
+        return self._stopping is None or not self._stopping.is_alive()
+
+    def _finish_stop(self):
         if self.thread:
             self.thread.join()
+            self.thread = None
+        if self.scheduler is not None:
+            self.scheduler.close()
+            self.scheduler = None
+        if self.pack_thread:
+            self.pack_thread.join(timeout=self.pack_stop_timeout)
+            if self.pack_thread.is_alive():
+                log.warning("Day packer is still writing, not waiting for it")
+            else:
+                self.pack_thread = None
+        if self.pipeline is not None:
+            self.pipeline.stop()  # drain frames already captured
+            self.pipeline = None
+        self.get_store().flush()  # and wait for their index writes
+        if self._output_pool is not None:
+            self._output_pool.shutdown()
+            self._output_pool = None
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
+        self.capture_lock.release()  # only once everything captured is written
@@ -0,0 +1,236 @@
+import datetime
+import logging
+import pathlib
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+import customtkinter as ctk
+
+from DayPack import remove_frame
+from ScreenshotStore import image_name, time_label_from_filename
+from SuggestionIndex import get_suggestion_index
+from ThumbnailCache import get_thumbnail_cache
+
+log = logging.getLogger(__name__)
+
+
+SCOPES = {"This Day": 0, "Last 7 Days": 6, "All Days": None}  # days before the current one
+
+# action -> (button label, keys, colour, hover colour)
+ACTIONS = {
+    "on-task":  ("On-Task (1)", ("1", "o"), "#66BB6A", "#66BB6A"),
+    "off-task": ("Off-Task (2)", ("2", "f"), "#FF4747", "#FF6B6B"),
+    "skip":     ("Skip (Space)", ("space", "s"), "gray", "dimgray"),
+    "discard":  ("Discard (X)", ("x", "Delete"), "#7B61FF", "#9F8CFF"),
+}
+
+
+class ReviewPane(ctk.CTkFrame):
+    """Steps through every unclassified screenshot in one persistent pane.
+
+    The next ``prefetch`` thumbnails are decoded on a background thread while
+    the current one is shown, so moving on never waits for the disk. Answers
+    are kept in memory and written ``batch_size`` at a time (or after a
+    short pause, or when the pane is hidden) in a single transaction;
+    ``on_flush(decisions)`` is then called on the Tk thread with the
+    ``(day, entry, action)`` tuples that were written.
+    """
+
+    def __init__(self, parent, store, day, on_flush=None, prefetch=8, batch_size=20,
+                 flush_delay=2000, font_scale=1, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.store = store
+        self.day = day
+        self.on_flush = on_flush
+        self.prefetch = prefetch
+        self.batch_size = batch_size
+        self.flush_delay = flush_delay
+        self.font_scale = font_scale
+
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="review")
+        self._queue = []       # [(day, entry)] still to show
+        self._position = 0
+        self._decoded = {}     # queue position -> future of the thumbnail
+        self._decisions = []   # answered but not yet written
+        self._flush_job = None
+        self._bound = []       # (sequence, funcid) on the toplevel
+        self._image = None     # keeps the current CTkImage alive
+
+        font = ("", int(14 * font_scale))
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.pack(fill="x", padx=12, pady=(12, 0))
+        self._scope = ctk.CTkOptionMenu(header, values=list(SCOPES), font=font,
+                                        command=lambda _: self.reload())
+        self._scope.pack(side="left")
+        self._progress = ctk.CTkLabel(header, text="", font=font)
+        self._progress.pack(side="right")
+
+        self._title = ctk.CTkLabel(self, text="", font=("", int(16 * font_scale), "bold"))
+        self._title.pack(pady=(12, 0))
+        self._preview = ctk.CTkLabel(self, text="", font=font)
+        self._preview.pack(fill="both", expand=True, padx=12, pady=12)
+        self._hint = ctk.CTkLabel(self, text="", font=font)
+        self._hint.pack()
+
+        buttons = ctk.CTkFrame(self, fg_color="transparent")
+        buttons.pack(pady=12)
+        for action, (label, _, color, hover) in ACTIONS.items():
+            ctk.CTkButton(buttons, text=label, font=font, fg_color=color, hover_color=hover,
+                          command=lambda a=action: self.answer(a)).pack(side="left", padx=6)
+
+    # --- visibility ------------------------------------------------------
+
+    def activate(self):
+        # Keys are bound on the window while the pane is shown
+        top = self.winfo_toplevel()
+        for action, (_, keys, _, _) in ACTIONS.items():
+            for key in keys:
+                sequence = f"<KeyPress-{key}>"
+                funcid = top.bind(sequence, lambda e, a=action: self._on_key(e, a), add="+")
+                self._bound.append((sequence, funcid))
+        self.reload()
+
+    def deactivate(self):
+        top = self.winfo_toplevel()
+        for sequence, funcid in self._bound:
+            top.unbind(sequence, funcid)
+        self._bound = []
+        self.flush()
+
+    def destroy(self):
+        self.on_flush = None  # nothing left to notify
+        self.deactivate()
+        self._worker.shutdown(wait=True)  # let the last batch land
+        super().destroy()
+
+    def set_day(self, day):
+        self.day = day
+        if self._bound:
+            self.reload()
+
+    def _on_key(self, event, action):
+        if isinstance(event.widget, (tk.Entry, tk.Text)):
+            return  # typing in a settings field
+        self.answer(action)
+
+    # --- queue -----------------------------------------------------------
+
+    def reload(self):
+        # Written answers must be in the store before it is queried again
+        self.flush()
+        days_back = SCOPES[self._scope.get()]
+        day = datetime.date.fromisoformat(self.day)
+        start = None if days_back is None else (day - datetime.timedelta(days=days_back)).isoformat()
+        self._title.configure(text="Loading...")
+        self._when_done(self._worker.submit(self.store.unclassified_entries, start, self.day), self._set_queue)
+
+    def _set_queue(self, entries):
+        if isinstance(entries, Exception):
+            log.error(f"Error loading screenshots to review: {entries}")
+            entries = []
+        self._queue = entries
+        self._position = 0
+        self._decoded = {}
+        self._show()
+
+    def _image_path(self, day, entry):
+        return pathlib.Path(self.store.save_dir) / day / image_name(entry)
+
+    def _prefetch(self):
+        # Decode the next few thumbnails and forget the ones already passed
+        for pos in [p for p in self._decoded if p < self._position]:
+            del self._decoded[pos]
+        for pos in range(self._position, min(self._position + self.prefetch, len(self._queue))):
+            if pos not in self._decoded:
+                day, entry = self._queue[pos]
+                self._decoded[pos] = self._worker.submit(get_thumbnail_cache().get, self._image_path(day, entry))
+
+    # --- display ---------------------------------------------------------
+
+    def _show(self):
+        remaining = len(self._queue) - self._position
+        self._progress.configure(text=f"{self._position} / {len(self._queue)}" if self._queue else "")
+        if remaining <= 0:
+            self._title.configure(text="Nothing left to review")
+            self._preview.configure(image=None, text="")
+            self._hint.configure(text="")
+            self._image = None
+            return
+        self._prefetch()
+        day, entry = self._queue[self._position]
+        self._title.configure(text=time_label_from_filename(entry["filename"]))
+        feature_row = entry.get("feature_row")
+        suggestion = get_suggestion_index(self.store.save_dir).suggest(row=feature_row) \
+            if feature_row is not None else None
+        self._hint.configure(text=f"Looks {suggestion[0]} ({suggestion[1]:.0%})" if suggestion else "")
+        position = self._position
+        self._when_done(self._decoded[position], lambda thumb: self._show_image(position, thumb))
+
+    def _show_image(self, position, thumb):
+        if position != self._position:
+            return  # already answered
+        if isinstance(thumb, Exception):
+            self._image = None
+            self._preview.configure(image=None, text=f"Could not load image: {thumb}")
+            return
+        self._image = ctk.CTkImage(thumb, size=thumb.size)
+        self._preview.configure(image=self._image, text="")
+
+    def _when_done(self, future, callback):
+        # Tk is not thread-safe, so poll instead of calling back from the worker
+        if future.done():
+            try:
+                result = future.result()
+            except Exception as e:
+                result = e
+            if self.winfo_exists():
+                callback(result)
+        else:
+            self.after(20, self._when_done, future, callback)
+
+    # --- answers ---------------------------------------------------------
+
+    def answer(self, action):
+        if self._position >= len(self._queue):
+            return
+        day, entry = self._queue[self._position]
+        if action != "skip":
+            self._decisions.append((day, entry, action))
+        self._position += 1
+        self._show()
+        if len(self._decisions) >= self.batch_size:
+            self.flush()
+        elif self._decisions:
+            if self._flush_job is not None:
+                self.after_cancel(self._flush_job)
+            self._flush_job = self.after(self.flush_delay, self.flush)
+
+    def flush(self):
+        if self._flush_job is not None:
+            self.after_cancel(self._flush_job)
+            self._flush_job = None
+        if not self._decisions:
+            return
+        decisions, self._decisions = self._decisions, []
+        future = self._worker.submit(self._write, decisions)
+        if self.on_flush:
+            self._when_done(future, lambda _: self.on_flush(decisions))
+
+    def _write(self, decisions):
+        # Runs on the worker: one transaction for labels, one for discards
+        suggestions = get_suggestion_index(self.store.save_dir)
+        labels = [(action, day, entry["filename"]) for day, entry, action in decisions if action != "discard"]
+        discards = [(day, entry) for day, entry, action in decisions if action == "discard"]
+        self.store.classify_many(labels)
+        self.store.delete_many([(day, entry["filename"]) for day, entry in discards])
+        for day, entry, action in decisions:
+            suggestions.label(entry.get("feature_row"), None if action == "discard" else action)
+        for day, entry in discards:
+            image_path = self._image_path(day, entry)
+            try:
+                if not self.store.image_in_use(day, image_path.name):
+                    remove_frame(image_path)
+                    get_thumbnail_cache().discard(image_path)
+            except OSError as e:
+                log.error(f"Error discarding screenshot: {e}")
+        log.info(f"Reviewed {len(labels)} screenshots, discarded {len(discards)}")
@@ -0,0 +1,353 @@
+"""When to capture: sampling schedules on a monotonic clock, and idle/lock detection.
+
+A schedule yields absolute deadlines, so the time spent capturing and saving
+never shifts the ones that follow. ``CaptureScheduler.wait`` sleeps until the
+next deadline, counts deadlines that were already long past as missed and
+starts a fresh sequence instead of bursting to catch up, and holds off while
+the desk is idle or locked.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import random
+import shutil
+import subprocess
+import threading
+import time
+
+from Metrics import DEADLINES, SCHEDULE_LAG
+
+log = logging.getLogger(__name__)
+
+
+# --- schedules ---------------------------------------------------------------
+
+class Schedule:
+    """A sequence of capture deadlines between ``interval_min`` and ``interval_max`` apart on average."""
+
+    name = None
+    summary = None  # how the interval settings are used, for the settings panel
+
+    def __init__(self, interval_min, interval_max, rng=None):
+        self.interval_min = interval_min
+        self.interval_max = max(interval_max, interval_min)
+        self.random = rng or random.Random()
+        self.mean = (self.interval_min + self.interval_max) / 2
+
+    def reset(self, now):
+        # Start a fresh sequence; the first deadline follows ``now``
+        self._last = now
+
+    def next_deadline(self):
+        raise NotImplementedError
+
+
+class UniformSchedule(Schedule):
+    """Gaps drawn uniformly from [min, max], as before, but measured between deadlines."""
+
+    name = "uniform"
+    summary = "Every gap is between the min and max interval."
+
+    def next_deadline(self):
+        self._last += self.random.uniform(self.interval_min, self.interval_max)
+        return self._last
+
+
+class PoissonSchedule(Schedule):
+    """Exponential gaps with the mean interval: every moment is equally likely to be sampled."""
+
+    name = "poisson"
+    summary = "Gaps average the midpoint of min and max; some are much shorter than min."
+
+    def next_deadline(self):
+        self._last += self.random.expovariate(1 / self.mean) if self.mean > 0 else 0
+        return self._last
+
+
+class JitteredGridSchedule(Schedule):
+    """One capture at a random point in each slot of the mean interval.
+
+    Stratified sampling: as unbiased as Poisson, but never two captures in a
+    slot and never a gap longer than two slots.
+    """
+
+    name = "jittered"
+    summary = "One capture per midpoint-of-min-and-max slot; gaps can be shorter than min."
+
+    def reset(self, now):
+        self._origin = now
+        self._slot = 0
+
+    def next_deadline(self):
+        deadline = self._origin + (self._slot + self.random.random()) * self.mean
+        self._slot += 1
+        return deadline
+
+
+SCHEDULES = {
+    PoissonSchedule.name: PoissonSchedule,
+    JitteredGridSchedule.name: JitteredGridSchedule,
+    UniformSchedule.name: UniformSchedule,
+}
+
+
+MIN_INTERVAL = 1  # seconds; a zero gap would never move the deadline forward
+
+
+def create_schedule(name, interval_min, interval_max, seed=None):
+    if name not in SCHEDULES:
+        raise ValueError(f"Unknown schedule: {name}")
+    if interval_min < MIN_INTERVAL:
+        log.warning(f"Capture interval {interval_min}s is too short, using {MIN_INTERVAL}s")
+        interval_min = MIN_INTERVAL
+    return SCHEDULES[name](interval_min, interval_max, random.Random(seed))
+
+
+# --- activity ----------------------------------------------------------------
+
+class ActivityProvider:
+    """Reports how long the user has been idle and whether the session is locked."""
+
+    name = None
+
+    def is_available(self) -> bool:
+        return True
+
+    def idle_seconds(self) -> float:
+        return 0.0
+
+    def is_locked(self) -> bool:
+        return False
+
+    def close(self):
+        pass
+
+
+class AlwaysActiveProvider(ActivityProvider):
+    """No detection: captures are never suspended."""
+
+    name = "none"
+
+
+class FakeActivityProvider(ActivityProvider):
+    """Idle time and lock state set by hand, for tests and benchmarks."""
+
+    name = "fake"
+
+    def __init__(self, idle=0.0, locked=False):
+        self.idle = idle
+        self.locked = locked
+
+    def idle_seconds(self):
+        return self.idle
+
+    def is_locked(self):
+        return self.locked
+
+
+class _XScreenSaverInfo(ctypes.Structure):
+    _fields_ = [("window", ctypes.c_ulong), ("state", ctypes.c_int), ("kind", ctypes.c_int),
+                ("til_or_since", ctypes.c_ulong), ("idle", ctypes.c_ulong), ("event_mask", ctypes.c_ulong)]
+
+
+class X11ActivityProvider(ActivityProvider):
+    """X11 input idle time through the MIT-SCREEN-SAVER extension (libXss).
+
+    The session counts as locked while the screen saver is on, or when logind
+    reports the session's LockedHint (checked through loginctl, if present).
+    The display is opened on first use, on the scheduler's thread.
+    """
+
+    name = "x11"
+    SCREEN_SAVER_ON = 1
+
+    def __init__(self):
+        self._display = None
+        self._info = None
+        self._session = os.environ.get("XDG_SESSION_ID")
+        self._loginctl = shutil.which("loginctl") if self._session else None
+
+    def is_available(self):
+        return bool(os.environ.get("DISPLAY") and ctypes.util.find_library("X11")
+                    and ctypes.util.find_library("Xss"))
+
+    def _open(self):
+        xlib = ctypes.cdll.LoadLibrary(ctypes.util.find_library("X11"))
+        xss = ctypes.cdll.LoadLibrary(ctypes.util.find_library("Xss"))
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(_XScreenSaverInfo)
+        xss.XScreenSaverQueryInfo.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XScreenSaverInfo)]
+        display = xlib.XOpenDisplay(None)
+        if not display:
+            raise RuntimeError("Cannot open X display")
+        self._xlib, self._xss = xlib, xss
+        self._display = display
+        self._root = xlib.XDefaultRootWindow(display)
+        self._info = xss.XScreenSaverAllocInfo()
+
+    def _query(self):
+        if self._display is None:
+            self._open()
+        if not self._xss.XScreenSaverQueryInfo(self._display, self._root, self._info):
+            raise RuntimeError("MIT-SCREEN-SAVER extension not supported")
+        return self._info.contents
+
+    def idle_seconds(self):
+        return self._query().idle / 1000
+
+    def is_locked(self):
+        if self._query().state == self.SCREEN_SAVER_ON:
+            return True
+        if self._loginctl:
+            try:
+                result = subprocess.run([self._loginctl, "show-session", self._session, "-p", "LockedHint", "--value"],
+                                        capture_output=True, text=True, timeout=2)
+                return result.stdout.strip() == "yes"
+            except (OSError, subprocess.SubprocessError):
+                self._loginctl = None  # stop asking
+        return False
+
+    def close(self):
+        if self._display is not None:
+            self._xlib.XFree(self._info)
+            self._xlib.XCloseDisplay(self._display)
+            self._display = None
+
+
+PROVIDERS = {
+    X11ActivityProvider.name: X11ActivityProvider,
+    AlwaysActiveProvider.name: AlwaysActiveProvider,
+    FakeActivityProvider.name: FakeActivityProvider,
+}
+
+
+def create_activity_provider(name="auto") -> ActivityProvider:
+    # "auto" uses X11 when a display and libXss are there, else never suspends
+    if name == "auto":
+        provider = X11ActivityProvider()
+        if provider.is_available():
+            return provider
+        log.info("Idle detection is not available, captures will not be suspended")
+        return AlwaysActiveProvider()
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown activity provider: {name}")
+    return PROVIDERS[name]()
+
+
+# --- scheduler ---------------------------------------------------------------
+
+class CaptureScheduler:
+    """Paces the capture loop.
+
+    ``wait(stop_event)`` returns True when a capture is due and False once
+    ``stop_event`` is set. The first capture is due immediately. A deadline
+    that has passed by more than ``grace`` seconds (a slow capture, a stalled
+    machine) is counted as missed, along with the others that fell in the
+    delay, and the schedule starts again from now. While the user has been idle
+    for ``idle_after`` seconds (0 disables) or the session is locked, no
+    captures are taken; activity is polled every ``poll_interval`` seconds and
+    a fresh sequence starts when the user is back.
+    """
+
+    def __init__(self, schedule, activity=None, idle_after=300, pause_when_locked=True,
+                 poll_interval=5, grace=1.0, clock=time.monotonic, recheck_interval=1.0):
+        self.schedule = schedule
+        self.activity = activity or AlwaysActiveProvider()
+        self.idle_after = idle_after
+        self.pause_when_locked = pause_when_locked
+        self.poll_interval = poll_interval
+        self.grace = grace
+        self.clock = clock
+        self.recheck_interval = recheck_interval  # longest sleep before checking for a new schedule
+        self.taken = 0
+        self.missed = 0
+        self.suspended = 0
+        self._deadline = None
+        self._restart = False
+        self._lock = threading.Lock()
+        self._pending = None  # schedule handed over by set_schedule
+
+    def set_schedule(self, schedule):
+        # Takes effect from the next deadline; safe to call from another thread
+        with self._lock:
+            self._pending = schedule
+
+    def _take_pending(self):
+        with self._lock:
+            schedule, self._pending = self._pending, None
+        if schedule is not None:
+            self.schedule = schedule
+            self._restart = True
+        return schedule is not None
+
+    def _inactive(self):
+        # Why captures should wait, or None
+        try:
+            if self.pause_when_locked and self.activity.is_locked():
+                return "locked"
+            if self.idle_after and self.activity.idle_seconds() >= self.idle_after:
+                return "idle"
+        except Exception as e:
+            log.warning(f"Idle detection failed ({e}), no longer suspending captures")
+            self.activity.close()
+            self.activity = AlwaysActiveProvider()
+        return None
+
+    def _suspend(self, reason, stop_event):
+        # Returns False if stopped while waiting for the user
+        DEADLINES.inc(1, "suspended")
+        self.suspended += 1
+        log.info(f"Session {reason}, suspending captures")
+        while self._inactive():
+            if stop_event.wait(timeout=self.poll_interval):
+                return False
+        log.info("Activity resumed, capturing again")
+        return True
+
+    def wait(self, stop_event):
+        if self._deadline is None:
+            self.schedule.reset(self.clock())
+            self._deadline = self.clock()
+        while True:
+            self._take_pending()
+            if self._restart:
+                self._restart = False
+                self.schedule.reset(self.clock())
+                self._deadline = self.schedule.next_deadline()
+            remaining = self._deadline - self.clock()
+            if remaining > 0:
+                # Sleep in slices so a new schedule is picked up promptly
+                if stop_event.wait(timeout=min(remaining, self.recheck_interval)):
+                    return False
+                continue
+            if stop_event.is_set():
+                return False
+            late = self.clock() - self._deadline
+            if late > self.grace:
+                # Stepping through the stale deadlines could take forever
+                # with short gaps, so estimate them and restart from now
+                missed = 1 + (int(late // self.schedule.mean) if self.schedule.mean > 0 else 0)
+                DEADLINES.inc(missed, "missed")
+                self.missed += missed
+                self.schedule.reset(self.clock())
+                self._deadline = self.schedule.next_deadline()
+                continue
+            reason = self._inactive()
+            if reason:
+                if not self._suspend(reason, stop_event):
+                    return False
+                self._restart = True
+                continue
+            SCHEDULE_LAG.observe(max(late, 0))
+            DEADLINES.inc(1, "taken")
+            self.taken += 1
+            self._deadline = self.schedule.next_deadline()
+            return True
+
+    def close(self):
+        self.activity.close()
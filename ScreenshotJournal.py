@@ -0,0 +1,87 @@
+import json
+import logging
+import pathlib
+
+log = logging.getLogger(__name__)
+
+
+class ScreenshotJournal:
+    """Read-only view of a day folder written by the JSON/journal versions.
+
+    ``screenshots.json`` holds the last compacted state and
+    ``screenshots.journal`` the captures, classifications and discards made
+    since, one JSON record per line. The entries are the journal replayed on
+    top of the snapshot; a torn final line from a crash is ignored. Nothing
+    in the folder is created or modified, the store only imports from it.
+    """
+
+    SNAPSHOT_NAME = "screenshots.json"
+    JOURNAL_NAME = "screenshots.journal"
+
+    def __init__(self, save_path, day):
+        self.save_path = pathlib.Path(save_path)
+        self.day = day
+        self.snapshot_path = self.save_path / self.SNAPSHOT_NAME
+        self.journal_path = self.save_path / self.JOURNAL_NAME
+        self._entries = {}  # filename -> entry, in capture order
+        self.load()
+
+    def load(self):
+        self._entries = {}
+        for entry in self._read_snapshot().get("screenshots", []):
+            self._entries[entry["filename"]] = entry
+
+        try:
+            f = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    log.warning(f"Ignoring incomplete journal tail in {self.journal_path}")
+                    break  # torn write from a crash
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    log.warning(f"Ignoring unreadable journal tail in {self.journal_path}")
+                    break
+                self._apply(record)
+
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return {"day": self.day, "screenshots": []}
+        try:
+            # Older versions rewrote the file in place without truncating, so
+            # only trust the first JSON document in it.
+            data, _ = json.JSONDecoder().raw_decode(text.lstrip())
+            return data
+        except ValueError as e:
+            log.error(f"Error reading {self.snapshot_path}: {e}")
+            return {"day": self.day, "screenshots": []}
+
+    def _apply(self, record):
+        op = record.get("op")
+        filename = record.get("filename")
+        if op == "add":
+            self._entries[filename] = dict(record["entry"])
+        elif op == "classify":
+            if filename in self._entries:
+                self._entries[filename]["classification"] = record["classification"]
+        elif op == "delete":
+            self._entries.pop(filename, None)
+
+    def snapshot(self):
+        return {
+            "day": self.day,
+            "screenshots": [dict(entry) for entry in self._entries.values()],
+        }
+
+    def get(self, filename):
+        entry = self._entries.get(filename)
+        return dict(entry) if entry is not None else None
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,573 @@
+import atexit
+import logging
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from Metrics import QUEUE_DEPTH, STAGE_SECONDS
+from ScreenshotJournal import ScreenshotJournal
+
+log = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS screenshots (
+    day            TEXT NOT NULL,
+    filename       TEXT NOT NULL,
+    timestamp      TEXT NOT NULL,
+    classification TEXT NOT NULL DEFAULT 'none',
+    PRIMARY KEY (day, filename)
+);
+CREATE INDEX IF NOT EXISTS idx_screenshots_timestamp ON screenshots (timestamp);
+CREATE INDEX IF NOT EXISTS idx_screenshots_classification ON screenshots (classification, timestamp);
+
+CREATE TABLE IF NOT EXISTS imported_days (
+    day         TEXT PRIMARY KEY,
+    imported_at REAL NOT NULL
+);
+
+-- Per-day, per-hour counts kept current by triggers, so long-range views
+-- never touch the screenshots table
+CREATE TABLE IF NOT EXISTS hourly_rollups (
+    day      TEXT NOT NULL,
+    hour     INTEGER NOT NULL,
+    on_task  INTEGER NOT NULL DEFAULT 0,
+    off_task INTEGER NOT NULL DEFAULT 0,
+    none     INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, hour)
+);
+
+CREATE TRIGGER IF NOT EXISTS rollup_insert AFTER INSERT ON screenshots BEGIN
+    INSERT OR IGNORE INTO hourly_rollups (day, hour)
+        VALUES (NEW.day, CAST(substr(NEW.timestamp, 12, 2) AS INTEGER));
+    UPDATE hourly_rollups SET
+        on_task  = on_task  + (NEW.classification = 'on-task'),
+        off_task = off_task + (NEW.classification = 'off-task'),
+        none     = none     + (NEW.classification NOT IN ('on-task', 'off-task'))
+    WHERE day = NEW.day AND hour = CAST(substr(NEW.timestamp, 12, 2) AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_delete AFTER DELETE ON screenshots BEGIN
+    UPDATE hourly_rollups SET
+        on_task  = on_task  - (OLD.classification = 'on-task'),
+        off_task = off_task - (OLD.classification = 'off-task'),
+        none     = none     - (OLD.classification NOT IN ('on-task', 'off-task'))
+    WHERE day = OLD.day AND hour = CAST(substr(OLD.timestamp, 12, 2) AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_update AFTER UPDATE OF classification ON screenshots BEGIN
+    UPDATE hourly_rollups SET
+        on_task  = on_task  - (OLD.classification = 'on-task')  + (NEW.classification = 'on-task'),
+        off_task = off_task - (OLD.classification = 'off-task') + (NEW.classification = 'off-task'),
+        none     = none     - (OLD.classification NOT IN ('on-task', 'off-task'))
+                            + (NEW.classification NOT IN ('on-task', 'off-task'))
+    WHERE day = NEW.day AND hour = CAST(substr(NEW.timestamp, 12, 2) AS INTEGER);
+END;
+
+-- Bumped whenever a day's screenshots or classifications change, so caches
+-- derived from a day can tell whether they are still current
+CREATE TABLE IF NOT EXISTS day_versions (
+    day     TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS version_insert AFTER INSERT ON screenshots BEGIN
+    INSERT OR IGNORE INTO day_versions (day) VALUES (NEW.day);
+    UPDATE day_versions SET version = version + 1 WHERE day = NEW.day;
+END;
+
+CREATE TRIGGER IF NOT EXISTS version_delete AFTER DELETE ON screenshots BEGIN
+    UPDATE day_versions SET version = version + 1 WHERE day = OLD.day;
+END;
+
+CREATE TRIGGER IF NOT EXISTS version_update AFTER UPDATE OF classification ON screenshots BEGIN
+    UPDATE day_versions SET version = version + 1 WHERE day = NEW.day;
+END;
+"""
+
+SCHEMA_VERSION = 2  # 1: hourly_rollups, 2: day_versions
+
+# Optional per-entry fields, added to older databases on open
+ENTRY_COLUMNS = {
+    "width": "INTEGER",       # captured screen size, before pixelation
+    "height": "INTEGER",
+    "pixel_size": "INTEGER",
+    "pending": "INTEGER",     # 1 until someone has reviewed the capture
+    "image": "TEXT",          # file shown for this entry when it reuses an earlier, identical frame
+    "feature_row": "INTEGER", # row in the SuggestionIndex feature file, -1 if the image was unreadable
+}
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# PRAGMA synchronous levels; with WAL, "normal" only fsyncs at checkpoints and
+# "full" fsyncs every commit
+SYNC_MODES = ("off", "normal", "full", "extra")
+
+_FLUSH = object()  # writer queue marker: commit now
+_STOP = None       # writer queue marker: commit and exit
+
+
+def timestamp_from_filename(filename):
+    # screenshot_YYYYmmdd_HHMMSS.png -> "YYYY-mm-dd HH:MM:SS"
+    stem = pathlib.Path(filename).stem.replace("screenshot_", "")
+    return datetime.strptime(stem, "%Y%m%d_%H%M%S").strftime(TIMESTAMP_FORMAT)
+
+
+def image_name(entry):
+    # Entries deduplicated against an earlier frame point at that frame's file
+    return entry.get("image") or entry["filename"]
+
+
+def time_label_from_filename(filename):
+    # screenshot_YYYYmmdd_HHMMSS.png -> "3:15 PM (2025/01/02)", as shown in dialogs
+    stem = pathlib.Path(filename).stem.replace("screenshot_", "")
+    return datetime.strptime(stem, "%Y%m%d_%H%M%S").strftime("%-I:%M %p (%Y/%m/%d)")
+
+
+class ScreenshotStore:
+    """SQLite index of every screenshot across all days in ``save_dir``.
+
+    One database replaces the per-day ``screenshots.json`` files. Existing day
+    folders are imported once; after that, loading a day or answering a
+    question about a month is an indexed query instead of parsing files.
+
+    Every mutation is queued to a single writer thread, which gathers what
+    arrives within ``flush_interval`` seconds and commits it as one
+    transaction. Each mutation runs in its own savepoint, so one bad write
+    is rolled back without losing the rest of the batch. ``sync`` sets how
+    often SQLite fsyncs (see ``SYNC_MODES``). Queries flush pending writes
+    first, so a reader always sees what was written before it; ``flush()``
+    waits for everything queued so far and ``close()`` flushes before
+    closing.
+    """
+
+    DB_NAME = "panopticon.db"
+
+    def __init__(self, save_dir, flush_interval=0.5, sync="normal"):
+        self.save_dir = pathlib.Path(save_dir)
+        self.save_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.save_dir / self.DB_NAME
+        if sync not in SYNC_MODES:
+            log.warning(f"Unknown store sync mode {sync!r}, using normal")
+            sync = "normal"
+        self.flush_interval = flush_interval
+        self.sync = sync
+
+        # One connection shared by the writer and every reader, serialized here
+        self._lock = threading.RLock()
+        # The GUI and the daemon may both have the database open; wait out
+        # the other's write transactions instead of failing
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={sync.upper()}")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn.commit()
+
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._run_writer, name="store-writer", daemon=True)
+        self._writer.start()
+
+    def _migrate(self):
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(screenshots)")}
+        for column, sql_type in ENTRY_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE screenshots ADD COLUMN {column} {sql_type}")
+
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_screenshots_pending ON screenshots (timestamp) WHERE pending = 1"
+        )
+
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._rebuild_rollups()
+        if version < 2:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO day_versions (day, version) SELECT DISTINCT day, 1 FROM screenshots"
+            )
+        if version < SCHEMA_VERSION:
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _rebuild_rollups(self):
+        # Backfill for databases created before the rollup triggers existed
+        self._conn.execute("DELETE FROM hourly_rollups")
+        self._conn.execute(
+            "INSERT INTO hourly_rollups (day, hour, on_task, off_task, none) "
+            "SELECT day, CAST(substr(timestamp, 12, 2) AS INTEGER) AS hour, "
+            "SUM(classification = 'on-task'), SUM(classification = 'off-task'), "
+            "SUM(classification NOT IN ('on-task', 'off-task')) "
+            "FROM screenshots GROUP BY day, hour"
+        )
+
+    def close(self):
+        if self._writer.is_alive():
+            self._writes.put(_STOP)
+            self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+    # --- writer ----------------------------------------------------------
+
+    def _submit(self, write):
+        # write(conn) runs later on the writer thread, inside a transaction
+        self._writes.put(write)
+        QUEUE_DEPTH.set(self._writes.qsize(), "store_writes")
+
+    def _execute(self, sql, params=()):
+        self._submit(lambda conn: conn.execute(sql, params))
+
+    def _executemany(self, sql, rows):
+        rows = list(rows)
+        if rows:
+            self._submit(lambda conn: conn.executemany(sql, rows))
+
+    def flush(self):
+        # Commit everything queued so far and wait for it
+        if self._writer.is_alive() and self._writes.unfinished_tasks:
+            self._writes.put(_FLUSH)
+            self._writes.join()
+
+    def _run_writer(self):
+        while True:
+            batch = [self._writes.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not _FLUSH and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._writes.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._commit([write for write in batch if write is not _FLUSH and write is not _STOP])
+            except Exception as e:  # the writer must outlive any one batch
+                log.error(f"Store commit failed, {len(batch)} writes lost: {e}")
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+            QUEUE_DEPTH.set(self._writes.qsize(), "store_writes")
+            if batch[-1] is _STOP:
+                return
+
+    def _commit(self, writes):
+        if not writes:
+            return
+        with self._lock, STAGE_SECONDS.time("index_commit"):
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")  # take the write lock up front, under the timeout
+                for write in writes:
+                    self._conn.execute("SAVEPOINT write")
+                    try:
+                        write(self._conn)
+                    except Exception as e:  # a bad entry costs only its own write
+                        log.error(f"Store write failed, skipped: {e}")
+                        self._conn.execute("ROLLBACK TO write")
+                    self._conn.execute("RELEASE write")
+                self._conn.commit()
+            except Exception as e:
+                log.error(f"Store commit failed, {len(writes)} writes lost: {e}")
+                self._conn.rollback()
+
+    def _query(self, sql, params=()):
+        self.flush()  # read your own writes
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # --- mutations -------------------------------------------------------
+
+    def add(self, day, entry):
+        columns = ["day", "filename", "timestamp", "classification"] + list(ENTRY_COLUMNS)
+        values = [day, entry["filename"], timestamp_from_filename(entry["filename"]),
+                  entry.get("classification", "none")] + [entry.get(c) for c in ENTRY_COLUMNS]
+        # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete
+        # would bypass the rollup triggers
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns[2:])
+        self._execute(
+            f"INSERT INTO screenshots ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT (day, filename) DO UPDATE SET {updates}",
+            values,
+        )
+
+    def classify(self, day, filename, classification):
+        # Any explicit answer, including "none", counts as reviewed
+        self._execute(
+            "UPDATE screenshots SET classification = ?, pending = NULL WHERE day = ? AND filename = ?",
+            (classification, day, filename),
+        )
+
+    def delete(self, day, filename):
+        self._execute("DELETE FROM screenshots WHERE day = ? AND filename = ?", (day, filename))
+
+    def classify_many(self, rows):
+        # rows: [(classification, day, filename)], written in one transaction
+        self._executemany(
+            "UPDATE screenshots SET classification = ?, pending = NULL WHERE day = ? AND filename = ?", rows
+        )
+
+    def delete_many(self, keys):
+        # keys: [(day, filename)]
+        self._executemany("DELETE FROM screenshots WHERE day = ? AND filename = ?", keys)
+
+    def set_feature_rows(self, rows):
+        # rows: [(feature_row, day, filename)]
+        self._executemany("UPDATE screenshots SET feature_row = ? WHERE day = ? AND filename = ?", rows)
+
+    # --- per-day access --------------------------------------------------
+
+    def day(self, day):
+        return DayIndex(self, day)
+
+    def get(self, day, filename):
+        rows = self._query(
+            f"SELECT {ENTRY_SELECT} FROM screenshots WHERE day = ? AND filename = ?",
+            (day, filename),
+        )
+        return _entry(rows[0]) if rows else None
+
+    def day_entries(self, day):
+        rows = self._query(
+            f"SELECT {ENTRY_SELECT} FROM screenshots WHERE day = ? ORDER BY timestamp",
+            (day,),
+        )
+        return [_entry(row) for row in rows]
+
+    def pending_entries(self):
+        # [(day, entry)] for captures nobody has reviewed yet, oldest first
+        rows = self._query(
+            f"SELECT day, {ENTRY_SELECT} FROM screenshots WHERE pending = 1 ORDER BY timestamp"
+        )
+        return [(row["day"], _entry(row, skip=("day",))) for row in rows]
+
+    def unclassified_entries(self, start_day=None, end_day=None):
+        # [(day, entry)] still classified "none", oldest first; days inclusive
+        clauses, params = ["classification = 'none'"], []
+        if start_day is not None:
+            clauses.append("day >= ?")
+            params.append(str(start_day))
+        if end_day is not None:
+            clauses.append("day <= ?")
+            params.append(str(end_day))
+        rows = self._query(
+            f"SELECT day, {ENTRY_SELECT} FROM screenshots WHERE {' AND '.join(clauses)} ORDER BY timestamp",
+            params,
+        )
+        return [(row["day"], _entry(row, skip=("day",))) for row in rows]
+
+    def entries_without_features(self):
+        # [(day, entry)] not yet in the suggestion index
+        rows = self._query(
+            f"SELECT day, {ENTRY_SELECT} FROM screenshots WHERE feature_row IS NULL ORDER BY timestamp"
+        )
+        return [(row["day"], _entry(row, skip=("day",))) for row in rows]
+
+    def image_in_use(self, day, image):
+        rows = self._query(
+            "SELECT 1 FROM screenshots WHERE day = ? AND (image = ? OR (filename = ? AND image IS NULL)) LIMIT 1",
+            (day, image, image),
+        )
+        return bool(rows)
+
+    def days(self):
+        return [row["day"] for row in self._query("SELECT DISTINCT day FROM screenshots ORDER BY day")]
+
+    # --- queries ---------------------------------------------------------
+    # start/end are datetimes or "YYYY-mm-dd[ HH:MM:SS]" strings; end is exclusive.
+
+    @staticmethod
+    def _range_clause(start, end):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_as_timestamp(start))
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(_as_timestamp(end))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def screenshots_between(self, start=None, end=None, classification=None):
+        where, params = self._range_clause(start, end)
+        if classification is not None:
+            where += (" AND" if where else " WHERE") + " classification = ?"
+            params.append(classification)
+        rows = self._query(
+            "SELECT day, filename, timestamp, classification FROM screenshots"
+            + where + " ORDER BY timestamp",
+            params,
+        )
+        return [dict(row) for row in rows]
+
+    def counts_by_class(self, start=None, end=None):
+        where, params = self._range_clause(start, end)
+        rows = self._query(
+            "SELECT classification, COUNT(*) AS n FROM screenshots" + where + " GROUP BY classification",
+            params,
+        )
+        counts = {"on-task": 0, "off-task": 0, "none": 0}
+        for row in rows:
+            counts[row["classification"]] = row["n"]
+        return counts
+
+    def hourly_counts(self, start=None, end=None):
+        # {"YYYY-mm-dd HH": {"on-task": n, "off-task": n, "none": n}}
+        where, params = self._range_clause(start, end)
+        rows = self._query(
+            "SELECT substr(timestamp, 1, 13) AS hour, classification, COUNT(*) AS n "
+            "FROM screenshots" + where + " GROUP BY hour, classification ORDER BY hour",
+            params,
+        )
+        buckets = {}
+        for row in rows:
+            bucket = buckets.setdefault(row["hour"], {"on-task": 0, "off-task": 0, "none": 0})
+            bucket[row["classification"]] = row["n"]
+        return buckets
+
+    # --- rollups ---------------------------------------------------------
+    # start_day/end_day are "YYYY-mm-dd" strings or dates; end_day is inclusive.
+
+    def daily_rollups(self, start_day, end_day):
+        # {"YYYY-mm-dd": (on_task, off_task, none)}
+        rows = self._query(
+            "SELECT day, SUM(on_task) AS on_task, SUM(off_task) AS off_task, SUM(none) AS none "
+            "FROM hourly_rollups WHERE day BETWEEN ? AND ? GROUP BY day",
+            (str(start_day), str(end_day)),
+        )
+        return {row["day"]: (row["on_task"], row["off_task"], row["none"]) for row in rows}
+
+    def hourly_rollups(self, start_day, end_day):
+        # {("YYYY-mm-dd", hour): (on_task, off_task, none)}
+        rows = self._query(
+            "SELECT day, hour, on_task, off_task, none FROM hourly_rollups "
+            "WHERE day BETWEEN ? AND ?",
+            (str(start_day), str(end_day)),
+        )
+        return {(row["day"], row["hour"]): (row["on_task"], row["off_task"], row["none"]) for row in rows}
+
+    def day_versions(self, start_day, end_day):
+        # {"YYYY-mm-dd": version}; a day's version changes with any edit to it
+        rows = self._query(
+            "SELECT day, version FROM day_versions WHERE day BETWEEN ? AND ?",
+            (str(start_day), str(end_day)),
+        )
+        return {row["day"]: row["version"] for row in rows}
+
+    def day_range_rows(self, start_day, end_day):
+        # (day, timestamp, classification) tuples for a range of days, in time order
+        rows = self._query(
+            "SELECT day, timestamp, classification FROM screenshots "
+            "WHERE day BETWEEN ? AND ? ORDER BY timestamp",
+            (str(start_day), str(end_day)),
+        )
+        return [tuple(row) for row in rows]
+
+    # --- import ----------------------------------------------------------
+
+    def import_day_folders(self):
+        # One-time import of day folders written by the JSON/journal versions
+        imported = {row["day"] for row in self._query("SELECT day FROM imported_days")}
+        count = 0
+        for day_path in sorted(self.save_dir.iterdir()):
+            day = day_path.name
+            if day in imported or not day_path.is_dir():
+                continue
+            if not any((day_path / name).exists() for name in
+                       (ScreenshotJournal.SNAPSHOT_NAME, ScreenshotJournal.JOURNAL_NAME)):
+                continue
+            entries = ScreenshotJournal(day_path, day).snapshot()["screenshots"]
+            rows = []
+            for entry in entries:
+                try:
+                    rows.append((day, entry["filename"], timestamp_from_filename(entry["filename"]),
+                                 entry.get("classification", "none")))
+                except (KeyError, ValueError) as e:
+                    log.warning(f"Skipping unreadable entry in {day}: {e}")
+            self._submit(lambda conn, day=day, rows=rows: self._import_day(conn, day, rows))
+            count += len(rows)
+            log.info(f"Imported {len(rows)} screenshots from {day_path}")
+        self.flush()
+        return count
+
+    @staticmethod
+    def _import_day(conn, day, rows):
+        # One write, so a day is never marked imported without its rows
+        conn.executemany(
+            "INSERT OR IGNORE INTO screenshots (day, filename, timestamp, classification) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute("INSERT INTO imported_days (day, imported_at) VALUES (?, ?)", (day, time.time()))
+
+
+class DayIndex:
+    """One day's view of the store, used wherever a single day is edited."""
+
+    def __init__(self, store, day):
+        self.store = store
+        self.day = day
+
+    def add(self, entry):
+        self.store.add(self.day, entry)
+
+    def classify(self, filename, classification):
+        self.store.classify(self.day, filename, classification)
+
+    def delete(self, filename):
+        self.store.delete(self.day, filename)
+
+    def get(self, filename):
+        return self.store.get(self.day, filename)
+
+    def image_in_use(self, image):
+        return self.store.image_in_use(self.day, image)
+
+    def snapshot(self):
+        return {"day": self.day, "screenshots": self.store.day_entries(self.day)}
+
+
+ENTRY_SELECT = ", ".join(["filename", "classification"] + list(ENTRY_COLUMNS))
+
+
+def _entry(row, skip=()):
+    # Row -> entry dict in the old JSON shape, leaving out unset optional fields
+    return {key: row[key] for key in row.keys() if row[key] is not None and key not in skip}
+
+
+def _as_timestamp(value):
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    return str(value)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(save_dir, **options):
+    # One store per save directory; legacy day folders are imported on first
+    # open. options (flush_interval, sync) only apply to that first open.
+    key = pathlib.Path(save_dir).resolve()
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = ScreenshotStore(save_dir, **options)
+            store.import_day_folders()
+            _stores[key] = store
+        return store
+
+
+def flush_stores():
+    with _stores_lock:
+        for store in _stores.values():
+            store.flush()
+
+
+def close_stores():
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
+
+
+# The writer is a daemon thread; make sure queued writes land on exit
+atexit.register(close_stores)
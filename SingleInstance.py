@@ -1,22 +1,234 @@
+"""One running instance per user and kind, and a control socket to talk to it.
+
+The GUI (``panopticon``) and the headless daemon (``panopticon-daemon``) may
+run side by side; only one of them captures at a time, see CaptureLock.
+Each instance holds an exclusive lock on ``<socket>.lock`` and listens on a
+Unix-domain socket next to it. Each connection sends one JSON line,
+``{"command": ..., "args": [...]}``, and reads one JSON line back,
+``{"ok": true, "result": ...}`` or ``{"ok": false, "error": ...}``.
+``send_command`` is the client side; it needs nothing beyond the standard
+library, so control scripts start in milliseconds.
+"""
+import fcntl
+import json
+import logging
+import os
 import socket
+import stat
+import struct
+import tempfile
+import threading
+import time
 from typing import Optional
 
+log = logging.getLogger(__name__)
+
+
+# The client waits longer than handlers may take, so a slow instance still
+# gets its error back to the client instead of both sides timing out
+CLIENT_TIMEOUT = 5
+HANDLER_TIMEOUT = 3.5
+
+
 class SingleInstanceException(Exception):
     pass
 
+
+class NotRunning(ConnectionError):
+    pass
+
+
+def runtime_dir():
+    # $XDG_RUNTIME_DIR is private to the user already
+    path = os.environ.get("XDG_RUNTIME_DIR")
+    if path and os.path.isdir(path):
+        return path
+    # Elsewhere use our own 0700 directory; anyone can pre-create names in
+    # /tmp, so refuse one that is not ours rather than trusting it
+    path = os.path.join(tempfile.gettempdir(), f"panopticon-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise SingleInstanceException(f"{path} is not a private directory owned by this user; remove it")
+    return path
+
+
+def socket_path(name="panopticon"):
+    return os.path.join(runtime_dir(), f"{name}.sock")
+
+
 class SingleInstance:
-    def __init__(self, port: int = 47588):
-        self.lock_socket: Optional[socket.socket] = None
-        self.port = port
+    """Instance lock plus control server, as a context manager.
+
+    ``handler(command, args)`` runs on the socket thread for every request
+    and returns something JSON-serializable; exceptions it raises are sent
+    back as errors. Without a handler the socket answers every command
+    with an error, and still marks the instance as running.
+    """
+
+    def __init__(self, handler=None, path=None, name="panopticon"):
+        self.handler = handler
+        self.name = name
+        self.path = path
+        self._lock_file = None
+        self._server: Optional[socket.socket] = None
+        self._thread = None
 
     def __enter__(self):
+        self.path = self.path or socket_path(self.name)
+        try:
+            self._lock_file = open(self.path + ".lock", "a")
+        except PermissionError:
+            raise SingleInstanceException(f"Cannot open {self.path}.lock; it belongs to someone else")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise SingleInstanceException(f"Another {self.name} is already running; control it with PanopticonCtl.py")
+
+        # Holding the lock means any socket file left behind is stale
         try:
-            self.lock_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            self.lock_socket.bind(('localhost', self.port))
-            return self
-        except socket.error:
-            raise SingleInstanceException("Another instance is already running")
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        except PermissionError:
+            self.__exit__(None, None, None)
+            raise SingleInstanceException(f"Cannot replace {self.path}; it belongs to someone else")
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)  # owner-only from the moment it exists
+        try:
+            self._server.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        self._server.listen(8)
+        self._thread = threading.Thread(target=self._serve, name="control-socket", daemon=True)
+        self._thread.start()
+        return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        if self.lock_socket:
-            self.lock_socket.close()
\ No newline at end of file
+        if self._server:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)  # wakes the accept() below
+            except OSError:
+                pass
+            self._server.close()
+            self._thread.join(timeout=1)
+            self._server = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        if self._lock_file:
+            self._lock_file.close()  # releases the lock
+            self._lock_file = None
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return  # closed by __exit__
+            with conn:
+                try:
+                    self._handle(conn)
+                except Exception as e:  # one bad client must not stop the server
+                    log.warning(f"Control request failed: {e}")
+
+    def _handle(self, conn):
+        conn.settimeout(CLIENT_TIMEOUT)
+        if hasattr(socket, "SO_PEERCRED"):
+            _, uid, _ = struct.unpack("3i", conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")))
+            if uid != os.getuid():
+                return
+        command = args = None
+        try:
+            request = json.loads(conn.makefile("rb").readline())
+            if not isinstance(request, dict) or not isinstance(request.get("command"), str):
+                raise ValueError("expected {\"command\": ..., \"args\": [...]}")
+            command, args = request["command"], request.get("args", [])
+            if not isinstance(args, list):
+                raise ValueError("args must be a list")
+            if self.handler is None:
+                raise ValueError("this instance takes no commands")
+            response = {"ok": True, "result": self.handler(command, args)}
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        log.debug(f"Control command {command} {args}: {response}")
+        conn.sendall(json.dumps(response, default=str).encode() + b"\n")
+
+
+class CaptureLock:
+    """Held by whichever instance is capturing, GUI or daemon.
+
+    Two processes writing captures into the same store would race on file
+    names and the day's entries; the one that does not hold this lock only
+    reviews what the other captures.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._file = None
+
+    def acquire(self, wait=0.5):
+        # Retries for up to ``wait`` seconds, which covers another instance
+        # briefly taking the lock in held_elsewhere()
+        if self._file:
+            return
+        try:
+            self._file = open(self.path or os.path.join(runtime_dir(), "capture.lock"), "a")
+        except PermissionError:
+            raise SingleInstanceException("Cannot open the capture lock; it belongs to someone else")
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    self.release()
+                    raise SingleInstanceException("Another instance is already capturing")
+                time.sleep(0.05)
+
+    def release(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def held(self):
+        return self._file is not None
+
+    def held_elsewhere(self):
+        if self._file:
+            return False
+        try:
+            self.acquire(wait=0)
+        except SingleInstanceException:
+            return True
+        self.release()
+        return False
+
+
+def send_command(command, args=(), path=None, timeout=CLIENT_TIMEOUT, name="panopticon"):
+    """Send one command to the running instance and return its result.
+
+    Raises NotRunning if no instance is listening and RuntimeError with the
+    instance's message if the command failed.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(timeout)
+        try:
+            conn.connect(path or socket_path(name))
+        except (FileNotFoundError, ConnectionRefusedError, SingleInstanceException):
+            raise NotRunning(f"{name} is not running")
+        conn.sendall(json.dumps({"command": command, "args": list(args)}).encode() + b"\n")
+        line = conn.makefile("rb").readline()
+    if not line:
+        raise RuntimeError("no response from the running instance")
+    response = json.loads(line)
+    if not response["ok"]:
+        raise RuntimeError(response["error"])
+    return response["result"]
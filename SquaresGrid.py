@@ -0,0 +1,229 @@
+import math
+import tkinter as tk
+
+from Metrics import STAGE_SECONDS
+
+
+class SquaresGrid(tk.Canvas):
+    """Grid of coloured squares drawn on a single canvas.
+
+    Each cell is one canvas polygon instead of one widget. Only the rows in
+    view are drawn, clicks are mapped to cells from their coordinates, and
+    recolouring a cell touches that one item. When the cells no longer fit
+    at ``min_cell`` pixels, the grid switches to fixed-size cells and scrolls
+    vertically.
+
+    Changes are coalesced into one layout pass when Tk is next idle. The full
+    grid is only redrawn when the computed (cols, rows, cell) changes;
+    otherwise just the cells from the first changed position onward are drawn.
+    Window resizes are debounced by ``resize_delay`` ms.
+    """
+
+    def __init__(self, parent, on_click, min_cell=24, pad=3, bg="#2B2B2B", resize_delay=80, **kwargs):
+        super().__init__(parent, bg=bg, highlightthickness=0, borderwidth=0, **kwargs)
+        self.on_click = on_click
+        self.min_cell = min_cell
+        self.pad = pad
+
+        self._keys = []     # cell order
+        self._index = {}    # key -> position
+        self._colors = {}   # key -> (fg, hover)
+        self._items = {}    # position -> canvas item, for drawn cells only
+        self._hover = None  # position under the pointer
+        self._cols, self._rows, self._cell, self._x0 = 1, 1, min_cell, 0
+
+        self.resize_delay = resize_delay
+        self._flush_job = None    # pending idle layout pass
+        self._resize_job = None   # pending debounced resize
+        self._dirty_from = None   # first position that needs drawing
+        self._full_layout = True  # next pass must recompute everything
+
+        self.bind("<Configure>", self._on_configure)
+        self.bind("<Button-1>", self._on_click)
+        self.bind("<Motion>", self._on_motion)
+        self.bind("<Leave>", lambda e: self._set_hover(None))
+        self.bind("<MouseWheel>", lambda e: self._scroll(-1 if e.delta > 0 else 1))
+        self.bind("<Button-4>", lambda e: self._scroll(-1))
+        self.bind("<Button-5>", lambda e: self._scroll(1))
+
+    # --- cells -----------------------------------------------------------
+
+    def set_cells(self, cells):
+        # cells: iterable of (key, fg, hover)
+        self._keys = []
+        self._index = {}
+        self._colors = {}
+        for key, fg, hover in cells:
+            self._index[key] = len(self._keys)
+            self._keys.append(key)
+            self._colors[key] = (fg, hover)
+        self._full_layout = True
+        self._schedule_flush()
+
+    def add_cell(self, key, fg, hover):
+        self._index[key] = len(self._keys)
+        self._keys.append(key)
+        self._colors[key] = (fg, hover)
+        self._mark_dirty(len(self._keys) - 1)
+
+    def update_cell(self, key, fg, hover):
+        self._colors[key] = (fg, hover)
+        pos = self._index[key]
+        item = self._items.get(pos)
+        if item is not None:
+            self.itemconfigure(item, fill=hover if pos == self._hover else fg)
+
+    def remove_cell(self, key):
+        pos = self._index.pop(key)
+        del self._keys[pos]
+        del self._colors[key]
+        for later in self._keys[pos:]:
+            self._index[later] -= 1
+        self._mark_dirty(pos)
+
+    def __len__(self):
+        return len(self._keys)
+
+    # --- layout scheduling -----------------------------------------------
+
+    def _mark_dirty(self, pos):
+        if self._dirty_from is None or pos < self._dirty_from:
+            self._dirty_from = pos
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_job is None:
+            self._flush_job = self.after_idle(self._flush)
+
+    def _on_configure(self, event):
+        if self._resize_job is not None:
+            self.after_cancel(self._resize_job)
+        self._resize_job = self.after(self.resize_delay, self._on_resize_settled)
+
+    def _on_resize_settled(self):
+        self._resize_job = None
+        self._full_layout = True
+        self._flush()
+
+    def _flush(self):
+        if self._flush_job is not None:
+            self.after_cancel(self._flush_job)
+            self._flush_job = None
+        width, height = self.winfo_width(), self.winfo_height()
+        if width <= 1 or height <= 1:
+            return  # not mapped yet; the first <Configure> lays out
+        with STAGE_SECONDS.time("grid_render"):
+            layout = self.compute_layout(len(self._keys), width, height)
+            if self._full_layout or layout != (self._cols, self._rows, self._cell):
+                self.relayout()
+            elif self._dirty_from is not None:
+                self._redraw_from(self._dirty_from)
+        self._dirty_from = None
+
+    # --- layout and drawing ----------------------------------------------
+
+    def compute_layout(self, total, width, height):
+        # Same shape as before (at least 4×4, roughly square); switch to
+        # scrolling rows of min_cell squares once the cells get too small
+        mod_total = max(16, total)
+        cols = math.ceil(math.sqrt(mod_total))
+        rows = math.ceil(mod_total / cols)
+        cell = min(width // cols, height // rows)
+        if cell < self.min_cell:
+            cell = self.min_cell
+            cols = max(width // cell, 1)
+            rows = math.ceil(total / cols)
+        return cols, rows, cell
+
+    def relayout(self):
+        width, height = self.winfo_width(), self.winfo_height()
+        if width <= 1 or height <= 1:
+            return  # not mapped yet; <Configure> will call again
+        self._cols, self._rows, self._cell = self.compute_layout(len(self._keys), width, height)
+        self._x0 = (width - self._cols * self._cell) // 2
+        self.configure(scrollregion=(0, 0, width, max(self._rows * self._cell, height)),
+                       yscrollincrement=self._cell)
+        self._full_layout = False
+        self._dirty_from = None
+        self.redraw()
+
+    def _visible_range(self):
+        top = self.canvasy(0)
+        first_row = max(int(top // self._cell), 0)
+        last_row = int((top + self.winfo_height()) // self._cell)
+        return first_row * self._cols, min((last_row + 1) * self._cols, len(self._keys))
+
+    def redraw(self):
+        self.delete("cell")
+        self._items = {}
+        self._hover = None
+        first, last = self._visible_range()
+        for pos in range(first, last):
+            self._draw_cell(pos)
+
+    def _redraw_from(self, start):
+        # Positions before start are unchanged; everything after may have shifted
+        for pos in [p for p in self._items if p >= start]:
+            self.delete(self._items.pop(pos))
+        if self._hover is not None and self._hover >= start:
+            self._hover = None
+        first, last = self._visible_range()
+        for pos in range(max(first, start), last):
+            self._draw_cell(pos)
+
+    def _draw_cell(self, pos):
+        r, c = divmod(pos, self._cols)
+        size = self._cell
+        x0 = self._x0 + c * size + self.pad
+        y0 = r * size + self.pad
+        x1 = x0 + max(size - 2 * self.pad, 1)
+        y1 = y0 + max(size - 2 * self.pad, 1)
+        fg, _ = self._colors[self._keys[pos]]
+        self._items[pos] = self.create_polygon(
+            _rounded_rect(x0, y0, x1, y1, int(size * 0.25)),
+            smooth=True, fill=fg, outline="", tags="cell",
+        )
+
+    def _scroll(self, units):
+        if self._rows * self._cell > self.winfo_height():
+            self.yview_scroll(units, "units")
+            self.redraw()
+
+    # --- pointer ---------------------------------------------------------
+
+    def position_at(self, x, y):
+        x = x - self._x0
+        y = self.canvasy(y)
+        if x < 0 or y < 0:
+            return None
+        c, r = int(x // self._cell), int(y // self._cell)
+        if c >= self._cols:
+            return None
+        pos = r * self._cols + c
+        return pos if pos < len(self._keys) else None
+
+    def _on_click(self, event):
+        pos = self.position_at(event.x, event.y)
+        if pos is not None:
+            self.on_click(self._keys[pos])
+
+    def _on_motion(self, event):
+        self._set_hover(self.position_at(event.x, event.y))
+
+    def _set_hover(self, pos):
+        if pos == self._hover:
+            return
+        for old, color_idx in ((self._hover, 0), (pos, 1)):
+            item = self._items.get(old)
+            if item is not None:
+                self.itemconfigure(item, fill=self._colors[self._keys[old]][color_idx])
+        self._hover = pos
+        self.configure(cursor="hand2" if pos is not None else "")
+
+
+def _rounded_rect(x0, y0, x1, y1, r):
+    # Control points for a smoothed polygon that looks like a rounded rectangle
+    r = min(r, (x1 - x0) // 2, (y1 - y0) // 2)
+    return [x0 + r, y0, x1 - r, y0, x1, y0, x1, y0 + r,
+            x1, y1 - r, x1, y1, x1 - r, y1, x0 + r, y1,
+            x0, y1, x0, y1 - r, x0, y0 + r, x0, y0]
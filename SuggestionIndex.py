@@ -0,0 +1,239 @@
+import fcntl
+import logging
+import os
+import pathlib
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+log = logging.getLogger(__name__)
+
+
+FEATURE_SIZE = (12, 8)  # block grid resampled to this many cells, RGB
+FEATURE_DIM = FEATURE_SIZE[0] * FEATURE_SIZE[1] * 3
+ROW_BYTES = FEATURE_DIM * 4
+
+# feature_row of an entry whose image could not be read; out of range, so
+# label() and suggest() ignore it, and backfill does not try it again
+NO_FEATURES = -1
+
+# Label codes stored per row; 0 means unlabeled (new, "none" or deleted)
+LABELS = {"on-task": 1, "off-task": 2}
+LABEL_NAMES = {code: name for name, code in LABELS.items()}
+
+
+def feature_vector(image):
+    """Compact, unit-length feature for a pixelated capture.
+
+    Works on the block grid straight from the capture pipeline or on a saved
+    (scaled) screenshot; both are box-resampled to ``FEATURE_SIZE``. The mean
+    is removed so overall brightness does not dominate the cosine similarity.
+    """
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    small = image.resize(FEATURE_SIZE, Image.Resampling.BOX)
+    vector = np.asarray(small, dtype=np.float32).reshape(-1)
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class SuggestionIndex:
+    """Nearest-neighbour label suggestions over every capture's features.
+
+    Features live in ``features.f32``, one float32 row per capture, appended
+    as captures are saved and memory-mapped for queries, so opening the index
+    costs nothing however many rows it holds. Labels are one byte per row in
+    ``labels.u8`` and are rewritten in place when a capture is classified.
+    Entries refer to their row through the store's ``feature_row`` column.
+
+    A query is a single matrix-vector product over all rows followed by a
+    similarity-weighted vote among the ``k`` closest labeled ones.
+
+    The GUI and the headless daemon may share one index. Appends take an
+    exclusive ``flock`` and number their rows from the file size, and every
+    call first rereads the labels, picking up rows and labels other
+    processes have written.
+    """
+
+    DIR_NAME = "suggestions"
+
+    def __init__(self, save_dir, k=9, min_labeled=20):
+        self.path = pathlib.Path(save_dir) / self.DIR_NAME
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.k = k
+        self.min_labeled = min_labeled  # no suggestions until this many examples exist
+        self._lock = threading.Lock()
+        self._features_path = self.path / "features.f32"
+        self._labels_path = self.path / "labels.u8"
+        self._lock_path = self.path / "append.lock"
+        self._labels = np.empty(0, dtype=np.uint8)
+        self._count = 0
+        self._features = None  # memmap, reopened after the file grows
+        with self._lock, self._append_lock():
+            self._features_path.touch()
+            self._labels_path.touch()
+            self._trim()
+            self._sync()
+
+    def __len__(self):
+        with self._lock:
+            self._sync()
+            return self._count
+
+    def labeled_count(self):
+        with self._lock:
+            self._sync()
+            return int(np.count_nonzero(self._labels[:self._count]))
+
+    @contextmanager
+    def _append_lock(self):
+        # Across processes; self._lock covers the threads of this one
+        with open(self._lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def _trim(self):
+        # Under the append lock nobody is mid-append, so files of different
+        # lengths mean a crash between the two appends; drop the unmatched tail
+        count = min(self._features_path.stat().st_size // ROW_BYTES, self._labels_path.stat().st_size)
+        os.truncate(self._features_path, count * ROW_BYTES)
+        os.truncate(self._labels_path, count)
+        return count
+
+    def _sync(self):
+        # Pick up rows appended and labels changed by other processes. The
+        # labels are appended last, so they bound the rows that are complete.
+        # At one byte per row, rereading them costs far less than a query,
+        # and unlike file times it cannot miss a change.
+        count = self._features_path.stat().st_size // ROW_BYTES
+        self._labels = np.fromfile(self._labels_path, dtype=np.uint8, count=count)
+        self._count = len(self._labels)
+
+    # --- updates ---------------------------------------------------------
+
+    def add(self, vector, classification=None):
+        return self.add_many([vector], [classification])[0]
+
+    def add_many(self, vectors, classifications):
+        # Appends rows and returns their numbers
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, FEATURE_DIM)
+        codes = np.array([LABELS.get(c, 0) for c in classifications], dtype=np.uint8)
+        with self._lock, self._append_lock():
+            first = self._trim()
+            with open(self._features_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._labels_path, "ab") as f:
+                f.write(codes.tobytes())
+            self._sync()
+        return list(range(first, first + len(codes)))
+
+    def label(self, row, classification):
+        # None, "none" or anything unknown takes the row out of the vote
+        code = LABELS.get(classification, 0)
+        with self._lock:
+            self._sync()
+            if row is None or not 0 <= row < self._count:
+                return
+            with open(self._labels_path, "r+b") as f:
+                f.seek(row)
+                f.write(bytes([code]))
+            self._labels[row] = code
+
+    # --- queries ---------------------------------------------------------
+
+    def vector(self, row):
+        with self._lock:
+            self._sync()
+            return np.array(self._mapped_features()[row])
+
+    def _mapped_features(self):
+        if self._features is None or len(self._features) != self._count:
+            self._features = np.memmap(self._features_path, dtype=np.float32, mode="r",
+                                       shape=(self._count, FEATURE_DIM)) if self._count else \
+                np.empty((0, FEATURE_DIM), dtype=np.float32)
+        return self._features
+
+    def suggest(self, vector=None, row=None):
+        """(classification, confidence) for a feature vector or an indexed row.
+
+        A row never votes for itself. Returns None until ``min_labeled`` rows
+        are labeled, or when no labeled neighbour is similar at all.
+        """
+        with self._lock:
+            self._sync()
+            features = self._mapped_features()
+            labels = self._labels[:self._count]
+            if vector is None:
+                if row is None or not 0 <= row < self._count:
+                    return None
+                vector = features[row]
+            labeled = labels != 0
+            if row is not None and 0 <= row < self._count:
+                labeled = labeled.copy()
+                labeled[row] = False
+            n_labeled = int(np.count_nonzero(labeled))
+            if n_labeled < self.min_labeled:
+                return None
+
+            similarity = features @ np.asarray(vector, dtype=np.float32)
+            similarity[~labeled] = -np.inf
+            k = min(self.k, n_labeled)
+            nearest = np.argpartition(similarity, -k)[-k:]
+            weights = np.maximum(similarity[nearest], 0)
+            votes = np.bincount(labels[nearest], weights=weights, minlength=len(LABEL_NAMES) + 1)
+
+        total = votes.sum()
+        if total <= 0:
+            return None
+        best = int(votes.argmax())
+        return LABEL_NAMES[best], float(votes[best] / total)
+
+    # --- backfill --------------------------------------------------------
+
+    def backfill(self, store, batch_size=500):
+        # Index captures saved before this index existed, reading their files
+        from DayPack import open_frame
+        from ScreenshotStore import image_name
+
+        missing = store.entries_without_features()
+        if not missing:
+            return 0
+        log.info(f"Indexing {len(missing)} screenshots for suggestions...")
+        done = 0
+        for start in range(0, len(missing), batch_size):
+            vectors, classifications, keys, unreadable = [], [], [], []
+            for day, entry in missing[start:start + batch_size]:
+                try:
+                    image = open_frame(store.save_dir / day / image_name(entry))
+                except (OSError, KeyError):
+                    # File gone; nothing to learn from, now or on the next launch
+                    unreadable.append((NO_FEATURES, day, entry["filename"]))
+                    continue
+                vectors.append(feature_vector(image))
+                classifications.append(entry.get("classification"))
+                keys.append((day, entry["filename"]))
+            if vectors:
+                rows = self.add_many(vectors, classifications)
+                store.set_feature_rows([(row, day, filename) for row, (day, filename) in zip(rows, keys)])
+                done += len(rows)
+            if unreadable:
+                store.set_feature_rows(unreadable)
+        log.info(f"Indexed {done} screenshots")
+        return done
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_suggestion_index(save_dir):
+    # One index per save directory, shared by the capture writer and the GUI
+    key = pathlib.Path(save_dir).resolve()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = SuggestionIndex(save_dir)
+        return index
@@ -0,0 +1,106 @@
+import logging
+import os
+import pathlib
+import threading
+from collections import OrderedDict
+
+from DayPack import open_frame
+from ImageCodec import open_image
+from Pixelation import render_pixelated
+
+log = logging.getLogger(__name__)
+
+
+THUMBNAIL_SIZE = (450, 300)  # fits the classification dialog
+
+
+class ThumbnailCache:
+    """Display-ready screenshot previews, kept in memory and on disk.
+
+    Lookups go memory LRU → ``<day>/.thumbs`` → render from the screenshot.
+    Only screenshots larger than the thumbnail (full-size frames from older
+    versions) get a disk copy; a block grid decodes faster than its own
+    upscaled thumbnail would. The LRU is bounded by ``memory_budget`` bytes
+    of decoded pixels rather than by entry count.
+    """
+
+    THUMBS_DIR = ".thumbs"
+
+    def __init__(self, size=THUMBNAIL_SIZE, memory_budget=64 * 1024 * 1024):
+        self.size = size
+        self.memory_budget = memory_budget
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # image path -> thumbnail
+        self._memory_bytes = 0
+
+    def thumb_path(self, image_path):
+        image_path = pathlib.Path(image_path)
+        return image_path.parent / self.THUMBS_DIR / (image_path.stem + ".png")
+
+    def get(self, image_path):
+        key = str(image_path)
+        with self._lock:
+            thumb = self._memory.get(key)
+            if thumb is not None:
+                self._memory.move_to_end(key)
+                return thumb
+
+        thumb_path = self.thumb_path(image_path)
+        try:
+            if os.stat(thumb_path).st_mtime >= os.stat(image_path).st_mtime:
+                thumb = open_image(thumb_path)
+        except OSError:
+            pass
+        if thumb is None:
+            thumb = self.put(image_path, open_frame(image_path))
+        else:
+            self._remember(key, thumb)
+        return thumb
+
+    def put(self, image_path, image):
+        # Render a thumbnail from an already decoded screenshot, e.g. at save time
+        thumb = render_pixelated(image, self.size)
+        if image.size[0] * image.size[1] > thumb.size[0] * thumb.size[1]:
+            thumb_path = self.thumb_path(image_path)
+            try:
+                thumb_path.parent.mkdir(exist_ok=True)
+                thumb.save(thumb_path)
+            except OSError as e:
+                log.warning(f"Could not write thumbnail {thumb_path}: {e}")
+        self._remember(str(image_path), thumb)
+        return thumb
+
+    def _remember(self, key, thumb):
+        cost = thumb.size[0] * thumb.size[1] * len(thumb.getbands())
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= old.size[0] * old.size[1] * len(old.getbands())
+            self._memory[key] = thumb
+            self._memory_bytes += cost
+            while self._memory_bytes > self.memory_budget and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.size[0] * evicted.size[1] * len(evicted.getbands())
+
+    def discard(self, image_path):
+        key = str(image_path)
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= old.size[0] * old.size[1] * len(old.getbands())
+        try:
+            self.thumb_path(image_path).unlink()
+        except FileNotFoundError:
+            pass
+
+
+_thumbnail_cache = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache():
+    global _thumbnail_cache
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache()
+        return _thumbnail_cache
@@ -0,0 +1,72 @@
+"""Compare capture backend latency, optionally on a throwaway Xvfb display.
+
+    python benchmarks/bench_capture.py --xvfb --size 3840x2160 -n 20
+"""
+import argparse
+import os
+import pathlib
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from benchstats import p95  # noqa: E402
+from CaptureBackends import BACKENDS, SyntheticBackend  # noqa: E402
+
+
+def start_xvfb(size, display=":99"):
+    if shutil.which("Xvfb") is None:
+        sys.exit("Xvfb not found")
+    w, h = size
+    proc = subprocess.Popen(["Xvfb", display, "-screen", "0", f"{w}x{h}x24", "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = display
+    time.sleep(1)
+    return proc
+
+
+def bench(backend, n):
+    backend.grab()  # warm up (connections, shm segments)
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        backend.grab()
+        times.append((time.perf_counter() - start) * 1000)
+    backend.close()
+    times.sort()
+    return statistics.median(times), p95(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=20, help="grabs per backend")
+    parser.add_argument("--size", default="1920x1080", help="screen size for Xvfb and synthetic frames")
+    parser.add_argument("--xvfb", action="store_true", help="run against a private Xvfb server")
+    parser.add_argument("--backends", nargs="*", default=list(BACKENDS))
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split("x"))
+
+    xvfb = start_xvfb(size) if args.xvfb else None
+    try:
+        print(f"{'backend':<18}{'median ms':>12}{'p95 ms':>12}")
+        for name in args.backends:
+            backend = SyntheticBackend(size) if name == SyntheticBackend.name else BACKENDS[name]()
+            if not backend.is_available():
+                print(f"{name:<18}{'unavailable':>12}")
+                continue
+            try:
+                median, p95 = bench(backend, args.n)
+            except Exception as e:
+                print(f"{name:<18}{'failed':>12}  {e}")
+                continue
+            print(f"{name:<18}{median:>12.1f}{p95:>12.1f}")
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Compare storage codecs on pixelated synthetic desktops: encode/decode time and size.
+
+    python benchmarks/bench_codec.py --sizes 1920x1080 3840x2160 --pixel-size 7
+"""
+import argparse
+import io
+import pathlib
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from CaptureBackends import SyntheticBackend  # noqa: E402
+from ImageCodec import CODECS, create_codec, open_image  # noqa: E402
+from Pixelation import block_mean  # noqa: E402
+
+
+def bench_codec(codec, frames):
+    encode, decode, sizes = [], [], []
+    for frame in frames:
+        buf = io.BytesIO()
+        start = time.perf_counter()
+        codec.save(frame, buf)
+        encode.append((time.perf_counter() - start) * 1000)
+        sizes.append(buf.tell())
+
+        buf.seek(0)
+        start = time.perf_counter()
+        open_image(buf)
+        decode.append((time.perf_counter() - start) * 1000)
+    return statistics.median(encode), statistics.median(decode), statistics.mean(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=20, help="frames per resolution")
+    parser.add_argument("--sizes", nargs="*", default=["1920x1080", "2560x1440", "3840x2160"])
+    parser.add_argument("--pixel-size", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'resolution':<12}{'codec':<14}{'encode ms':>11}{'decode ms':>11}{'bytes/frame':>13}")
+    for size_arg in args.sizes:
+        size = tuple(int(v) for v in size_arg.split("x"))
+        source = SyntheticBackend(size)
+        frames = [block_mean(source.grab(), args.pixel_size) for _ in range(args.n)]
+        for name in CODECS:
+            codec = create_codec(name)
+            if codec.name != name:
+                print(f"{size_arg:<12}{name:<14}{'unsupported':>11}")
+                continue
+            encode, decode, size_bytes = bench_codec(codec, frames)
+            print(f"{size_arg:<12}{name:<14}{encode:>11.2f}{decode:>11.2f}{size_bytes:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Measure how long `import panopticon` takes and what it drags in.
+
+Runs a fresh interpreter with -X importtime several times, reports the
+median total and the slowest modules, and fails (exit 1) when the median
+exceeds the budget in startup_budget.json or a module listed there as
+forbidden gets imported at startup. The headless daemon is checked the
+same way against the "daemon" budget; the GUI cannot forbid PIL since
+customtkinter imports it, but the daemon can.
+
+    python benchmarks/bench_startup.py [-n 5] [--top 15]
+"""
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+BUDGET_FILE = pathlib.Path(__file__).resolve().parent / "startup_budget.json"
+
+PROBE = "import sys, json; import {module}; print(json.dumps(sorted(sys.modules)))"
+
+
+def run_once(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    modules = set(json.loads(result.stdout.strip().splitlines()[-1]))
+    timings = {}  # module -> (self us, cumulative us)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=5, help="interpreter launches")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    args = parser.parse_args()
+    budget = json.loads(BUDGET_FILE.read_text())
+
+    failed = False
+    for module, module_budget in (("panopticon", budget), ("PanopticonDaemon", budget["daemon"])):
+        failed |= check(module, module_budget, args)
+    sys.exit(1 if failed else 0)
+
+
+def check(module, budget, args):
+    totals, runs = [], []
+    for _ in range(args.n):
+        timings, modules = run_once(module)
+        totals.append(timings[module][1] / 1000)
+        runs.append(timings)
+    median = statistics.median(totals)
+
+    print(f"import {module}: median {median:.1f} ms over {args.n} runs (budget {budget['import_ms']} ms)")
+    print(f"\n{'self ms':>9}{'cumulative ms':>15}  module")
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"{self_us / 1000:>9.1f}{cumulative_us / 1000:>15.1f}  {name}")
+
+    failed = False
+    if median > budget["import_ms"]:
+        print(f"\nFAIL: startup import time {median:.1f} ms exceeds budget of {budget['import_ms']} ms")
+        failed = True
+    loaded = sorted(name for name in budget["forbidden_modules"] if name in modules)
+    if loaded:
+        print(f"\nFAIL: imported at startup but should be lazy: {', '.join(loaded)}")
+        failed = True
+    print()
+    return failed
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Time suggestion-index opens and queries against a large synthetic index.
+
+    python benchmarks/bench_suggest.py --rows 100000 --queries 200
+"""
+import argparse
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from benchstats import p95  # noqa: E402
+from SuggestionIndex import FEATURE_DIM, SuggestionIndex  # noqa: E402
+
+
+def random_vectors(rng, n):
+    vectors = rng.standard_normal((n, FEATURE_DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as save_dir:
+        index = SuggestionIndex(save_dir)
+        start = time.perf_counter()
+        for first in range(0, args.rows, 10_000):
+            n = min(10_000, args.rows - first)
+            index.add_many(random_vectors(rng, n), rng.choice(["on-task", "off-task", "none"], n))
+        print(f"built {args.rows} rows in {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        index = SuggestionIndex(save_dir)
+        index.suggest(row=0)  # maps the file
+        print(f"open + first query: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        times = []
+        for vector in random_vectors(rng, args.queries):
+            start = time.perf_counter()
+            index.suggest(vector)
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        print(f"query ms: median {statistics.median(times):.2f}, p95 {p95(times):.2f}")
+
+
+if __name__ == "__main__":
+    main()
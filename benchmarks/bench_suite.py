@@ -0,0 +1,236 @@
+"""Benchmark the capture, storage and view paths on synthetic data; save results as JSON.
+
+Everything runs on seeded synthetic desktops and a throwaway save directory,
+so two runs on the same machine measure the same work. Grid timings need a
+display: pass --xvfb to start a private Xvfb server, otherwise they are
+skipped unless $DISPLAY is set.
+
+    python benchmarks/bench_suite.py -n 20 --output results.json
+    python benchmarks/bench_suite.py --compare results.json   # exit 1 on regressions
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import pathlib
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchstats import p95  # noqa: E402
+from CaptureBackends import SyntheticBackend  # noqa: E402
+from DayModel import DayModel  # noqa: E402
+from ProductivityMonitor import Capture, ProductivityMonitor  # noqa: E402
+from ScreenshotStore import ScreenshotStore  # noqa: E402
+
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+    "2x1080p": (3840, 1080),   # two monitors side by side
+    "3x1440p": (7680, 1440),
+}
+DAY_SIZES = (100, 1000, 10000)
+DAY = "2025-01-06"
+CLASSES = ("on-task", "off-task", "none")
+
+
+def measure(func, n, warmup=1):
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return {"median_ms": round(statistics.median(times), 3),
+            "p95_ms": round(p95(times), 3),
+            "min_ms": round(times[0], 3), "n": n}
+
+
+def synthetic_entries(count, seed=0):
+    rnd = random.Random(seed)
+    start = datetime.datetime.fromisoformat(f"{DAY} 00:00:00")
+    step = max(86400 // count, 1)
+    return [{"filename": f"screenshot_{start + datetime.timedelta(seconds=i * step):%Y%m%d_%H%M%S}.png",
+             "classification": rnd.choice(CLASSES), "width": 1920, "height": 1080, "pixel_size": 7}
+            for i in range(count)]
+
+
+# --- capture path ------------------------------------------------------------
+
+def bench_capture_path(save_dir, n):
+    results = {}
+    monitor = ProductivityMonitor(save_dir, DAY, 1, 1, None, pixel_size=7, dedupe_threshold=-1)
+    clock = datetime.datetime.fromisoformat(f"{DAY} 09:00:00")
+    for label, size in RESOLUTIONS.items():
+        frames = [SyntheticBackend(size, seed=i).grab() for i in range(4)]
+        frame = iter(range(10 ** 9))
+        results[f"pixelate/{label}"] = measure(lambda: monitor.pixelate_image(frames[next(frame) % 4]), n)
+
+        captures = []
+
+        def process():
+            nonlocal clock
+            clock += datetime.timedelta(seconds=1)
+            captures.append(monitor.process_capture(Capture(frames[len(captures) % 4], clock, save_dir, DAY)))
+
+        # pixelate + hash + features + encode, as on the worker threads
+        results[f"process/{label}"] = measure(process, n)
+        pending = iter(captures)
+
+        def commit():
+            # file write and index update, including the store's commit
+            monitor.commit_screenshot(next(pending))
+            monitor.get_store().flush()
+
+        results[f"save/{label}"] = measure(commit, min(n, len(captures) - 1))
+    monitor.get_store().close()
+    return results
+
+
+# --- day loading -------------------------------------------------------------
+
+def bench_day_load(save_dir, n):
+    results = {}
+    for count in DAY_SIZES:
+        store = ScreenshotStore(pathlib.Path(save_dir) / f"day-{count}")
+        for entry in synthetic_entries(count):
+            store.add(DAY, entry)
+        store.flush()
+        results[f"day_load/{count}"] = measure(lambda: store.day_entries(DAY), n)
+        entries = store.day_entries(DAY)
+        results[f"day_model/{count}"] = measure(lambda: DayModel(DAY, entries), n)
+        model = DayModel(DAY, entries)
+        results[f"totals/{count}"] = measure(model.totals, n)
+        store.close()
+    return results
+
+
+# --- views (needs a display) -------------------------------------------------
+
+def bench_views(save_dir, n):
+    import customtkinter as ctk
+    from JsonVisualizerFrame import JsonVisualizerFrame
+
+    results = {}
+    root = ctk.CTk()
+    root.geometry("1200x800")
+    try:
+        for count in DAY_SIZES:
+            store = ScreenshotStore(pathlib.Path(save_dir) / f"view-{count}")
+            for entry in synthetic_entries(count):
+                store.add(DAY, entry)
+            index = store.day(DAY)
+            frame = JsonVisualizerFrame(root, lambda *args, **kwargs: None, index=index,
+                                        save_path=pathlib.Path(store.save_dir) / DAY)
+            frame.pack(fill="both", expand=True)
+            root.update()
+
+            def create():
+                frame.create_squares_grid()
+                frame._grid._flush()  # lay out now instead of when idle
+                root.update_idletasks()
+
+            def refresh():
+                frame.refresh()
+                frame._grid._flush()
+                root.update_idletasks()
+
+            results[f"create_squares_grid/{count}"] = measure(create, n)
+            results[f"refresh/{count}"] = measure(refresh, n)
+            frame.destroy()
+            store.close()
+    finally:
+        root.destroy()
+    return results
+
+
+# --- reporting ---------------------------------------------------------------
+
+def metadata(n):
+    try:
+        revision = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT,
+                                  capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        revision = None
+    import numpy
+    import PIL
+    return {"revision": revision, "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpus": os.cpu_count(),
+            "numpy": numpy.__version__, "pillow": PIL.__version__, "n": n}
+
+
+def compare(baseline, current, threshold):
+    # Prints the change per benchmark and returns the names that got slower
+    regressions = []
+    print(f"\n{'benchmark':<32}{'baseline ms':>13}{'current ms':>13}{'change':>9}")
+    for name, result in current.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        change = result["median_ms"] / old["median_ms"] - 1 if old["median_ms"] else 0
+        flag = "  <-- slower" if change > threshold else ""
+        print(f"{name:<32}{old['median_ms']:>13.3f}{result['median_ms']:>13.3f}{change:>+9.0%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=20, help="timed runs per benchmark")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown that counts as a regression")
+    parser.add_argument("--xvfb", action="store_true", help="run the view benchmarks on a private Xvfb server")
+    parser.add_argument("--only", nargs="*", choices=["capture", "day", "views"], default=["capture", "day", "views"])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = {}
+    xvfb = None
+    with tempfile.TemporaryDirectory() as save_dir:
+        if "capture" in args.only:
+            results.update(bench_capture_path(pathlib.Path(save_dir) / "capture", args.n))
+        if "day" in args.only:
+            results.update(bench_day_load(save_dir, args.n))
+        if "views" in args.only:
+            if args.xvfb:
+                from bench_capture import start_xvfb
+                xvfb = start_xvfb((1920, 1080))
+            try:
+                if os.environ.get("DISPLAY"):
+                    results.update(bench_views(save_dir, args.n))
+                else:
+                    print("No display: skipping view benchmarks (use --xvfb)")
+            finally:
+                if xvfb is not None:
+                    xvfb.terminate()
+
+    print(f"{'benchmark':<32}{'median ms':>12}{'p95 ms':>12}")
+    for name, result in results.items():
+        print(f"{name:<32}{result['median_ms']:>12.3f}{result['p95_ms']:>12.3f}")
+
+    report = {"meta": metadata(args.n), "results": results}
+    if args.output:
+        pathlib.Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\nSaved {args.output}")
+    if args.compare:
+        baseline = json.loads(pathlib.Path(args.compare).read_text())["results"]
+        if compare(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+"""Timing statistics shared by the benchmark scripts."""
+import math
+
+
+def p95(times):
+    # Nearest rank: the smallest time at least 95% of the runs did not
+    # exceed, so it is never below the median however few runs there are
+    ordered = sorted(times)
+    return ordered[max(math.ceil(0.95 * len(ordered)) - 1, 0)]
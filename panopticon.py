@@ -1,14 +1,22 @@
-import os
-import json
+import logging
 import customtkinter as ctk
-import pandas as pd
 import datetime
-from MinimalMessageBox import MinimalMessageBox
+import pathlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog
 
-from SingleInstance import SingleInstance, SingleInstanceException
-from JsonVisualizerFrame import JsonVisualizerFrame
+from SingleInstance import HANDLER_TIMEOUT, SingleInstance, SingleInstanceException
+from ClassificationQueue import ClassificationQueue, Request
 from ProductivityMonitor import ProductivityMonitor
+from ScreenshotStore import close_stores, image_name, time_label_from_filename
+from Config import CONFIG_FILE, load_config, save_config
+from Metrics import STAGE_SECONDS, configure_logging, start_exporters
+
+log = logging.getLogger(__name__)
+
+# Views, dialogs and image code are imported where first used, so launching
+# only pays for the window and controls.
 
 class PanopticonGUI(ctk.CTk):
     def __init__(self):
@@ -24,7 +32,7 @@ class PanopticonGUI(ctk.CTk):
         ctk.set_default_color_theme("blue")
 
         # Load config
-        self.config_file = os.path.expanduser("~/.config/panopticon/settings.json")
+        self.config_file = CONFIG_FILE
         self.load_config()
 
         # Set data bin to day program was started
@@ -37,33 +45,103 @@ class PanopticonGUI(ctk.CTk):
             interval_min=self.config["interval_min"],
             interval_max=self.config["interval_max"],
             classify_screenshot=self.classify_screenshot,
+            screenshot_added=self.show_screenshot,
             parent_window=self,
             pixel_size=self.config["pixel_size"],
+            capture_backend=self.config["capture_backend"],
+            image_codec=self.config["image_codec"],
+            dedupe_threshold=self.config["dedupe_threshold"],
+            dedupe_inherit=self.config["dedupe_inherit_classification"],
+            store_options={"flush_interval": self.config["store_flush_interval"],
+                           "sync": self.config["store_sync"]},
+            pack_days=self.config["pack_days"],
+            schedule=self.config["schedule"],
+            idle_after=self.config["idle_after"],
+            pause_when_locked=self.config["pause_when_locked"],
+            activity_provider=self.config["activity_provider"],
+            per_output=self.config["per_output_capture"],
+            excluded_outputs=self.config["excluded_outputs"],
         )
 
+        self.metrics = start_exporters(self.config["metrics_port"], self.config["metrics_log"],
+                                       self.config["metrics_interval"])
+
         self.font_scale = 1.5  # Scaling factor for fonts
+        self.capture_watch_interval = 15000  # ms between checks for a capturing daemon
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gui-background")
         self.create_widgets()
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
-    def load_config(self):
-        default_config = {
-            "save_dir": os.path.join(os.path.dirname(os.path.abspath(__file__)),"screenshots"),
-            "interval_min": 30,
-            "interval_max": 600,
-            "pixel_size": 7
-        }
+        self.classification_queue = ClassificationQueue(self, self.show_classification,
+                                                        on_change=self.update_pending_badge)
 
-        try:
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, 'r') as f:
-                self.config = json.load(f)
-        except FileNotFoundError:
-            self.config = default_config
-            self.save_config()
+        # Everything else is built once the window has been drawn
+        self.after(50, self.finish_startup)
+
+    def finish_startup(self):
+        self.create_settings_widgets(self.left_frame)
+        self.preload_visualizer()
+        self.after(1000, self.watch_capture)
+
+    def watch_capture(self):
+        # While another instance (the daemon) holds the capture lock, this
+        # window cannot capture and picks up its new captures for review
+        elsewhere = not self.monitor.running and self.monitor.capture_lock.held_elsewhere()
+        if elsewhere != self.capturing_elsewhere:
+            self.capturing_elsewhere = elsewhere
+            if elsewhere:
+                self.capture_note.pack(after=self.toggle_button, fill="x", padx=20, pady=(0, 5))
+                self.toggle_button.configure(state="disabled")
+            else:
+                self.capture_note.pack_forget()
+                if self.monitor.is_stopped():
+                    self.toggle_button.configure(state="normal")
+        if elsewhere:
+            self.review_pending()
+        self.after(self.capture_watch_interval, self.watch_capture)
+
+    def run_in_background(self, func, callback):
+        # Run func off the Tk thread; callback(result) runs back on the Tk thread
+        future = self._background.submit(func)
+        self._when_done(future, callback)
+
+    def _when_done(self, future, callback):
+        # Tk is not thread-safe, so poll instead of calling back from the worker
+        if future.done():
+            callback(future.result())
+        else:
+            self.after(20, self._when_done, future, callback)
+
+    def preload_visualizer(self):
+        # Open the store (and run any one-time import) and read the day off the Tk thread
+        def load():
+            import JsonVisualizerFrame  # noqa: F401
+            return self.monitor.get_index().snapshot()["screenshots"]
+
+        def index_suggestions():
+            # Learn from screenshots classified before the suggestion index
+            # existed; this decodes every such capture, so it gets its own thread
+            from SuggestionIndex import get_suggestion_index
+            try:
+                get_suggestion_index(self.monitor.save_dir).backfill(self.monitor.get_store())
+            except Exception as e:
+                log.error(f"Error indexing screenshots for suggestions: {e}")
+
+        def show(entries):
+            if not self.visualizer_frame:
+                self.reload_visualizer_frame(entries)
+            # Pick up captures taken while the GUI was closed; suggestions for
+            # them appear once the backfill has caught up
+            self.review_pending()
+            threading.Thread(target=index_suggestions, name="suggestion-backfill", daemon=True).start()
+
+        self.run_in_background(load, show)
+
+    def load_config(self):
+        self.config = load_config(self.config_file)
 
     def save_config(self):
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f)
+        save_config(self.config, self.config_file)
 
     def create_widgets(self):
         container = ctk.CTkFrame(self, fg_color="#242424")
@@ -77,11 +155,25 @@ class PanopticonGUI(ctk.CTk):
         self.right_frame = ctk.CTkFrame(container, width=4 * self.winfo_width() // 7, fg_color="#2B2B2B")
         self.right_frame.pack(side="right", fill="both", expand=True, padx=(10, 0), pady=0)
 
-        # Initially, JsonVisualizerFrame is not created
+        # Day grid or week/month/year heatmap
+        self.view_selector = ctk.CTkSegmentedButton(
+            self.right_frame,
+            values=["Day", "Week", "Month", "Year", "Review", "Analytics"],
+            font=("", int(14 * self.font_scale)),
+            command=self.show_view,
+        )
+        self.view_selector.pack(fill="x", padx=10, pady=(10, 0))
+        self.view_selector.set("Day")
+        self.view_frame = ctk.CTkFrame(self.right_frame, fg_color="#2B2B2B")
+        self.view_frame.pack(fill="both", expand=True)
+
+        # Initially, no view is created
         self.visualizer_frame = None
+        self.heatmap_frame = None
+        self.review_frame = None
+        self.analytics_frame = None
 
         self.create_control_widgets(self.left_frame)
-        self.create_settings_widgets(self.left_frame)
 
     def create_control_widgets(self, parent):
         control_frame = ctk.CTkFrame(parent)
@@ -95,6 +187,16 @@ class PanopticonGUI(ctk.CTk):
         )
         self.toggle_button.pack(fill="x", padx=20, pady=5)
 
+        # Shown while the headless daemon captures; this window then only reviews
+        self.capture_note = ctk.CTkLabel(
+            control_frame,
+            text="The daemon is capturing; its captures are offered here for review",
+            font=("", int(12 * self.font_scale)),
+            text_color="gray",
+            wraplength=int(260 * self.font_scale),
+        )
+        self.capturing_elsewhere = False
+
         display_button = ctk.CTkButton(
             control_frame, 
             text="Load Data", 
@@ -103,7 +205,21 @@ class PanopticonGUI(ctk.CTk):
         )
         display_button.pack(fill="x", padx=20, pady=(5,16))
 
+        # Shown while screenshots are waiting in the classification queue
+        self.pending_badge = ctk.CTkButton(
+            control_frame,
+            text="",
+            font=("", int(14 * self.font_scale)),
+            fg_color="#7B61FF",
+            hover_color="#9F8CFF",
+            command=lambda: self.classification_queue.resume(),
+        )
+
     def create_settings_widgets(self, parent):
+        from CaptureBackends import AUTO_ORDER
+        from ImageCodec import CODECS
+        from Scheduler import SCHEDULES
+
         settings_frame = ctk.CTkFrame(parent)
         settings_frame.pack(fill="both", expand=True)
 
@@ -136,11 +252,46 @@ class PanopticonGUI(ctk.CTk):
         self.max_interval.pack(fill="x", padx=20, pady=(0, 10))
         self.max_interval.insert(0, str(self.config["interval_max"]))
 
+        ctk.CTkLabel(settings_frame, text="Schedule:", font=("", int(14 * self.font_scale))).pack(anchor="w", padx=20)
+        self.schedule = ctk.CTkOptionMenu(settings_frame, values=list(SCHEDULES), font=("", int(14 * self.font_scale)),
+                                          command=self.show_schedule_summary)
+        self.schedule.pack(fill="x", padx=20, pady=(0, 2))
+        self.schedule.set(self.config["schedule"])
+        self.schedule_summary = ctk.CTkLabel(settings_frame, font=("", int(12 * self.font_scale)), text_color="gray",
+                                             justify="left", wraplength=int(260 * self.font_scale))
+        self.schedule_summary.pack(anchor="w", padx=20, pady=(0, 10))
+        self.show_schedule_summary(self.config["schedule"])
+
+        ctk.CTkLabel(settings_frame, text="Pause When Idle (seconds, 0 = never):", font=("", int(14 * self.font_scale))).pack(anchor="w", padx=20)
+        self.idle_after = ctk.CTkEntry(settings_frame, font=("", int(14 * self.font_scale)))
+        self.idle_after.pack(fill="x", padx=20, pady=(0, 10))
+        self.idle_after.insert(0, str(self.config["idle_after"]))
+
         ctk.CTkLabel(settings_frame, text="Pixel Size:", font=("", int(14 * self.font_scale))).pack(anchor="w", padx=20)
         self.pixel_size = ctk.CTkEntry(settings_frame, font=("", int(14 * self.font_scale)))
         self.pixel_size.pack(fill="x", padx=20, pady=(0, 10))
         self.pixel_size.insert(0, str(self.config["pixel_size"]))
 
+        ctk.CTkLabel(settings_frame, text="Capture Backend:", font=("", int(14 * self.font_scale))).pack(anchor="w", padx=20)
+        self.capture_backend = ctk.CTkOptionMenu(settings_frame, values=["auto"] + AUTO_ORDER, font=("", int(14 * self.font_scale)))
+        self.capture_backend.pack(fill="x", padx=20, pady=(0, 10))
+        self.capture_backend.set(self.config["capture_backend"])
+
+        ctk.CTkLabel(settings_frame, text="Excluded Outputs (comma separated):", font=("", int(14 * self.font_scale))).pack(anchor="w", padx=20)
+        self.excluded_outputs = ctk.CTkEntry(settings_frame, font=("", int(14 * self.font_scale)))
+        self.excluded_outputs.pack(fill="x", padx=20, pady=(0, 10))
+        self.excluded_outputs.insert(0, ", ".join(self.config["excluded_outputs"]))
+
+        ctk.CTkLabel(settings_frame, text="Image Format:", font=("", int(14 * self.font_scale))).pack(anchor="w", padx=20)
+        self.image_codec = ctk.CTkOptionMenu(settings_frame, values=list(CODECS), font=("", int(14 * self.font_scale)))
+        self.image_codec.pack(fill="x", padx=20, pady=(0, 10))
+        self.image_codec.set(self.config["image_codec"])
+
+        ctk.CTkLabel(settings_frame, text="Auto-apply Suggestions (% sure, 0 = off):", font=("", int(14 * self.font_scale))).pack(anchor="w", padx=20)
+        self.suggestion_auto_apply = ctk.CTkEntry(settings_frame, font=("", int(14 * self.font_scale)))
+        self.suggestion_auto_apply.pack(fill="x", padx=20, pady=(0, 10))
+        self.suggestion_auto_apply.insert(0, str(round(self.config["suggestion_auto_apply"] * 100)))
+
         self.save_dir_var = ctk.StringVar(value=self.config["save_dir"])
         ctk.CTkLabel(settings_frame, text="Save directory:",
                     font=("", int(14 * self.font_scale))
@@ -164,96 +315,294 @@ class PanopticonGUI(ctk.CTk):
         ctk.CTkButton(button_frame, text="Save Settings", font=("", int(14 * self.font_scale)), command=self.save_settings).pack(side="left", padx=(0, 5), expand=True)
         ctk.CTkButton(button_frame, text="Reset to Default", font=("", int(14 * self.font_scale)), command=self.reset_settings).pack(side="left", padx=(5, 0), expand=True)
     
-    def reload_visualizer_frame(self):
-      print("\nReloading visualizer frame...")
+    def reload_visualizer_frame(self, entries=None):
+      from JsonVisualizerFrame import JsonVisualizerFrame
+
+      log.debug("Reloading visualizer frame...")
       if self.visualizer_frame:
           self.visualizer_frame.refresh()
       else:
         # Load the JSON file path and recreate the JsonVisualizerFrame
-        print("No visualizer frame found, recreating...")
-        json_path = self.monitor.get_json_path()  # Adjust path logic if needed
+        log.debug("No visualizer frame found, recreating...")
+        index = self.monitor.get_index()
         save_path = self.monitor.get_save_path()
         vf_margin = 10
-        self.visualizer_frame = JsonVisualizerFrame(self.right_frame, self.classify_screenshot, json_path=json_path, save_path=save_path, margin=vf_margin, font_scale=self.font_scale)
+        self.visualizer_frame = JsonVisualizerFrame(self.view_frame, self.classify_screenshot, index=index, save_path=save_path, entries=entries, margin=vf_margin, font_scale=self.font_scale)
         self.visualizer_frame.pack(fill="both", expand=True, padx=vf_margin, pady=vf_margin)
 
+    def show_view(self, view):
+        if self.review_frame and view != "Review":
+            self.review_frame.deactivate()
+            self.review_frame.pack_forget()
+        if self.analytics_frame and view != "Analytics":
+            self.analytics_frame.pack_forget()
+
+        if view == "Day":
+            if self.heatmap_frame:
+                self.heatmap_frame.pack_forget()
+            if self.visualizer_frame:
+                self.visualizer_frame.pack(fill="both", expand=True, padx=10, pady=10)
+            else:
+                self.reload_visualizer_frame()
+            return
+
+        if self.visualizer_frame:
+            self.visualizer_frame.pack_forget()
+
+        if view == "Review":
+            if self.heatmap_frame:
+                self.heatmap_frame.pack_forget()
+            if not self.review_frame:
+                from ReviewPane import ReviewPane
+                self.review_frame = ReviewPane(self.view_frame, self.monitor.get_store(), self.today,
+                                               on_flush=self.reviewed, font_scale=self.font_scale)
+            self.review_frame.pack(fill="both", expand=True, padx=10, pady=10)
+            self.review_frame.activate()
+            return
+
+        if view == "Analytics":
+            if self.heatmap_frame:
+                self.heatmap_frame.pack_forget()
+            if not self.analytics_frame:
+                from AnalyticsFrame import AnalyticsFrame
+                self.analytics_frame = AnalyticsFrame(self.view_frame, self.monitor.get_store(),
+                                                      font_scale=self.font_scale)
+            self.analytics_frame.pack(fill="both", expand=True, padx=10, pady=10)
+            self.analytics_frame.refresh()
+            return
+
+        if not self.heatmap_frame:
+            from HeatmapFrame import HeatmapFrame
+            self.heatmap_frame = HeatmapFrame(self.view_frame, self.monitor.get_store(),
+                                              on_select_day=self.select_day, font_scale=self.font_scale)
+        self.heatmap_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.heatmap_frame.set_period(view.lower())
+
+    def reviewed(self, decisions):
+        # A batch from the review pane was written; redraw what it touched
+        for day, entry, _ in decisions:
+            self.classification_queue.discard(day, entry["filename"])  # already answered
+        if self.visualizer_frame and any(day == self.today for day, _, _ in decisions):
+            self.visualizer_frame.refresh()
+        if self.heatmap_frame:
+            self.heatmap_frame.refresh()
+
+    def select_day(self, day):
+        # Jump from a heatmap cell to that day's grid
+        self.day_entry.delete(0, 'end')
+        self.day_entry.insert(0, day)
+        self.update_day()
+        self.view_selector.set("Day")
+        self.show_view("Day")
+
     def toggle_monitoring(self):
         if self.monitor.running:
-            self.monitor.stop()
-            self.toggle_button.configure(text="Start", fg_color="#4CAF50", hover_color="#66BB6A")
+            # Frames in flight are finished off the Tk thread; their prompts
+            # still arrive through the monitor's event queue meanwhile
+            self.monitor.stop(wait=False)
+            self.toggle_button.configure(text="Stopping...", state="disabled")
+            self.after(100, self.wait_until_stopped)
         else:
-            self.monitor.start()
+            try:
+                self.monitor.start()
+            except SingleInstanceException as e:
+                log.warning(e)
+                self.watch_capture()  # show why and review the daemon's captures instead
+                return
             self.toggle_button.configure(text="Stop", fg_color="#7B61FF", hover_color="#9780FF")
 
-    def classify_screenshot(self, image_path, json_file, screenshot_entry, time_label, new):
-        print("Classifying screenshot...")
-        # Create a messagebox to classify the screenshot
+    def wait_until_stopped(self):
+        if not self.monitor.is_stopped():
+            self.after(100, self.wait_until_stopped)
+            return
+        self.toggle_button.configure(text="Start", state="normal", fg_color="#4CAF50", hover_color="#66BB6A")
+
+    def control(self, command, args):
+        # Control socket requests arrive on the socket thread, which must not
+        # touch Tk: queue the request for the Tk thread like the monitor's
+        # callbacks and wait for the answer. A request still queued when the
+        # client gives up is dropped, so it never runs after a reported failure.
+        done = threading.Event()
+        lock = threading.Lock()
+        outcome = {}
+        state = {"abandoned": False, "taken": False}
+
+        def run():
+            with lock:
+                if state["abandoned"]:
+                    return
+                state["taken"] = True
+            try:
+                outcome["result"] = self.run_command(command, args)
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                done.set()
+
+        self.monitor.ui_events.put((run, ()))
+        if not done.wait(timeout=HANDLER_TIMEOUT):
+            with lock:
+                state["abandoned"] = not state["taken"]
+            if state["abandoned"]:
+                raise TimeoutError("the window did not answer in time")
+            done.wait()  # already running on the Tk thread
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    def run_command(self, command, args):
+        if command == "status":
+            return {**self.monitor.status(), "pending": len(self.classification_queue)}
+        if command in ("start", "stop"):
+            if not self.monitor.is_stopped():
+                raise RuntimeError("still stopping, try again in a moment")
+            if command == "start" and not self.monitor.running:
+                self.monitor.capture_lock.acquire()  # the daemon's error, if it is capturing
+            if self.monitor.running != (command == "start"):
+                self.toggle_monitoring()  # keeps the button in step
+            return self.monitor.status()
+        if command == "set-day":
+            if not args:
+                raise ValueError("set-day needs a day (YYYY-MM-DD)")
+            day = datetime.date.fromisoformat(args[0]).isoformat()
+            self.day_entry.delete(0, 'end')
+            self.day_entry.insert(0, day)
+            self.update_day()
+            return day
+        if command == "stats":
+            return self.monitor.stats(args[0] if args else None)
+        raise ValueError(f"Unknown command: {command}")
+
+    def classify_screenshot(self, image_path, index, screenshot_entry, time_label, new, first=False):
+        # Queue a screenshot for an answer; nothing here waits for the user.
+        # New captures go to the back, clicks on the grid (first) to the front.
+        request = Request(image_path, index, screenshot_entry, time_label, new)
+        if new:
+            self.show_screenshot(image_path, screenshot_entry)  # unclassified until answered
+            suggestion = self.suggest(screenshot_entry)
+            threshold = self.config["suggestion_auto_apply"]
+            if suggestion and threshold and suggestion[1] >= threshold:
+                log.info(f"Applying suggestion {suggestion[0]} ({suggestion[1]:.0%})")
+                self.apply_classification(request, suggestion[0].title())
+                return
+        self.classification_queue.put(request, first=first)
+        if first:
+            self.classification_queue.resume()
+
+    def suggest(self, screenshot_entry):
+        from SuggestionIndex import get_suggestion_index
+
+        feature_row = screenshot_entry.get("feature_row")
+        if feature_row is None:
+            return None
+        return get_suggestion_index(self.monitor.save_dir).suggest(row=feature_row)
+
+    def show_classification(self, request, done):
+        # Called by the queue for one request at a time; the dialog is not
+        # modal, so the main window keeps running while it is open
+        from MinimalMessageBox import MinimalMessageBox
+
+        log.debug("Classifying screenshot...")
+        suggestion = self.suggest(request.entry)
         options = [{"label": "On-Task", "color": "#66BB6A", "hover_color": "#66BB6A",
                     "width_ratio": 2},
                     {"label": "Off-Task", "color": "#FF4747", "hover_color": "#FF6B6B", "width_ratio": 2},
                     {"label": "None", "color": "gray", "hover_color": "dimgray", "width_ratio": 1.5},
                     {"label": "X", "color": "#7B61FF", "hover_color": "#F5F5F5", "width_ratio": 0.5}]
-        resp = MinimalMessageBox(
-                title="Classify Screenshot",
-                options=options,
-                font_scale=self.font_scale,
-                message=f"Screenshot taken at {time_label}:",
-                img_path=image_path,
-               ).get()
-        response = resp
-
+        message = f"Screenshot taken at {request.time_label}:"
+        if suggestion:
+            message += f"\nLooks {suggestion[0]} ({suggestion[1]:.0%} of similar screenshots)"
+
+        def answered(response):
+            self.apply_classification(request, response)
+            if response is None and len(self.classification_queue) > 1:
+                self.classification_queue.pause()  # closed: stop asking until the badge is clicked
+            done()
+
+        with STAGE_SECONDS.time("dialog_open"):
+            MinimalMessageBox(
+                    title="Classify Screenshot",
+                    options=options,
+                    font_scale=self.font_scale,
+                    message=message,
+                    img_path=request.image_path,
+                    suggested=suggestion[0].title() if suggestion else None,
+                    on_response=answered,
+                   )
+
+    def apply_classification(self, request, response):
+        from DayPack import remove_frame
+        from SuggestionIndex import get_suggestion_index
+        from ThumbnailCache import get_thumbnail_cache
+
+        image_path, index, screenshot_entry = request.image_path, request.index, request.entry
+        suggestions = get_suggestion_index(self.monitor.save_dir)
+        feature_row = screenshot_entry.get("feature_row")
         if response == "X":
-            # Remove the screenshot file and JSON entry
+            # Remove the index entry, and the image file unless another
+            # capture of the same unchanged screen still points at it
             try:
-                image_path.unlink()  # Delete the image file
-                with open(json_file, 'r+') as f:
-                    data = json.load(f)
-                    data["screenshots"] = [
-                        entry for entry in data["screenshots"]
-                        if entry["filename"] != screenshot_entry["filename"]
-                    ]
-                    f.seek(0)
-                    f.truncate()
-                    json.dump(data, f, indent=4)
-                print(f"Screenshot discarded: {image_path}")
+                index.delete(screenshot_entry["filename"])
+                suggestions.label(feature_row, None)
+                if not index.image_in_use(image_path.name):
+                    remove_frame(image_path)  # Delete the image file
+                    get_thumbnail_cache().discard(image_path)
+                log.info(f"Screenshot discarded: {image_path}")
             except Exception as e:
-                print(f"Error discarding screenshot: {e}")
+                log.error(f"Error discarding screenshot: {e}")
         elif response in ["On-Task", "Off-Task", "None"]:
-            # Update the JSON entry with the selected classification
+            # Update the index entry with the selected classification
             try:
-                with open(json_file, 'r+') as f:
-                    data = json.load(f)
-                    for entry in data["screenshots"]:
-                        if entry["filename"] == screenshot_entry["filename"]:
-                            entry["classification"] = response.lower()
-                            break
-                    f.seek(0)
-                    f.truncate()
-                    json.dump(data, f, indent=4)
-                print(f"Screenshot classified as {response.lower()}: {image_path}")
+                index.classify(screenshot_entry["filename"], response.lower())
+                suggestions.label(feature_row, response.lower())
+                log.info(f"Screenshot classified as {response.lower()}: {image_path}")
             except Exception as e:
-                print(f"Error updating classification: {e}")
+                log.error(f"Error updating classification: {e}")
         else:
-            print(f"No action taken for screenshot: {image_path}")
-            return None # response is None
-        
-        screenshot_entry["classification"] = response.lower()
-
-        if new and not (response == "X"):
-          # Reload the visualizer frame entirely if # of ss's changed
-          if self.visualizer_frame:
-              self.visualizer_frame.add_screenshot_button(image_path, screenshot_entry)
-          else:
-              self.reload_visualizer_frame()
-        
-        return response
-    
+            log.debug(f"No action taken for screenshot: {image_path}")
+            return
+
+        if self.visualizer_frame and self.visualizer_frame.index.day == index.day:
+            self.visualizer_frame.set_classification(screenshot_entry, response.lower())
+
+    def update_pending_badge(self, count, paused):
+        if count == 0:
+            self.pending_badge.pack_forget()
+            return
+        text = f"{count} waiting to classify"
+        if paused:
+            text += " (paused, click to resume)"
+        self.pending_badge.configure(text=text)
+        self.pending_badge.pack(fill="x", padx=20, pady=(0, 16))
+
+    def show_screenshot(self, image_path, screenshot_entry):
+        # A capture recorded without asking (its classification was carried
+        # over), or one whose question is still queued
+        if self.visualizer_frame and self.visualizer_frame.index.day == image_path.parent.name:
+            self.visualizer_frame.add_screenshot_button(image_path, dict(screenshot_entry))
+
+    def review_pending(self):
+        # Captures from the headless daemon (or answered by nobody) wait here
+        store = self.monitor.get_store()
+        queued = 0
+        for day, entry in store.pending_entries():
+            if (day, entry["filename"]) in self.classification_queue:
+                continue  # called again while the daemon captures
+            if len(self.classification_queue) >= self.classification_queue.max_size:
+                break  # the rest stay pending for a later pass
+            image_path = pathlib.Path(self.config["save_dir"]) / day / image_name(entry)
+            time_label = time_label_from_filename(entry["filename"])
+            self.classify_screenshot(image_path, store.day(day), entry, time_label, False)
+            queued += 1
+        if queued:
+            log.info(f"{queued} screenshots pending review")
+
     def update_day(self):
         new_day = self.day_entry.get().strip()
         try:
             datetime.datetime.strptime(new_day, "%Y-%m-%d")
         except ValueError:
-            print("Invalid date. Use YYYY-MM-DD.")
+            log.warning("Invalid date. Use YYYY-MM-DD.")
             return
 
         self.today = new_day              # update GUI’s own record
@@ -261,13 +610,15 @@ class PanopticonGUI(ctk.CTk):
 
         # Update and refresh JsonVisualizer
         if self.visualizer_frame:
-            json_path = self.monitor.get_json_path()
+            index = self.monitor.get_index()
             save_path = self.monitor.get_save_path()
-            self.visualizer_frame.update_json_path(json_path, save_path)
+            self.visualizer_frame.update_index(index, save_path)
         else:
             self.reload_visualizer_frame()
+        if self.review_frame:
+            self.review_frame.set_day(new_day)
 
-        print(f"Recording day set to {new_day}")
+        log.info(f"Recording day set to {new_day}")
 
     def choose_save_dir(self):
         new_dir = filedialog.askdirectory(
@@ -280,10 +631,25 @@ class PanopticonGUI(ctk.CTk):
         # change save directory
         self.config["save_dir"] = new_dir
         self.monitor.save_dir = new_dir
-        self.visualizer_frame.save_path = new_dir
+        if self.visualizer_frame:
+            self.visualizer_frame.save_path = new_dir
+        if self.heatmap_frame:
+            self.heatmap_frame.set_store(self.monitor.get_store())
+        if self.analytics_frame:
+            self.analytics_frame.set_store(self.monitor.get_store())
+        if self.review_frame:
+            # Rebuilt against the new store next time Review is opened
+            self.review_frame.destroy()
+            self.review_frame = None
+            if self.view_selector.get() == "Review":
+                self.show_view("Review")
         self.save_dir_var.set(new_dir)
         self.save_config() # save automatically
 
+    def show_schedule_summary(self, name):
+        from Scheduler import SCHEDULES
+        self.schedule_summary.configure(text=SCHEDULES[name].summary)
+
     def reset_settings(self):
         self.min_interval.delete(0, 'end')
         self.max_interval.delete(0, 'end')
@@ -291,30 +657,71 @@ class PanopticonGUI(ctk.CTk):
         self.min_interval.insert(0, "30")
         self.max_interval.insert(0, "600")
         self.pixel_size.insert(0, "7")
+        self.schedule.set("uniform")
+        self.show_schedule_summary("uniform")
+        self.idle_after.delete(0, 'end')
+        self.idle_after.insert(0, "300")
+        self.capture_backend.set("auto")
+        self.excluded_outputs.delete(0, 'end')
+        self.image_codec.set("png")
+        self.suggestion_auto_apply.delete(0, 'end')
+        self.suggestion_auto_apply.insert(0, "0")
 
     def save_settings(self):
         try:
-            self.config["interval_min"] = int(self.min_interval.get())
-            self.config["interval_max"] = int(self.max_interval.get())
+            interval_min, interval_max = int(self.min_interval.get()), int(self.max_interval.get())
+            if interval_min <= 0 or interval_max <= 0:
+                log.error("Error: Capture intervals must be at least 1 second")
+                return
+            self.config["interval_min"] = interval_min
+            self.config["interval_max"] = interval_max
             self.config["pixel_size"] = int(self.pixel_size.get())
+            self.config["schedule"] = self.schedule.get()
+            self.config["idle_after"] = int(self.idle_after.get())
+            self.monitor.set_schedule(self.config["schedule"], self.config["interval_min"],
+                                      self.config["interval_max"], self.config["idle_after"])
+            self.config["capture_backend"] = self.capture_backend.get()
+            self.monitor.set_capture_backend(self.config["capture_backend"])
+            self.config["excluded_outputs"] = [name.strip() for name in self.excluded_outputs.get().split(",") if name.strip()]
+            self.monitor.set_outputs(self.config["per_output_capture"], self.config["excluded_outputs"])
+            self.config["image_codec"] = self.image_codec.get()
+            self.monitor.set_image_codec(self.config["image_codec"])
+            self.config["suggestion_auto_apply"] = min(max(float(self.suggestion_auto_apply.get()), 0), 100) / 100
             self.save_config()
-            print("Settings saved successfully")
+            log.info("Settings saved successfully")
         except ValueError:
-            print("Error: Please enter valid numbers for all settings")
+            log.error("Error: Please enter valid numbers for all settings")
 
     def on_closing(self):
-        print("Closing...")
+        log.info("Closing...")
         if self.monitor.running:
-            self.monitor.stop()
+            self.monitor.stop(wait=False)
+        # Frames still in flight stay pending for the next review
+        self.classification_queue.pause()
+        self.withdraw()
+        self.finish_closing()
+
+    def finish_closing(self):
+        if not self.monitor.is_stopped():
+            self.after(50, self.finish_closing)
+            return
+        if self.review_frame:
+            self.review_frame.destroy()  # writes any answers not yet flushed
+        close_stores()
+        if self.metrics:
+            self.metrics.stop()
+        self._background.shutdown(wait=False)
         self.quit()
 
 def main():
+    configure_logging(load_config()["log_level"])
     try:
-        with SingleInstance():
+        with SingleInstance(name="panopticon") as instance:
             app = PanopticonGUI()
+            instance.handler = app.control
             app.mainloop()
-    except SingleInstanceException:
-        print("Another instance is already running")
+    except SingleInstanceException as e:
+        log.error(e)
         exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# The modules live flat at the repository root, as for the benchmarks
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
@@ -0,0 +1,81 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+import Analytics  # noqa: E402
+from ScreenshotStore import ScreenshotStore  # noqa: E402
+
+
+def add(store, day, time, classification):
+    store.add(day, {"filename": f"screenshot_{day.replace('-', '')}_{time.replace(':', '')}00.png",
+                    "classification": classification})
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ScreenshotStore(tmp_path, flush_interval=0)
+    # Monday 5 Jan: a 20-minute on-task run, a break, then a short one
+    for time, classification in [("09:00", "on-task"), ("09:10", "on-task"), ("09:20", "on-task"),
+                                 ("09:30", "off-task"), ("14:00", "on-task"), ("14:05", "none")]:
+        add(store, "2026-01-05", time, classification)
+    add(store, "2026-02-03", "10:00", "off-task")
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def row_reads(store, monkeypatch):
+    # Months read from the store rather than the cache
+    reads = []
+    day_range_rows = store.day_range_rows
+    monkeypatch.setattr(store, "day_range_rows", lambda start, end: reads.append(start[:7]) or day_range_rows(start, end))
+    return reads
+
+
+def test_load_frame_uses_the_month_cache_until_a_day_changes(store, row_reads):
+    frame = Analytics.load_frame(store, "2026-01-01", "2026-02-28")
+    assert len(frame) == 7 and row_reads == ["2026-01", "2026-02"]
+
+    again = Analytics.load_frame(store, "2026-01-01", "2026-02-28")
+    assert row_reads == ["2026-01", "2026-02"]  # both months from the cache
+    pd.testing.assert_frame_equal(frame, again)
+
+    store.classify("2026-02-03", "screenshot_20260203_100000.png", "on-task")
+    changed = Analytics.load_frame(store, "2026-01-01", "2026-02-28")
+    assert row_reads == ["2026-01", "2026-02", "2026-02"]  # only the edited month
+    assert changed["classification"].tolist()[-1] == "on-task"
+
+
+def test_load_frame_trims_to_the_range(store):
+    frame = Analytics.load_frame(store, "2026-01-06", "2026-02-28", cache=False)
+    assert frame["day"].tolist() == ["2026-02-03"]
+    assert list(frame["classification"].cat.categories) == Analytics.CLASSES
+
+
+def test_focus_by_hour_and_weekday(store):
+    frame = Analytics.load_frame(store, "2026-01-05", "2026-01-05")
+    by_hour = Analytics.focus_by_hour(frame)
+    assert len(by_hour) == 24
+    assert by_hour.loc[9, ["on-task", "off-task", "none"]].tolist() == [3, 1, 0]
+    assert by_hour.loc[9, "on_task_ratio"] == 0.75
+    assert pd.isna(by_hour.loc[3, "on_task_ratio"])
+    assert Analytics.focus_by_weekday(frame).loc["Mon", "on-task"] == 4
+
+
+def test_streaks_break_on_class_change_and_gaps(store):
+    frame = Analytics.load_frame(store, "2026-01-05", "2026-01-05")
+    table = Analytics.streaks(frame)
+    assert table["captures"].tolist() == [3, 1]
+    assert table["duration"].iloc[0] == pd.Timedelta(minutes=20)
+
+
+def test_report_summary_and_daily_rolling_ratio(store):
+    result = Analytics.report(store, "2026-01-05", "2026-01-11", window=7)
+    summary = result["summary"]
+    assert (summary["captures"], summary["on-task"], summary["off-task"], summary["unclassified"]) == (6, 4, 1, 1)
+    assert summary["on_task_ratio"] == 0.8
+    daily = result["daily"]
+    assert len(daily) == 7 and daily["rolling_7d"].iloc[-1] == 0.8
+    text = Analytics.format_report(result, "2026-01-05", "2026-01-11")
+    assert "20m" in text
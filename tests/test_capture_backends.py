@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+import CaptureBackends
+from CaptureBackends import CaptureBackend, FallbackCapture
+
+
+class Broken(CaptureBackend):
+    name = "broken"
+    both_failing = threading.Barrier(2)
+
+    def grab(self):
+        self.both_failing.wait(timeout=2)  # two grab threads fail together
+        raise OSError("no display")
+
+
+class Working(CaptureBackend):
+    name = "working"
+
+    def grab(self):
+        return "frame"
+
+
+class Spare(Working):
+    name = "spare"
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    for backend in (Broken, Working, Spare):
+        monkeypatch.setitem(CaptureBackends.BACKENDS, backend.name, backend)
+
+
+def test_concurrent_failures_drop_only_the_failed_backend(backends):
+    capture = FallbackCapture(["broken", "working", "spare"])
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(capture.grab())) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["frame", "frame"]
+    assert [backend.name for backend in capture._backends] == ["working", "spare"]
+
+
+def test_last_backend_failing_raises(backends, monkeypatch):
+    monkeypatch.setattr(Broken, "both_failing", threading.Barrier(1))
+    capture = FallbackCapture(["broken"])
+    with pytest.raises(OSError):
+        capture.grab()
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from CapturePipeline import CapturePipeline
+
+
+def test_frames_are_dropped_when_the_pipeline_is_full():
+    release = threading.Event()
+    committed = []
+    pipeline = CapturePipeline(lambda frame: release.wait() and frame, committed.append, workers=1, max_in_flight=2)
+    results = [pipeline.submit(frame) for frame in range(5)]
+    # The writer may already have taken the first frame off the queue
+    assert results[:2] == [True, True] and results.count(True) in (2, 3)
+    assert pipeline.dropped == results.count(False) and pipeline.submitted == results.count(True)
+    release.set()
+    pipeline.stop()
+    assert committed == [frame for frame, accepted in enumerate(results) if accepted]
+
+
+def test_commits_keep_capture_order_with_a_slow_worker():
+    committed = []
+
+    def process(frame):
+        if frame == 0:
+            time.sleep(0.1)  # finishes after the frames behind it
+        return frame
+
+    pipeline = CapturePipeline(process, committed.append, workers=3, max_in_flight=4)
+    for frame in range(4):
+        assert pipeline.submit(frame)
+    pipeline.stop()
+    assert committed == [0, 1, 2, 3]
+
+
+def test_stop_drains_frames_in_flight():
+    committed = []
+
+    def process(frame):
+        time.sleep(0.02)
+        return frame
+
+    pipeline = CapturePipeline(process, committed.append, workers=2, max_in_flight=4)
+    for frame in range(4):
+        pipeline.submit(frame)
+    pipeline.stop()
+    assert committed == [0, 1, 2, 3] and pipeline.depth() == 0
+
+
+def test_a_failed_frame_does_not_stop_the_writer():
+    committed = []
+
+    def process(frame):
+        if frame == 1:
+            raise OSError("disk full")
+        return frame
+
+    pipeline = CapturePipeline(process, committed.append, workers=1, max_in_flight=4)
+    for frame in range(3):
+        pipeline.submit(frame)
+    pipeline.stop()
+    assert committed == [0, 2]
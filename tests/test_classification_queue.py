@@ -0,0 +1,89 @@
+import types
+
+from ClassificationQueue import ClassificationQueue, Request
+
+
+class FakeWidget:
+    """Collects after_idle callbacks; run_idle() plays Tk going idle."""
+
+    def __init__(self):
+        self.idle = []
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+        return len(self.idle)
+
+    def run_idle(self):
+        while self.idle:
+            self.idle.pop(0)()
+
+
+def request(filename, day="2026-01-05"):
+    return Request(f"/shots/{day}/{filename}", types.SimpleNamespace(day=day), {"filename": filename}, "09:00", True)
+
+
+def make_queue(**options):
+    widget = FakeWidget()
+    shown = []
+    queue = ClassificationQueue(widget, lambda request, done: shown.append((request.entry["filename"], done)), **options)
+    return queue, widget, shown
+
+
+def test_one_request_per_day_and_filename():
+    queue, widget, shown = make_queue()
+    queue.put(request("a.png"))
+    queue.put(request("a.png"))
+    queue.put(request("a.png", day="2026-01-06"))
+    assert len(queue) == 2
+    widget.run_idle()
+    queue.put(request("a.png"))  # already on screen
+    assert len(queue) == 2 and ("2026-01-05", "a.png") in queue
+
+
+def test_shows_one_at_a_time_in_order():
+    queue, widget, shown = make_queue()
+    for name in ("a.png", "b.png", "c.png"):
+        queue.put(request(name))
+    queue.put(request("c.png"), first=True)
+    widget.run_idle()
+    assert [name for name, _ in shown] == ["c.png"]
+    shown[-1][1]()
+    widget.run_idle()
+    assert [name for name, _ in shown] == ["c.png", "a.png"]
+
+
+def test_oldest_requests_are_dropped_past_max_size():
+    queue, widget, shown = make_queue(max_size=2)
+    queue.pause()
+    for name in ("a.png", "b.png", "c.png"):
+        queue.put(request(name))
+    assert len(queue) == 2
+    assert ("2026-01-05", "a.png") not in queue and ("2026-01-05", "c.png") in queue
+
+
+def test_nothing_is_shown_while_paused():
+    changes = []
+    queue, widget, shown = make_queue(on_change=lambda count, paused: changes.append((count, paused)))
+    queue.pause()
+    queue.put(request("a.png"))
+    widget.run_idle()
+    assert shown == [] and changes[-1] == (1, True)
+    queue.resume()
+    widget.run_idle()
+    assert [name for name, _ in shown] == ["a.png"] and changes[-1] == (1, False)
+
+
+def test_moves_on_when_showing_fails():
+    widget = FakeWidget()
+    shown = []
+
+    def show(request, done):
+        if request.entry["filename"] == "gone.png":
+            raise FileNotFoundError(request.image_path)
+        shown.append(request.entry["filename"])
+
+    queue = ClassificationQueue(widget, show)
+    queue.put(request("gone.png"))
+    queue.put(request("b.png"))
+    widget.run_idle()
+    assert shown == ["b.png"] and len(queue) == 1
@@ -0,0 +1,65 @@
+import queue
+import threading
+import types
+
+import pytest
+
+pytest.importorskip("customtkinter")
+
+import panopticon
+import PanopticonDaemon
+
+
+def gui(run_command):
+    # Just what PanopticonGUI.control needs; the test plays the Tk thread
+    return types.SimpleNamespace(monitor=types.SimpleNamespace(ui_events=queue.Queue()), run_command=run_command)
+
+
+def run_ui_events(window):
+    callback, args = window.monitor.ui_events.get(timeout=2)
+    callback(*args)
+
+
+def test_gui_requests_run_on_the_tk_thread():
+    threads = []
+    window = gui(lambda command, args: threads.append(threading.current_thread()) or command)
+    result = []
+    client = threading.Thread(target=lambda: result.append(panopticon.PanopticonGUI.control(window, "status", [])))
+    client.start()
+    run_ui_events(window)
+    client.join()
+    assert result == ["status"] and threads == [threading.current_thread()]
+
+
+def test_gui_drops_requests_the_client_gave_up_on(monkeypatch):
+    monkeypatch.setattr(panopticon, "HANDLER_TIMEOUT", 0.01)
+    ran = []
+    window = gui(lambda command, args: ran.append(command))
+    with pytest.raises(TimeoutError):
+        panopticon.PanopticonGUI.control(window, "stop", [])
+    run_ui_events(window)  # the Tk thread gets to it too late
+    assert ran == []
+
+
+class SlowStopMonitor:
+    def __init__(self):
+        self.running = True
+        self.drained = threading.Event()
+
+    def stop(self, wait=True):
+        self.running = False
+        if wait:
+            self.drained.wait()
+
+    def is_stopped(self):
+        return self.drained.is_set()
+
+    def status(self):
+        return {"running": self.running, "stopping": not self.running and not self.is_stopped()}
+
+
+def test_daemon_stop_answers_before_the_pipeline_drains():
+    monitor = SlowStopMonitor()
+    assert PanopticonDaemon.control(monitor, "stop", []) == {"running": False, "stopping": True}
+    with pytest.raises(RuntimeError, match="still stopping"):
+        PanopticonDaemon.control(monitor, "start", [])
@@ -0,0 +1,54 @@
+from DayModel import DayModel
+
+
+def entries():
+    return [
+        {"filename": "a.png", "classification": "on-task"},
+        {"filename": "b.png", "classification": "none"},
+        {"filename": "c.png", "classification": "off-task"},
+    ]
+
+
+def test_totals_follow_changes():
+    model = DayModel("2026-01-05", entries())
+    assert model.totals() == (1, 1, 1)
+    model.classify("b.png", "on-task")
+    model.add({"filename": "d.png", "classification": "none"})
+    model.remove("c.png")
+    assert model.totals() == (2, 0, 1)
+    assert [e["filename"] for e in model.entries()] == ["a.png", "b.png", "d.png"]
+    assert "c.png" not in model and len(model) == 3
+
+
+def test_add_existing_entry_replaces_it():
+    model = DayModel("2026-01-05", entries())
+    model.add({"filename": "a.png", "classification": "off-task"})
+    assert len(model) == 3
+    assert model.totals() == (0, 2, 1)
+
+
+def test_unknown_classifications_count_as_none():
+    model = DayModel("2026-01-05", [{"filename": "a.png", "classification": "maybe"}])
+    assert model.totals() == (0, 0, 1)
+
+
+def test_observers_get_events():
+    model = DayModel("2026-01-05", entries())
+    events = []
+    model.subscribe(lambda event, entry: events.append((event, entry and entry["filename"])))
+    model.add({"filename": "d.png", "classification": "none"})
+    model.add({"filename": "d.png", "classification": "on-task"})
+    model.classify("a.png", "none")
+    model.remove("b.png")
+    model.load([], "2026-01-06")
+    assert events == [("add", "d.png"), ("update", "d.png"), ("update", "a.png"),
+                      ("remove", "b.png"), ("reset", None)]
+    assert model.day == "2026-01-06" and model.totals() == (0, 0, 0)
+
+
+def test_entries_without_a_classification_count_as_none():
+    model = DayModel("2026-01-05", [{"filename": "a.png"}, {"filename": "b.png"}])
+    model.classify("a.png", "on-task")
+    model.remove("b.png")
+    model.add({"filename": "a.png"})
+    assert model.totals() == (0, 0, 1)
@@ -0,0 +1,107 @@
+import io
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from DayPack import (PACK_NAME, DayPack, get_pack, manifest_name, open_frame, output_frame_name, remove_frame,
+                     roll_up_day, write_pack)
+
+
+def png(color, size=(8, 6)):
+    encoded = io.BytesIO()
+    Image.new("RGB", size, color).save(encoded, format="PNG")
+    return encoded.getvalue()
+
+
+@pytest.fixture
+def day_path(tmp_path):
+    path = tmp_path / "2026-01-05"
+    path.mkdir()
+    return path
+
+
+def test_write_pack_round_trip(tmp_path):
+    frames = [("a.png", png((255, 0, 0))), ("b.png", png((0, 0, 255)))]
+    assert write_pack(tmp_path / PACK_NAME, frames) == 2
+    pack = DayPack(tmp_path / PACK_NAME)
+    assert pack.names() == ["a.png", "b.png"]
+    assert bytes(pack.frame("b.png")) == frames[1][1]
+
+
+def test_truncated_pack_is_rejected(tmp_path):
+    write_pack(tmp_path / PACK_NAME, [("a.png", png((1, 2, 3)))])
+    data = (tmp_path / PACK_NAME).read_bytes()
+    (tmp_path / PACK_NAME).write_bytes(data[:-3])
+    with pytest.raises(ValueError):
+        DayPack(tmp_path / PACK_NAME)
+
+
+def test_roll_up_moves_loose_frames_into_the_pack(day_path):
+    (day_path / "screenshot_20260105_090000.png").write_bytes(png((255, 0, 0)))
+    (day_path / "screenshot_20260105_091000.png").write_bytes(png((0, 255, 0)))
+    (day_path / "screenshots.json").write_text("{}")  # not a frame, stays loose
+    assert roll_up_day(day_path) == 2
+    assert sorted(p.name for p in day_path.iterdir()) == [PACK_NAME, "screenshots.json"]
+    image = open_frame(day_path / "screenshot_20260105_091000.png")
+    assert image.getpixel((0, 0)) == (0, 255, 0)
+    assert roll_up_day(day_path) is None  # nothing changed
+
+
+def test_re_roll_keeps_referenced_frames_and_adds_new_ones(day_path):
+    for minute, color in ((0, (255, 0, 0)), (10, (0, 255, 0))):
+        (day_path / f"screenshot_20260105_09{minute:02d}00.png").write_bytes(png(color))
+    roll_up_day(day_path)
+    (day_path / "screenshot_20260105_092000.png").write_bytes(png((0, 0, 255)))
+    referenced = {"screenshot_20260105_091000.png", "screenshot_20260105_092000.png"}
+    assert roll_up_day(day_path, referenced) == 2
+    assert get_pack(day_path).names() == sorted(referenced)
+    with pytest.raises(FileNotFoundError):
+        open_frame(day_path / "screenshot_20260105_090000.png")
+
+
+class StopAfter:
+    """A stop event that becomes set after ``checks`` calls to is_set()."""
+
+    def __init__(self, checks):
+        self.checks = checks
+
+    def is_set(self):
+        self.checks -= 1
+        return self.checks < 0
+
+
+def test_stopping_mid_pack_leaves_the_day_untouched(day_path):
+    names = [f"screenshot_20260105_09{minute:02d}00.png" for minute in (0, 10, 20)]
+    for name in names:
+        (day_path / name).write_bytes(png((255, 0, 0)))
+    assert roll_up_day(day_path, stop_event=StopAfter(1)) is None
+    assert sorted(p.name for p in day_path.iterdir()) == names  # no pack, no temp file
+
+
+def test_per_output_capture_round_trip(day_path):
+    name = "screenshot_20260105_090000.png"
+    outputs = [{"name": "DP-1", "x": 0, "y": 0, "width": 80, "height": 60},
+               {"name": "HDMI-1", "x": 80, "y": 0, "width": 40, "height": 60}]
+    for number, (output, color) in enumerate(zip(outputs, ((255, 0, 0), (0, 0, 255)))):
+        output["frame"] = output_frame_name(name, number)
+        (day_path / output["frame"]).write_bytes(png(color, (output["width"] // 10, output["height"] // 10)))
+    (day_path / manifest_name(name)).write_text(json.dumps({"pixel_size": 10, "outputs": outputs}))
+
+    for _ in range(2):  # loose, then packed
+        image = np.asarray(open_frame(day_path / name))
+        assert image.shape == (6, 12, 3)
+        assert tuple(image[0, 0]) == (255, 0, 0) and tuple(image[0, -1]) == (0, 0, 255)
+        roll_up_day(day_path, {name})
+    assert sorted(get_pack(day_path).names()) == sorted([manifest_name(name)] + [o["frame"] for o in outputs])
+
+
+def test_remove_frame_removes_outputs_and_manifest(day_path):
+    name = "screenshot_20260105_090000.png"
+    frame = output_frame_name(name, 0)
+    (day_path / frame).write_bytes(png((1, 2, 3)))
+    outputs = [{"name": "DP-1", "x": 0, "y": 0, "width": 8, "height": 6, "frame": frame}]
+    (day_path / manifest_name(name)).write_text(json.dumps({"pixel_size": 1, "outputs": outputs}))
+    remove_frame(day_path / name)
+    assert list(day_path.iterdir()) == []
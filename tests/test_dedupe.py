@@ -0,0 +1,74 @@
+import datetime
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from Pixelation import hash_distance
+from ProductivityMonitor import Capture, ProductivityMonitor
+from ScreenshotStore import close_stores, image_name, open_store
+
+DAY = "2026-01-05"
+
+
+def screen(seed):
+    pixels = np.random.default_rng(seed).integers(0, 256, (12, 16, 3), dtype=np.uint8)
+    return Image.fromarray(pixels.repeat(20, 0).repeat(20, 1))
+
+
+@pytest.fixture
+def monitor(tmp_path):
+    monitor = ProductivityMonitor(tmp_path, DAY, 10, 10, classify_screenshot=None, per_output=False)
+    yield monitor
+    close_stores()
+
+
+def capture(monitor, image, second):
+    processed = monitor.process_capture(Capture(image, datetime.datetime(2026, 1, 5, 9, 0, second), monitor.save_dir, DAY))
+    monitor.commit_screenshot(processed)
+    open_store(monitor.save_dir).flush()
+    return processed, f"screenshot_20260105_0900{second:02d}.{processed.extension}"
+
+
+def frame_files(monitor):
+    return sorted(p.name for p in (monitor.save_dir / DAY).glob("screenshot_*"))
+
+
+def test_repeated_frame_reuses_the_previous_file(monitor):
+    _, first = capture(monitor, screen(1), 0)
+    _, second = capture(monitor, screen(1), 10)
+    store = open_store(monitor.save_dir)
+    assert store.get(DAY, second)["image"] == first
+    assert store.get(DAY, second)["pending"] == 1  # the original was never answered
+    assert frame_files(monitor) == [first]
+
+
+def test_classification_is_inherited_only_when_enabled(monitor):
+    store = open_store(monitor.save_dir)
+    _, first = capture(monitor, screen(1), 0)
+    store.classify(DAY, first, "on-task")
+    _, inherited = capture(monitor, screen(1), 10)
+    entry = store.get(DAY, inherited)
+    assert entry["classification"] == "on-task" and not entry.get("pending")
+
+    monitor.dedupe_inherit = False
+    _, asked = capture(monitor, screen(1), 20)
+    entry = store.get(DAY, asked)
+    assert entry["classification"] == "none" and entry["pending"] == 1
+    assert entry["image"] == first
+
+
+def test_changed_frame_is_saved_as_new(monitor):
+    first_processed, first = capture(monitor, screen(1), 0)
+    processed, second = capture(monitor, screen(2), 10)
+    assert hash_distance(first_processed.hash, processed.hash) > monitor.dedupe_threshold
+    assert image_name(open_store(monitor.save_dir).get(DAY, second)) == second
+    assert frame_files(monitor) == [first, second]
+
+
+def test_new_file_is_saved_when_the_original_was_removed(monitor):
+    _, first = capture(monitor, screen(1), 0)
+    open_store(monitor.save_dir).delete(DAY, first)
+    _, second = capture(monitor, screen(1), 10)
+    assert image_name(open_store(monitor.save_dir).get(DAY, second)) == second
+    assert second in frame_files(monitor)
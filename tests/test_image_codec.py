@@ -0,0 +1,35 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from ImageCodec import CODECS, PngCodec, create_codec, open_image
+
+
+def grid():
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 256, (54, 96, 3), dtype=np.uint8), "RGB")
+
+
+@pytest.mark.parametrize("name", [name for name in CODECS if name != "png-palette"])
+def test_lossless_codecs_round_trip(name, tmp_path):
+    codec = create_codec(name)
+    if codec.name != name:
+        pytest.skip(f"{name} is not supported by this Pillow build")
+    path = tmp_path / f"frame.{codec.extension}"
+    with open(path, "wb") as f:
+        codec.save(grid(), f)
+    assert np.array_equal(np.asarray(open_image(path)), np.asarray(grid()))
+
+
+def test_palette_codec_reads_back_as_rgb():
+    encoded = io.BytesIO()
+    create_codec("png-palette").save(grid(), encoded)
+    image = open_image(io.BytesIO(encoded.getvalue()))
+    assert image.mode == "RGB"
+    assert image.size == grid().size
+
+
+def test_unknown_codec_falls_back_to_png():
+    assert isinstance(create_codec("nope"), PngCodec)
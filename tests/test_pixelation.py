@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from Pixelation import block_mean, grid_hash, hash_distance
+
+
+def reference_block_mean(array, pixel_size):
+    h, w = array.shape[:2]
+    bh, bw = min(pixel_size, h), min(pixel_size, w)
+    gh, gw = h // bh, w // bw
+    blocks = array[:gh * bh, :gw * bw].astype(np.uint32).reshape(gh, bh, gw, bw, 3)
+    area = bh * bw
+    return ((blocks.sum(axis=(1, 3)) + area // 2) // area).astype(np.uint8)
+
+
+@pytest.mark.parametrize("size", [(1921, 1083), (640, 480), (5, 3), (1, 1)])
+@pytest.mark.parametrize("pixel_size", [1, 7, 20, 300])
+def test_block_mean_matches_reference(size, pixel_size):
+    rng = np.random.default_rng(sum(size) + pixel_size)
+    array = rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+    result = np.asarray(block_mean(Image.fromarray(array), pixel_size))
+    assert np.array_equal(result, reference_block_mean(array, pixel_size))
+
+
+def test_block_mean_works_in_bands(monkeypatch):
+    import Pixelation
+    monkeypatch.setattr(Pixelation, "BAND_BYTES", 1)  # one block row per band
+    array = np.random.default_rng(1).integers(0, 256, (100, 90, 3), dtype=np.uint8)
+    result = np.asarray(block_mean(Image.fromarray(array), 7))
+    assert np.array_equal(result, reference_block_mean(array, 7))
+
+
+def test_grid_hash_tolerates_small_changes():
+    array = np.random.default_rng(2).integers(0, 256, (54, 96, 3), dtype=np.uint8)
+    changed = array.copy()
+    changed[0, 0] = 255 - changed[0, 0]
+    assert hash_distance(grid_hash(Image.fromarray(array)), grid_hash(Image.fromarray(changed))) <= 2
+    assert hash_distance(grid_hash(Image.fromarray(array)), grid_hash(Image.fromarray(255 - array))) > 16
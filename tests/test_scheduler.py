@@ -0,0 +1,155 @@
+import pytest
+
+from Scheduler import CaptureScheduler, FakeActivityProvider, create_schedule
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeStop:
+    """Stands in for the stop Event: waiting advances the fake clock instead of sleeping."""
+
+    def __init__(self, clock, on_wait=None):
+        self.clock = clock
+        self.on_wait = on_wait  # called after each wait, to change the world meanwhile
+        self.stopped = False
+
+    def wait(self, timeout=None):
+        self.clock.now += timeout
+        if self.on_wait:
+            self.on_wait()
+        return self.stopped
+
+    def is_set(self):
+        return self.stopped
+
+
+def gaps(schedule, n=2000):
+    schedule.reset(0)
+    deadlines = [schedule.next_deadline() for _ in range(n)]
+    return [b - a for a, b in zip([0] + deadlines, deadlines)]
+
+
+def test_uniform_gaps_stay_within_bounds():
+    assert all(30 <= gap <= 600 for gap in gaps(create_schedule("uniform", 30, 600, seed=1)))
+
+
+def test_poisson_gaps_average_the_midpoint_and_can_undercut_min():
+    values = gaps(create_schedule("poisson", 30, 90, seed=1), 20000)
+    assert sum(values) / len(values) == pytest.approx(60, rel=0.05)
+    assert min(values) < 30
+
+
+def test_jittered_takes_one_capture_per_slot():
+    schedule = create_schedule("jittered", 50, 70, seed=1)
+    schedule.reset(0)
+    for slot in range(500):
+        assert slot * 60 <= schedule.next_deadline() < (slot + 1) * 60
+
+
+def test_unknown_schedule():
+    with pytest.raises(ValueError):
+        create_schedule("hourly", 1, 2)
+
+
+def scheduler(clock, **options):
+    options.setdefault("idle_after", 0)
+    return CaptureScheduler(create_schedule("uniform", 10, 10, seed=0), clock=clock, **options)
+
+
+def test_first_capture_is_immediate_then_on_deadlines():
+    clock = FakeClock()
+    capture = scheduler(clock)
+    stop = FakeStop(clock)
+    times = []
+    for _ in range(4):
+        assert capture.wait(stop)
+        times.append(clock.now)
+    assert times == [1000, 1010, 1020, 1030]
+    assert capture.taken == 4 and capture.missed == 0
+
+
+def test_slow_captures_skip_missed_deadlines_instead_of_bursting():
+    clock = FakeClock()
+    capture = scheduler(clock)
+    stop = FakeStop(clock)
+    assert capture.wait(stop)
+    clock.now += 35  # the capture took longer than three intervals
+    assert capture.wait(stop)
+    assert capture.missed == 3
+    assert clock.now == 1045  # a full gap after the late capture finished
+
+
+def test_zero_intervals_are_clamped():
+    schedule = create_schedule("poisson", 0, 0, seed=1)
+    schedule.reset(0)
+    assert schedule.next_deadline() > 0
+
+
+def test_short_gaps_do_not_spin_after_a_slow_capture():
+    clock = FakeClock()
+    capture = CaptureScheduler(create_schedule("uniform", 1, 1), clock=clock, idle_after=0)
+    stop = FakeStop(clock)
+    assert capture.wait(stop)
+    clock.now += 100000
+    assert capture.wait(stop)
+    assert clock.now == 101001
+    assert capture.missed == 100000
+
+
+def test_stop_ends_the_wait():
+    clock = FakeClock()
+    capture = scheduler(clock)
+    stop = FakeStop(clock)
+    assert capture.wait(stop)
+    stop.stopped = True
+    assert not capture.wait(stop)
+
+
+def test_captures_are_suspended_while_idle_or_locked():
+    clock = FakeClock()
+    activity = FakeActivityProvider(idle=0)
+    capture = scheduler(clock, activity=activity, idle_after=300, poll_interval=5)
+    waits = []
+
+    def world():
+        waits.append(clock.now)
+        if len(waits) == 3:
+            activity.idle = 600  # user walks away during the third wait
+        if clock.now >= 1200:
+            activity.idle = 0
+
+    stop = FakeStop(clock, world)
+    assert capture.wait(stop)
+    assert capture.wait(stop)
+    assert capture.wait(stop)
+    assert capture.suspended == 1
+    assert clock.now >= 1200  # nothing was taken while away
+
+    activity.locked = True
+    stop.on_wait = lambda: setattr(activity, "locked", clock.now < 1300)
+    assert capture.wait(stop)
+    assert capture.suspended == 2 and clock.now >= 1300
+
+
+def test_set_schedule_applies_without_waiting_out_the_old_deadline():
+    clock = FakeClock()
+    capture = CaptureScheduler(create_schedule("uniform", 1000, 1000), clock=clock, idle_after=0,
+                               recheck_interval=1)
+    calls = []
+
+    def world():
+        calls.append(clock.now)
+        if len(calls) == 2:
+            capture.set_schedule(create_schedule("uniform", 5, 5))
+
+    stop = FakeStop(clock, world)
+    assert capture.wait(stop)
+    start = clock.now
+    assert capture.wait(stop)
+    assert clock.now - start == 2 + 5  # noticed at the next recheck, then one new gap
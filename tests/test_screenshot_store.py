@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+from ScreenshotStore import ScreenshotStore
+
+
+DAY = "2026-01-05"
+
+
+def name(hour, minute=0, second=0, day="20260105"):
+    return f"screenshot_{day}_{hour:02d}{minute:02d}{second:02d}.png"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ScreenshotStore(tmp_path, flush_interval=0)
+    yield store
+    store.close()
+
+
+def test_add_get_and_day_entries(store):
+    store.add(DAY, {"filename": name(10, 5), "classification": "none", "width": 1920, "pending": 1})
+    store.add(DAY, {"filename": name(9)})
+    assert [e["filename"] for e in store.day_entries(DAY)] == [name(9), name(10, 5)]
+    entry = store.get(DAY, name(10, 5))
+    assert entry["classification"] == "none"
+    assert entry["width"] == 1920
+    assert store.get(DAY, "missing.png") is None
+    assert store.days() == [DAY]
+
+
+def test_classify_clears_pending(store):
+    store.add(DAY, {"filename": name(9), "pending": 1})
+    store.add(DAY, {"filename": name(10), "pending": 1})
+    assert [entry["filename"] for _, entry in store.pending_entries()] == [name(9), name(10)]
+    store.classify(DAY, name(9), "none")  # any explicit answer counts as reviewed
+    assert [entry["filename"] for _, entry in store.pending_entries()] == [name(10)]
+
+
+def test_rollups_follow_inserts_updates_and_deletes(store):
+    store.add(DAY, {"filename": name(9), "classification": "on-task"})
+    store.add(DAY, {"filename": name(9, 30)})
+    store.add(DAY, {"filename": name(14), "classification": "off-task"})
+    assert store.hourly_rollups(DAY, DAY) == {(DAY, 9): (1, 0, 1), (DAY, 14): (0, 1, 0)}
+
+    store.classify(DAY, name(9, 30), "on-task")
+    store.delete(DAY, name(14))
+    assert store.daily_rollups(DAY, DAY) == {DAY: (2, 0, 0)}
+    assert store.counts_by_class() == {"on-task": 2, "off-task": 0, "none": 0}
+
+
+def test_upsert_keeps_rollups_consistent(store):
+    store.add(DAY, {"filename": name(9), "classification": "on-task"})
+    store.add(DAY, {"filename": name(9), "classification": "off-task"})
+    assert len(store.day_entries(DAY)) == 1
+    assert store.daily_rollups(DAY, DAY) == {DAY: (0, 1, 0)}
+
+
+def test_day_versions_change_with_every_edit(store):
+    store.add(DAY, {"filename": name(9)})
+    first = store.day_versions(DAY, DAY)[DAY]
+    store.classify(DAY, name(9), "on-task")
+    second = store.day_versions(DAY, DAY)[DAY]
+    store.delete(DAY, name(9))
+    third = store.day_versions(DAY, DAY)[DAY]
+    assert first < second < third
+    assert store.day_versions("2026-02-01", "2026-02-28") == {}
+
+
+def test_rollups_are_rebuilt_for_old_databases(tmp_path):
+    store = ScreenshotStore(tmp_path, flush_interval=0)
+    store.add(DAY, {"filename": name(9), "classification": "on-task"})
+    store.flush()
+    with store._lock:
+        store._conn.execute("DELETE FROM hourly_rollups")
+        store._conn.execute("PRAGMA user_version = 0")
+        store._conn.commit()
+    store.close()
+
+    reopened = ScreenshotStore(tmp_path, flush_interval=0)
+    assert reopened.daily_rollups(DAY, DAY) == {DAY: (1, 0, 0)}
+    reopened.close()
+
+
+def test_writer_survives_failing_writes(store):
+    def bad_write(conn):
+        raise TypeError("bad entry")
+
+    store._submit(bad_write)
+    store.add(DAY, {"filename": name(9)})
+    store.flush()
+    assert store._writer.is_alive()
+    store.add(DAY, {"filename": name(10)})
+    assert len(store.day_entries(DAY)) == 2
+
+
+def test_import_day_folders_reads_without_modifying(tmp_path):
+    day_path = tmp_path / DAY
+    day_path.mkdir()
+    snapshot = {"day": DAY, "screenshots": [{"filename": name(9), "classification": "none"}]}
+    (day_path / "screenshots.json").write_text(json.dumps(snapshot))
+    journal = json.dumps({"op": "classify", "filename": name(9), "classification": "on-task"}) + "\n"
+    (day_path / "screenshots.journal").write_text(journal + '{"op": "add", "fil')  # torn tail
+    before = {p.name: p.read_bytes() for p in day_path.iterdir()}
+
+    store = ScreenshotStore(tmp_path, flush_interval=0)
+    assert store.import_day_folders() == 1
+    assert store.import_day_folders() == 0  # only once
+    assert store.get(DAY, name(9))["classification"] == "on-task"
+    store.close()
+    assert {p.name: p.read_bytes() for p in day_path.iterdir()} == before
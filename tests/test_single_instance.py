@@ -0,0 +1,80 @@
+import os
+import socket
+
+import pytest
+
+from SingleInstance import CaptureLock, NotRunning, SingleInstance, SingleInstanceException, send_command
+
+
+@pytest.fixture(autouse=True)
+def runtime_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+
+
+def handler(command, args):
+    if command == "fail":
+        raise ValueError("no such thing")
+    return {"command": command, "args": args}
+
+
+def raw_request(path, data):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(2)
+        conn.connect(path)
+        conn.sendall(data)
+        return conn.makefile("rb").readline()
+
+
+def test_commands_round_trip():
+    with SingleInstance(handler=handler):
+        assert send_command("status", ["x"]) == {"command": "status", "args": ["x"]}
+        with pytest.raises(RuntimeError, match="no such thing"):
+            send_command("fail")
+    with pytest.raises(NotRunning):
+        send_command("status")
+
+
+def test_second_instance_of_a_kind_is_refused():
+    with SingleInstance():
+        with pytest.raises(SingleInstanceException):
+            with SingleInstance():
+                pass
+        with SingleInstance(name="panopticon-daemon"):  # another kind may run beside it
+            pass
+
+
+@pytest.mark.parametrize("data", [b"{}\n", b"[1]\n", b"not json\n", b'{"command": "x", "args": 3}\n', b"\n"])
+def test_bad_requests_get_errors_and_the_server_keeps_running(data):
+    with SingleInstance(handler=handler) as instance:
+        assert b'"ok": false' in raw_request(instance.path, data)
+        assert send_command("status") == {"command": "status", "args": []}
+
+
+def test_socket_is_owner_only():
+    with SingleInstance() as instance:
+        assert os.stat(instance.path).st_mode & 0o077 == 0
+
+
+def test_foreign_fallback_directory_is_refused(tmp_path, monkeypatch):
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    shared = tmp_path / f"panopticon-{os.getuid()}"
+    shared.mkdir(mode=0o777)
+    shared.chmod(0o777)
+    with pytest.raises(SingleInstanceException, match="not a private directory"):
+        with SingleInstance():
+            pass
+    with pytest.raises(NotRunning):
+        send_command("status")
+
+
+def test_capture_lock_is_exclusive():
+    first, second = CaptureLock(), CaptureLock()
+    first.acquire()
+    assert second.held_elsewhere() and not first.held_elsewhere()
+    with pytest.raises(SingleInstanceException):
+        second.acquire(wait=0)
+    first.release()
+    assert not second.held_elsewhere()
+    second.acquire(wait=0)
+    second.release()
@@ -0,0 +1,106 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from SuggestionIndex import FEATURE_DIM, NO_FEATURES, ROW_BYTES, SuggestionIndex
+
+
+def unit(seed):
+    vector = np.random.default_rng(seed).normal(size=FEATURE_DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def clusters():
+    # Two well separated groups of features, one per label
+    on, off = unit(1), unit(2)
+    rng = np.random.default_rng(3)
+    jitter = lambda v: v + rng.normal(scale=0.05, size=FEATURE_DIM).astype(np.float32)  # noqa: E731
+    return on, off, [jitter(on) for _ in range(15)], [jitter(off) for _ in range(15)]
+
+
+def test_suggests_the_nearest_label(tmp_path, clusters):
+    on, off, on_rows, off_rows = clusters
+    index = SuggestionIndex(tmp_path, k=5, min_labeled=10)
+    index.add_many(on_rows, ["on-task"] * 15)
+    index.add_many(off_rows, ["off-task"] * 15)
+    label, confidence = index.suggest(vector=on)
+    assert label == "on-task" and confidence > 0.9
+    assert index.suggest(vector=off)[0] == "off-task"
+    assert index.suggest(row=0)[0] == "on-task"  # without voting for itself
+
+
+def test_no_suggestion_until_enough_labels(tmp_path, clusters):
+    on, _, on_rows, _ = clusters
+    index = SuggestionIndex(tmp_path, min_labeled=20)
+    index.add_many(on_rows, ["on-task"] * 15)
+    assert index.suggest(vector=on) is None
+
+
+def test_labels_persist_and_relabel(tmp_path, clusters):
+    _, _, on_rows, _ = clusters
+    index = SuggestionIndex(tmp_path)
+    rows = index.add_many(on_rows[:3], [None, "on-task", "none"])
+    index.label(rows[0], "off-task")
+    index.label(rows[1], None)
+    reopened = SuggestionIndex(tmp_path)
+    assert len(reopened) == 3 and reopened.labeled_count() == 1
+    assert np.allclose(reopened.vector(rows[2]), on_rows[2])
+
+
+def test_torn_append_is_dropped(tmp_path, clusters):
+    _, _, on_rows, _ = clusters
+    SuggestionIndex(tmp_path).add_many(on_rows[:2], ["on-task", "on-task"])
+    with open(tmp_path / "suggestions" / "features.f32", "ab") as f:
+        f.write(b"\0" * (ROW_BYTES + 7))  # crashed before its label was written
+    index = SuggestionIndex(tmp_path)
+    assert len(index) == 2
+    assert index.add(on_rows[2], "on-task") == 2
+
+
+def _append(args):
+    save_dir, tag = args
+    index = SuggestionIndex(save_dir)
+    return [(index.add(np.full(FEATURE_DIM, tag * 1000 + i, np.float32), "on-task"), tag * 1000 + i)
+            for i in range(50)]
+
+
+def test_processes_append_to_one_index(tmp_path):
+    with multiprocessing.get_context("fork").Pool(3) as pool:
+        results = [row for rows in pool.map(_append, [(tmp_path, tag) for tag in (1, 2, 3)]) for row in rows]
+    index = SuggestionIndex(tmp_path)
+    assert len(index) == 150
+    assert len({row for row, _ in results}) == 150
+    assert all(index.vector(row)[0] == value for row, value in results)
+
+
+def test_sees_rows_added_by_another_instance(tmp_path, clusters):
+    _, _, on_rows, _ = clusters
+    reader, writer = SuggestionIndex(tmp_path), SuggestionIndex(tmp_path)
+    writer.add_many(on_rows[:4], ["on-task"] * 4)
+    assert len(reader) == 4 and reader.labeled_count() == 4
+    writer.label(0, None)
+    assert reader.labeled_count() == 3
+
+
+def test_backfill_skips_missing_images_on_later_runs(tmp_path):
+    from PIL import Image
+
+    from ScreenshotStore import ScreenshotStore
+
+    store = ScreenshotStore(tmp_path, flush_interval=0)
+    (tmp_path / "2026-01-05").mkdir()
+    Image.new("RGB", (16, 12), (200, 30, 30)).save(tmp_path / "2026-01-05" / "screenshot_20260105_090000.png")
+    store.add("2026-01-05", {"filename": "screenshot_20260105_090000.png", "classification": "on-task"})
+    store.add("2026-01-05", {"filename": "screenshot_20260105_091000.png"})  # file deleted by hand
+    index = SuggestionIndex(tmp_path)
+    try:
+        assert index.backfill(store) == 1
+        store.flush()
+        assert store.get("2026-01-05", "screenshot_20260105_091000.png")["feature_row"] == NO_FEATURES
+        assert store.entries_without_features() == []
+        assert index.backfill(store) == 0 and len(index) == 1
+        assert index.suggest(row=NO_FEATURES) is None
+    finally:
+        store.close()